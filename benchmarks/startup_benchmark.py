@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Startup-time regression benchmark for tpt_agent.py.
+
+Checks two things:
+1. Importing the CLI module does not pull in browser-side modules
+   (Playwright, asyncio, src.browser, src.uploader, ...).
+2. The median wall time of `tpt_agent.py --help` stays under a budget.
+
+Exits with status 1 if either check fails, so it can run in CI.
+
+Usage:
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --runs 20 --budget-ms 250
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.startup import HEAVY_MODULES, parse_import_times  # noqa: E402
+
+
+def time_command(args: list[str], runs: int) -> list[float]:
+    """Run a command repeatedly and return wall times in milliseconds."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(args, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def heavy_imports() -> list[str]:
+    """Return browser-side modules loaded by `import tpt_agent`."""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import tpt_agent'],
+        cwd=ROOT, stderr=subprocess.PIPE, text=True, check=True
+    )
+    records, _ = parse_import_times(completed.stderr)
+    return sorted({
+        r['module'] for r in records
+        if any(r['module'] == h or r['module'].startswith(h + '.') for h in HEAVY_MODULES)
+    })
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='tpt_agent.py startup benchmark')
+    parser.add_argument('--runs', type=int, default=10, help='Timed runs per command')
+    parser.add_argument('--budget-ms', type=float, default=300.0,
+                        help='Maximum median time for tpt_agent.py --help')
+    args = parser.parse_args()
+
+    failed = False
+
+    heavy = heavy_imports()
+    if heavy:
+        failed = True
+        print(f"FAIL: import tpt_agent loads browser-side modules: {', '.join(heavy)}")
+    else:
+        print("OK:   import tpt_agent loads no browser-side modules")
+
+    baseline = statistics.median(time_command([sys.executable, '-c', 'pass'], args.runs))
+    timings = time_command([sys.executable, 'tpt_agent.py', '--help'], args.runs)
+    median = statistics.median(timings)
+
+    print(f"Interpreter startup: {baseline:.1f} ms (median of {args.runs})")
+    print(f"tpt_agent.py --help: {median:.1f} ms median, {min(timings):.1f} ms best, "
+          f"{median - baseline:.1f} ms over interpreter startup")
+
+    if median > args.budget_ms:
+        failed = True
+        print(f"FAIL: median {median:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+    else:
+        print(f"OK:   within budget of {args.budget_ms:.0f} ms")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
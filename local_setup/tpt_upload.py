@@ -12,8 +12,11 @@ Usage:
 import asyncio
 import csv
 import os
+import re
 import sys
+import time
 from pathlib import Path
+from urllib.parse import urlparse
 
 # Try to import playwright
 try:
@@ -34,9 +37,11 @@ TPT_PASSWORD = "9704418dz"
 
 # Settings
 SAVE_AS_DRAFT = False  # True = save as draft, False = publish immediately
-HEADLESS = False  # False = show browser window, True = run invisibly
+HEADLESS = True  # True = run invisibly; a window opens only if you need to log in (2FA etc.)
 DELAY_BETWEEN_UPLOADS = 5  # seconds between each upload (increased for safety)
+PRELOAD_NEXT_FORM = True  # Open the next product's form in a second tab while uploading
 MAX_RETRIES = 1  # Number of times to retry a failed product
+MAX_BROWSER_RESTARTS = 3  # Browser crashes to recover from (relaunch + retry the product)
 
 # Use persistent browser profile to save login session
 USER_DATA_DIR = os.path.join(os.path.dirname(__file__), "browser_data")
@@ -46,16 +51,167 @@ USER_DATA_DIR = os.path.join(os.path.dirname(__file__), "browser_data")
 # UPLOAD LOGIC
 # =============================================================================
 
+# Only the URL path is matched, so e.g. /track?event=upload is not an upload
+UPLOAD_PATH_PATTERN = re.compile(r'/(?:uploads?|files?|assets?|attachments?)(?:/[\w.-]*)?/?$', re.IGNORECASE)
+
+
+def is_upload_response(response):
+    """True if this network response answers a file upload (multipart POST, or PUT of the file)."""
+    request = response.request
+    if request.method not in ('POST', 'PUT'):
+        return False
+    content_type = (request.headers or {}).get('content-type', '')
+    if request.method == 'POST' and 'multipart/form-data' not in content_type:
+        return False
+    return bool(UPLOAD_PATH_PATTERN.search(urlparse(request.url).path))
+
+
+# The product form saves to /Product/Create (or /Product/Edit/<id>, /api/products/...)
+# on TPT's own host, or through a GraphQL mutation such as createProduct
+PRODUCT_SAVE_PATH_PATTERN = re.compile(
+    r'^(?:/api(?:/v\d+)?)?/products?(?:/create|/edit/\d+|/\d+|/save)?/?$', re.IGNORECASE
+)
+PRODUCT_SAVE_OPERATION_PATTERN = re.compile(
+    r'^(?:create|update|save|publish|edit)(?:product|listing|resource)(?:draft)?$', re.IGNORECASE
+)
+LISTING_URL_ID_PATTERN = re.compile(r'/Product/(?:[^/?#"]+-)?(\d+)(?:[/?#]|$)')
+
+# Listing ID and URL of every submitted product, appended as uploads finish
+RESULTS_FILE = os.path.join(os.path.dirname(__file__), "upload_results.csv")
+
+
+def is_product_save_response(response):
+    """True if this network response answers the product form's save request."""
+    request = response.request
+    if request.method not in ('POST', 'PUT', 'PATCH'):
+        return False
+    url = urlparse(request.url)
+    if not (url.hostname or '').endswith('teacherspayteachers.com') or is_upload_response(response):
+        return False
+    if re.search(r'/graphql/?$', url.path, re.IGNORECASE):
+        try:
+            payload = request.post_data_json
+        except Exception:
+            payload = None
+        operation = payload.get('operationName') if isinstance(payload, dict) else None
+        if not operation and isinstance(payload, dict):
+            match = re.search(r'\bmutation\s+(\w+)', payload.get('query') or '')
+            operation = match.group(1) if match else None
+        return bool(PRODUCT_SAVE_OPERATION_PATTERN.match(operation or ''))
+    return bool(PRODUCT_SAVE_PATH_PATTERN.match(url.path))
+
+
+async def parse_save_response(response):
+    """Pull the status, listing ID and URL out of a product save response."""
+    info = {'ok': response.ok, 'status': response.status, 'listing_id': None, 'url': None}
+    try:
+        body = await response.json()
+    except Exception:
+        body = None
+
+    if isinstance(body, dict):
+        if body.get('errors'):
+            info['ok'] = False
+        # The listing is the body itself, its 'product' object, or the
+        # GraphQL mutation's result under 'data' - nothing nested deeper
+        data = body.get('data') if isinstance(body.get('data'), dict) else body
+        if data is not body and len(data) == 1 and isinstance(next(iter(data.values())), dict):
+            data = next(iter(data.values()))
+        if isinstance(data.get('product'), dict):
+            data = data['product']
+        for key in ('productId', 'product_id', 'listingId', 'id'):
+            if data.get(key) and str(data[key]).isdigit():
+                info['listing_id'] = str(data[key])
+                break
+        for key in ('url', 'productUrl', 'redirectUrl', 'location'):
+            if isinstance(data.get(key), str):
+                info['url'] = data[key]
+                break
+
+    if not info['url']:
+        info['url'] = (response.headers or {}).get('location')
+    if not info['url'] and LISTING_URL_ID_PATTERN.search(response.url):
+        info['url'] = response.url
+    if info['url'] and info['url'].startswith('/'):
+        info['url'] = "https://www.teacherspayteachers.com" + info['url']
+    if info['url'] and not info['listing_id']:
+        match = LISTING_URL_ID_PATTERN.search(info['url'])
+        info['listing_id'] = match.group(1) if match else None
+    return info
+
+
+def record_result(filename, info):
+    """Append a submitted product's listing ID and URL to RESULTS_FILE."""
+    new_file = not os.path.exists(RESULTS_FILE)
+    with open(RESULTS_FILE, 'a', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(['filename', 'listing_id', 'url', 'http_status', 'time'])
+        writer.writerow([filename, info['listing_id'] or '', info['url'] or '', info['status'],
+                         time.strftime('%Y-%m-%d %H:%M:%S')])
+
+
+# Products whose Submit was clicked in this run; a retry of one of these
+# first checks whether the earlier submit created the listing after all
+submitted_products = set()
+
+LISTING_LINK_PATTERN = re.compile(r'<a[^>]+href="([^"]*/Product/[^"?#]*-(\d+))[^"]*"[^>]*>(.*?)</a>', re.DOTALL)
+
+
+def normalize_title(title):
+    """Lower-case a title and strip punctuation so listing titles compare equal."""
+    title = re.sub(r'[^\w\s]', ' ', (title or '').lower())
+    return ' '.join(title.split())
+
+
+async def find_listing_by_title(page, title, pages=2):
+    """
+    Look for a listing (or draft) with this title on the first My-Products pages.
+
+    Returns the listing as {'listing_id', 'url'}, False if there is none,
+    or None if My-Products could not be read.
+    """
+    wanted = normalize_title(title[:80])
+    try:
+        for page_number in range(1, pages + 1):
+            url = "https://www.teacherspayteachers.com/My-Products"
+            if page_number > 1:
+                url += f"?page={page_number}"
+            response = await page.context.request.get(url)
+            if not response.ok:
+                return None
+            for href, listing_id, text in LISTING_LINK_PATTERN.findall(await response.text()):
+                link_title = normalize_title(re.sub(r'<[^>]+>', ' ', text))
+                if link_title and link_title == wanted:
+                    if href.startswith('/'):
+                        href = "https://www.teacherspayteachers.com" + href
+                    return {'listing_id': listing_id, 'url': href}
+    except Exception as e:
+        print(f"   Could not search My Products: {e}")
+        return None
+    return False
+
+
 async def check_if_logged_in(page):
-    """Check if already logged in to TPT."""
-    print("Checking if already logged in...")
-    await page.goto("https://www.teacherspayteachers.com/My-Products")
-    await asyncio.sleep(3)
+    """
+    Check if already logged in to TPT, without loading a page.
 
-    current_url = page.url.lower()
-    if "login" in current_url or "signin" in current_url:
+    Looks for saved TPT cookies, then asks for My Products once with
+    redirects off: logged in gets the page, logged out a redirect to Login.
+    """
+    print("Checking if already logged in...")
+    try:
+        cookies = await page.context.cookies("https://www.teacherspayteachers.com")
+        now = time.time()
+        if not any(c.get('expires', -1) == -1 or c['expires'] > now for c in cookies):
+            return False
+        response = await page.context.request.get(
+            "https://www.teacherspayteachers.com/My-Products", max_redirects=0, timeout=10000
+        )
+        return 200 <= response.status < 300
+    except Exception as e:
+        print(f"   Could not check login: {e}")
         return False
-    return True
 
 
 async def login_to_tpt(page):
@@ -104,18 +260,8 @@ async def login_to_tpt(page):
     return True
 
 
-async def upload_product(page, product, pdf_folder):
-    """Upload a single product to TPT."""
-    filename = product['filename']
-    title = product['title']
-    description = product['description']
-    price = product['price']
-    grades = product['grades']
-
-    print(f"\n{'='*60}")
-    print(f"Uploading: {title[:50]}...")
-    print(f"{'='*60}")
-
+async def open_product_form(page):
+    """Navigate a page to a fresh Digital Download product form."""
     # Step 1: Go to My Products page
     print("Step 1: Going to My Products...")
     await page.goto("https://www.teacherspayteachers.com/My-Products")
@@ -247,6 +393,36 @@ async def upload_product(page, product, pdf_folder):
 
     await page.wait_for_load_state("networkidle")
     await asyncio.sleep(2)
+    return True
+
+
+async def preload_product_form(context):
+    """Open a new tab on a fresh product form, ready for the next product."""
+    page = await context.new_page()
+    try:
+        if await open_product_form(page):
+            return page
+    except Exception as e:
+        print(f"   Could not pre-load next product form: {e}")
+    await page.close()
+    return None
+
+
+async def upload_product(page, product, pdf_folder, form_ready=False):
+    """Upload a single product to TPT (form_ready: page already shows a new product form)."""
+    filename = product['filename']
+    title = product['title']
+    description = product['description']
+    price = product['price']
+    grades = product['grades']
+
+    print(f"\n{'='*60}")
+    print(f"Uploading: {title[:50]}...")
+    print(f"{'='*60}")
+
+    # Steps 1-3: open a new Digital Download form (skipped if one was pre-loaded)
+    if not form_ready and not await open_product_form(page):
+        return False
 
     # Step 4: Fill in title
     print("Step 4: Setting title...")
@@ -266,28 +442,21 @@ async def upload_product(page, product, pdf_folder):
 
     try:
         file_input = page.locator('input[type="file"]').first
-        await file_input.set_input_files(pdf_path)
         print(f"   Uploading: {filename}")
 
-        # Wait for upload to complete - look for progress indicator to disappear
-        # or file name to appear in the upload area
-        print("   Waiting for upload to complete...")
-        for i in range(30):  # Wait up to 30 seconds
-            await asyncio.sleep(1)
-            # Check if there's a loading/progress indicator
-            try:
-                loading = page.locator('[class*="loading"], [class*="progress"], [class*="uploading"]').first
-                if not await loading.is_visible(timeout=500):
-                    print(f"   Upload appears complete after {i+1} seconds")
-                    break
-            except:
-                pass
-            if i % 5 == 4:
-                print(f"   Still uploading... ({i+1}s)")
-
-        # Extra wait to be safe
-        await asyncio.sleep(3)
-        print("   Upload complete!")
+        # Wait for the server to acknowledge the upload request itself,
+        # rather than guessing from progress bars. Big files get more time.
+        size = os.path.getsize(pdf_path)
+        timeout_ms = 30000 + size / 1000  # 30s + 1s per MB
+        started = time.monotonic()
+        async with page.expect_response(is_upload_response, timeout=timeout_ms) as response_info:
+            await file_input.set_input_files(pdf_path)
+        response = await response_info.value
+
+        if not response.ok:
+            print(f"ERROR: Upload rejected by server (HTTP {response.status})")
+            return False
+        print(f"   Upload complete! ({time.monotonic() - started:.1f}s, {size // 1024} KB)")
     except Exception as e:
         print(f"WARNING: File upload issue: {e}")
 
@@ -410,15 +579,27 @@ async def upload_product(page, product, pdf_folder):
 
     await page.screenshot(path=f"before_submit_{filename.replace('.pdf', '')}.png")
 
+    # Watch the network for the product save request(s) - Submit, and the
+    # tax code dialog's confirm button if it appears, both save the product
+    save_responses = []
+
+    def on_response(response):
+        if is_product_save_response(response):
+            save_responses.append(response)
+
+    page.on("response", on_response)
+
     # Step 10: Click Submit
     print("Step 10: Clicking Submit...")
     try:
         submit_btn = page.get_by_role("button", name="Submit")
+        submitted_products.add(filename)
         await submit_btn.click()
         await asyncio.sleep(3)
         print("   Clicked Submit")
     except Exception as e:
         print(f"ERROR: Could not submit: {e}")
+        page.remove_listener("response", on_response)
         return False
 
     # Step 11: Handle Tax Code dropdown if it appears
@@ -473,17 +654,27 @@ async def upload_product(page, product, pdf_folder):
         print("   No tax code dropdown found (continuing)")
 
     await asyncio.sleep(2)
+    page.remove_listener("response", on_response)
     await page.screenshot(path=f"final_{filename.replace('.pdf', '')}.png")
 
-    # Check for error pages (404, 500, etc.) and recover
-    try:
-        page_content = await page.content()
-        if "404" in page_content or "error" in page_content.lower() or "something went wrong" in page_content.lower():
-            print("   WARNING: Error page detected, refreshing...")
+    # Verify from the save response (the last one wins if the tax code
+    # dialog saved the product a second time)
+    if not save_responses:
+        # Not confirmed - a retry checks My Products before submitting again
+        print("ERROR: No product save response seen - the save is unconfirmed")
+        return False
+    info = await parse_save_response(save_responses[-1])
+    record_result(filename, info)
+    if not info['ok']:
+        print(f"ERROR: TPT rejected the product (HTTP {info['status']}), returning to My Products...")
+        try:
             await page.goto("https://www.teacherspayteachers.com/My-Products")
             await asyncio.sleep(3)
-    except:
-        pass
+        except:
+            pass
+        return False
+    if info['listing_id']:
+        print(f"   Listing {info['listing_id']}: {info['url']}")
 
     print("   Product submission complete!")
 
@@ -491,6 +682,75 @@ async def upload_product(page, product, pdf_folder):
     return True
 
 
+async def launch_browser(playwright, headless=None):
+    """Start Chromium with the persistent profile, which keeps the TPT login."""
+    context = await playwright.chromium.launch_persistent_context(
+        USER_DATA_DIR,
+        headless=HEADLESS if headless is None else headless,
+        args=['--disable-blink-features=AutomationControlled']
+    )
+    page = context.pages[0] if context.pages else await context.new_page()
+    return context, page
+
+
+async def ensure_logged_in(playwright, context, page):
+    """
+    Make sure the browser is logged in, opening a window only if needed.
+
+    A headless browser that is not logged in is closed, and the login
+    (including any 2FA or "verify it's you" page) is finished by hand in a
+    visible window. Both use the same profile, so once that window closes
+    the headless browser is reopened with the fresh session.
+
+    Returns (context, page), or None if the login did not complete.
+    """
+    if not HEADLESS:
+        return (context, page) if await login_to_tpt(page) else None
+    if await check_if_logged_in(page):
+        print("Already logged in from previous session!")
+        return context, page
+
+    print("Login needed - opening a browser window for it...")
+    await context.close()
+    context, page = await launch_browser(playwright, headless=False)
+    logged_in = await login_to_tpt(page)
+    await context.close()
+    if not logged_in:
+        return None
+
+    print("Continuing in the background...")
+    context, page = await launch_browser(playwright)
+    if not await check_if_logged_in(page):
+        print("ERROR: The new login was not picked up by the background browser")
+        await context.close()
+        return None
+    return context, page
+
+
+async def page_is_alive(page):
+    """True if the page (and the browser behind it) still responds."""
+    if page.is_closed():
+        return False
+    try:
+        await asyncio.wait_for(page.evaluate("1"), timeout=5)
+        return True
+    except Exception:
+        return False
+
+
+async def restart_browser(playwright, context):
+    """Replace a crashed browser; the saved profile restores the login."""
+    try:
+        await context.close()
+    except Exception:
+        pass
+    context, page = await launch_browser(playwright)
+    logged_in = await ensure_logged_in(playwright, context, page)
+    if not logged_in:
+        raise RuntimeError("Login failed after browser restart")
+    return logged_in
+
+
 async def main():
     """Main function."""
     import argparse
@@ -561,18 +821,14 @@ async def main():
     print(f"Profile location: {USER_DATA_DIR}")
     async with async_playwright() as p:
         # Use persistent context - this saves cookies/login between runs
-        context = await p.chromium.launch_persistent_context(
-            USER_DATA_DIR,
-            headless=HEADLESS,
-            args=['--disable-blink-features=AutomationControlled']
-        )
-        page = context.pages[0] if context.pages else await context.new_page()
+        context, page = await launch_browser(p)
 
-        # Login
-        if not await login_to_tpt(page):
+        # Login (in a visible window only if it needs you)
+        logged_in = await ensure_logged_in(p, context, page)
+        if not logged_in:
             print("Login failed. Exiting.")
-            await context.close()
             return
+        context, page = logged_in
 
         print("\n*** LOGIN SUCCESSFUL - Starting upload process ***\n")
 
@@ -581,36 +837,91 @@ async def main():
         failed = 0
         failed_products = []
 
+        next_form = None  # Task loading the next product's form in another tab
+        form_ready = False
+        restarts = 0
+
         for i, product in enumerate(products, 1):
             print(f"\n[{i}/{len(products)}] Processing {product['filename']}...")
 
+            # While this product is filled in, load the next one's form
+            if PRELOAD_NEXT_FORM and i < len(products):
+                next_form = asyncio.create_task(preload_product_form(context))
+
             # Try upload with retry
             upload_success = False
-            for attempt in range(MAX_RETRIES + 1):
+            attempt = 0
+            while attempt <= MAX_RETRIES:
+                # An earlier attempt got as far as Submit: make sure it didn't
+                # create the listing before creating it again
+                if product['filename'] in submitted_products:
+                    print("   Checking My Products for a listing from the earlier submit...")
+                    listing = await find_listing_by_title(page, product['title'])
+                    if listing is None:
+                        print("ERROR: Could not check My Products - not retrying (could create a duplicate)")
+                        break
+                    if listing:
+                        print(f"   Listing {listing['listing_id']} was created by the earlier submit - keeping it")
+                        record_result(product['filename'], {**listing, 'status': 'adopted'})
+                        upload_success = True
+                        break
+
                 try:
-                    result = await upload_product(page, product, PDF_FOLDER)
+                    result = await upload_product(page, product, PDF_FOLDER, form_ready=form_ready)
                     if result:
                         upload_success = True
                         break
-                    else:
-                        if attempt < MAX_RETRIES:
-                            print(f"   Retrying... (attempt {attempt + 2})")
-                            # Refresh page before retry
-                            await page.goto("https://www.teacherspayteachers.com/My-Products")
-                            await asyncio.sleep(3)
                 except Exception as e:
                     print(f"ERROR uploading {product['filename']}: {e}")
-                    if attempt < MAX_RETRIES:
-                        print(f"   Retrying... (attempt {attempt + 2})")
-                        # Refresh page before retry
-                        await page.goto("https://www.teacherspayteachers.com/My-Products")
-                        await asyncio.sleep(3)
+                form_ready = False
+
+                # A crashed browser is relaunched and the product retried
+                # without using up one of its normal retries
+                if not await page_is_alive(page):
+                    if restarts >= MAX_BROWSER_RESTARTS:
+                        print(f"ERROR: Browser crashed again - giving up after {restarts} restarts")
+                        break
+                    restarts += 1
+                    print("   Browser crashed - restarting with saved session...")
+                    if next_form:
+                        next_form.cancel()
+                        next_form = None
+                    try:
+                        context, page = await restart_browser(p, context)
+                    except Exception as e:
+                        print(f"ERROR: Could not restart browser: {e}")
+                        break
+                    print(f"   Browser restarted - retrying {product['filename']}")
+                    continue
+
+                attempt += 1
+                if attempt <= MAX_RETRIES:
+                    print(f"   Retrying... (attempt {attempt + 1})")
+                    # Refresh page before retry
+                    await page.goto("https://www.teacherspayteachers.com/My-Products")
+                    await asyncio.sleep(3)
 
             if upload_success:
                 successful += 1
             else:
                 failed += 1
                 failed_products.append(product['filename'])
+                if not await page_is_alive(page):
+                    print("ERROR: Browser could not be recovered - stopping batch")
+                    break
+
+            # Switch to the pre-loaded tab for the next product
+            form_ready = False
+            if next_form:
+                try:
+                    next_page = await next_form
+                except Exception:
+                    next_page = None
+                next_form = None
+                if next_page:
+                    await page.close()
+                    page = next_page
+                    form_ready = True
 
             # Delay between uploads
             if i < len(products):
@@ -0,0 +1,147 @@
+"""
+Circuit breaker for batch uploads.
+
+When TPT is having a bad day every upload fails, slowly. Without a breaker
+a batch either stops at the first failure or, with stop_on_error off,
+pushes every remaining product through a full, doomed upload. The breaker
+watches the most recent results. It opens when too many of them failed,
+or when several in a row hit TPT error pages (5xx responses). While open,
+the batch pauses and probes a cheap health check at growing intervals
+(30 s, 60 s, 120 s, ... up to `max_probe_interval`). The batch resumes on
+its own once the site answers again.
+
+Only uploads that reached TPT count: a product that failed its local
+validation or preparation (bad CSV row, corrupt PDF) says nothing about
+the site and is left out of the window.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW = 10
+DEFAULT_FAILURE_RATE = 0.5
+DEFAULT_MIN_RESULTS = 4
+DEFAULT_ERROR_PAGES = 2
+DEFAULT_PROBE_INTERVAL = 30
+DEFAULT_MAX_PROBE_INTERVAL = 600
+DEFAULT_MAX_PAUSE = 3600
+
+
+def is_site_error(result: dict) -> bool:
+    """Return True if a failed upload looks like TPT's fault rather than the product's."""
+    if result.get('success'):
+        return False
+    if result.get('error_page') or result.get('timeout'):
+        return True
+    return (result.get('save_status') or 0) >= 500
+
+
+def reached_site(result: dict) -> bool:
+    """Return True if an upload got past its local checks (validation, preparation) to TPT."""
+    return 'validation' in (result.get('steps_completed') or [])
+
+
+class CircuitBreaker:
+    """
+    Tracks recent upload outcomes and pauses the batch when the site is failing.
+    """
+
+    def __init__(self, settings: dict):
+        """
+        Initialize the breaker.
+
+        Args:
+            settings: Configuration dictionary (the 'circuit_breaker' section)
+        """
+        breaker_settings = settings.get('circuit_breaker', {}) or {}
+        self.enabled = breaker_settings.get('enabled', True)
+        self.failure_rate = breaker_settings.get('failure_rate', DEFAULT_FAILURE_RATE)
+        self.min_results = breaker_settings.get('min_results', DEFAULT_MIN_RESULTS)
+        self.error_pages = breaker_settings.get('error_pages', DEFAULT_ERROR_PAGES)
+        self.probe_interval = breaker_settings.get('probe_interval', DEFAULT_PROBE_INTERVAL)
+        self.max_probe_interval = breaker_settings.get('max_probe_interval', DEFAULT_MAX_PROBE_INTERVAL)
+        self.max_pause = breaker_settings.get('max_pause', DEFAULT_MAX_PAUSE)
+
+        self.recent = deque(maxlen=breaker_settings.get('window', DEFAULT_WINDOW))
+        self.consecutive_site_errors = 0
+        self.events = []
+        self._reason = None
+
+    def record(self, result: dict) -> bool:
+        """
+        Record an upload result.
+
+        Returns:
+            True if the breaker should now open (the caller then waits in
+            wait_until_healthy)
+        """
+        if not self.enabled or not reached_site(result):
+            return False
+
+        self.recent.append(bool(result.get('success')))
+        self.consecutive_site_errors = self.consecutive_site_errors + 1 if is_site_error(result) else 0
+
+        if self.error_pages and self.consecutive_site_errors >= self.error_pages:
+            self._reason = f"{self.consecutive_site_errors} site errors in a row"
+            return True
+
+        if len(self.recent) >= self.min_results:
+            failures = self.recent.count(False)
+            if failures / len(self.recent) >= self.failure_rate:
+                self._reason = f"{failures} of the last {len(self.recent)} uploads failed"
+                return True
+
+        return False
+
+    async def wait_until_healthy(self, probe: Callable[[], Awaitable[bool]]) -> bool:
+        """
+        Keep the breaker open, probing the site until it recovers.
+
+        Args:
+            probe: Cheap health check returning True when the site is usable
+
+        Returns:
+            True once a probe succeeds (the breaker closes and the recent
+            history is cleared); False if the site stayed down for longer
+            than max_pause seconds
+        """
+        event = {'opened_at': time.time(), 'reason': self._reason, 'probes': 0, 'recovered': False}
+        self.events.append(event)
+        logger.warning(f"Circuit breaker open ({self._reason}) - pausing uploads")
+
+        interval = self.probe_interval
+        start = time.monotonic()
+
+        while time.monotonic() - start < self.max_pause:
+            logger.info(f"Next health check in {interval}s...")
+            await asyncio.sleep(interval)
+
+            event['probes'] += 1
+            try:
+                healthy = await probe()
+            except Exception as e:
+                logger.debug(f"Health check failed: {e}")
+                healthy = False
+
+            if healthy:
+                event['recovered'] = True
+                event['paused_seconds'] = round(time.monotonic() - start)
+                self.recent.clear()
+                self.consecutive_site_errors = 0
+                logger.info(f"Site is healthy again after {event['paused_seconds']}s - resuming uploads")
+                return True
+
+            interval = min(interval * 2, self.max_probe_interval)
+
+        event['paused_seconds'] = round(time.monotonic() - start)
+        logger.error(f"Site still failing after {event['paused_seconds']}s - giving up")
+        return False
+
+    def summary(self) -> list[dict]:
+        """Return the breaker's open events, for the batch summary."""
+        return self.events
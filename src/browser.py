@@ -23,10 +23,19 @@ Form Fields:
 - Copyright attestation checkbox
 """
 
+import json
 import logging
+import os
+import re
+import time
+import weakref
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
+from urllib.parse import urlparse
+
+from src.deadline import budget_ms
+from src.latency import open_adaptive_timeouts
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +44,242 @@ TPT_BASE_URL = "https://www.teacherspayteachers.com"
 TPT_LOGIN_URL = f"{TPT_BASE_URL}/Login"
 TPT_DASHBOARD_URL = f"{TPT_BASE_URL}/My-Products"
 TPT_NEW_PRODUCT_URL = f"{TPT_BASE_URL}/Product/Create"
+TPT_EDIT_PRODUCT_URL = f"{TPT_BASE_URL}/Product/Edit/{{listing_id}}"
+
+# File uploads are recognised by their network request: a multipart POST,
+# or a PUT of the raw file (pre-signed storage URL), to a path whose last
+# segments name an upload endpoint. Only the path is matched, so tracking
+# calls such as /track?event=upload_click never count as an upload.
+UPLOAD_PATH_PATTERN = re.compile(
+    r'/(?:uploads?|files?|assets?|attachments?)(?:/[\w.-]*)?/?$', re.IGNORECASE
+)
+
+# Objects in the upload response that describe the stored file, and the
+# keys read from them for its ID and size
+UPLOAD_CONTAINER_KEYS = ('file', 'upload', 'asset', 'attachment', 'data')
+UPLOAD_ID_KEYS = ('fileId', 'file_id', 'id', 'uuid', 'key')
+UPLOAD_SIZE_KEYS = ('size', 'fileSize', 'file_size', 'bytes', 'byteSize')
+
+# Time allowed per megabyte on top of the base timeout when uploading
+UPLOAD_MS_PER_MB = 1000
+
+# Starting timeouts for waits that used to be fixed sleeps; once there is
+# enough history they are learned from observed latency (src/latency.py)
+LOGIN_REDIRECT_TIMEOUT_MS = 2000
+FORM_READY_TIMEOUT_MS = 5000
+
+# The session probe is one small request; if TPT takes longer than this the
+# page-based login check is no slower
+SESSION_PROBE_TIMEOUT_MS = 5000
+DEFAULT_SESSION_FILE = "./logs/session.json"
+
+# Pages TPT shows instead of logging straight in: two-factor codes, "verify
+# it's you" emails, CAPTCHAs. These need a person, so a headless browser
+# hands them to a visible window (see TPTBrowser._login_via_challenge).
+LOGIN_CHALLENGE_URL_PATTERN = re.compile(r'verify|challenge|two-factor|2fa|mfa|captcha|otp', re.IGNORECASE)
+LOGIN_CHALLENGE_SELECTORS = [
+    'input[autocomplete="one-time-code"]',
+    'iframe[src*="captcha"]',
+    'iframe[title*="challenge" i]',
+    'text=/verification code/i',
+    'text=/verify (it\'s|its) you/i',
+]
+DEFAULT_CHALLENGE_TIMEOUT = 600  # Seconds a person has to finish a challenge
+CHALLENGE_POLL_SECONDS = 3
+
+# Saving the product form is a POST/PUT/PATCH on TPT's own host, either to
+# the form's product endpoint (/Product/Create, /Product/Edit/123,
+# /api/products/123, ...) or a GraphQL request whose operation creates or
+# updates a product. Analytics, autosave and search calls that merely
+# mention "product" are not saves.
+# NOTE: Based on research of TPT's product form; adjust if TPT changes it.
+TPT_HOST_SUFFIX = 'teacherspayteachers.com'
+PRODUCT_SAVE_PATH_PATTERN = re.compile(
+    r'^(?:/api(?:/v\d+)?)?/products?(?:/create|/edit/\d+|/\d+|/save)?/?$', re.IGNORECASE
+)
+GRAPHQL_PATH_PATTERN = re.compile(r'/graphql/?$', re.IGNORECASE)
+PRODUCT_SAVE_OPERATION_PATTERN = re.compile(
+    r'^(?:create|update|save|publish|edit)(?:product|listing|resource)(?:draft)?$', re.IGNORECASE
+)
+GRAPHQL_OPERATION_NAME_PATTERN = re.compile(r'\bmutation\s+(\w+)')
+
+# Where the listing's ID and URL are read from in a save response: the
+# body itself, its 'product'/'listing' object, and for GraphQL the
+# mutation's result under 'data'. Nothing deeper is searched, so IDs of
+# unrelated nested objects (tags, files, the seller) are never picked up.
+LISTING_CONTAINER_KEYS = ('product', 'listing', 'resource')
+LISTING_ID_KEYS = ('productId', 'product_id', 'listingId', 'listing_id', 'id')
+LISTING_URL_KEYS = ('url', 'productUrl', 'product_url', 'redirectUrl', 'redirect_url', 'location')
+LISTING_ID_PATTERN = re.compile(r'\d+')
+
+# Pages whose renderer crashed (a crashed page is not closed, just dead)
+_crashed_pages = weakref.WeakSet()
+
+# Listing URLs end in the numeric ID, e.g. /Product/The-Octopus-That-Escaped-12345678
+LISTING_URL_ID_PATTERN = re.compile(r'/Product/(?:[^/?#"]+-)?(\d+)(?:[/?#]|$)')
+
+
+def _request_path(request) -> str:
+    """Path of a Playwright request's URL."""
+    return urlparse(request.url).path
+
+
+def is_upload_response(response) -> bool:
+    """Return True if a Playwright response answers a file upload request."""
+    request = response.request
+    if request.method not in ('POST', 'PUT'):
+        return False
+
+    content_type = (request.headers or {}).get('content-type', '')
+    if request.method == 'POST' and 'multipart/form-data' not in content_type:
+        return False
+    return bool(UPLOAD_PATH_PATTERN.search(_request_path(request)))
+
+
+def _candidates(body, container_keys: tuple) -> list[dict]:
+    """The response body and the known objects in it that describe the result."""
+    if isinstance(body, list):
+        body = body[0] if len(body) == 1 else None
+    if not isinstance(body, dict):
+        return []
+
+    found = [body]
+    # GraphQL: {"data": {"<mutation>": {...}}}; REST: {"data": {...}}
+    data = body.get('data')
+    if isinstance(data, dict):
+        found.append(data)
+        found.extend(value for value in data.values() if isinstance(value, dict))
+    for candidate in list(found):
+        found.extend(candidate[key] for key in container_keys if isinstance(candidate.get(key), dict))
+
+    # Most specific first: a container's own ID wins over the envelope's
+    return found[::-1]
+
+
+def _field(candidates: list[dict], keys: tuple):
+    """The first of keys present in any of the candidate objects."""
+    for candidate in candidates:
+        for key in keys:
+            if candidate.get(key) not in (None, ''):
+                return candidate[key]
+    return None
+
+
+async def parse_upload_response(response) -> dict:
+    """
+    Summarise the server's answer to a file upload.
+
+    Returns:
+        Dictionary with 'ok', 'status', 'url', 'file_id' and 'size'
+        (the last two are None if the response body does not include them)
+    """
+    info = {
+        'ok': response.ok,
+        'status': response.status,
+        'url': response.url,
+        'file_id': None,
+        'size': None,
+    }
+
+    try:
+        body = await response.json()
+    except Exception:
+        return info  # Not JSON - the status code is all we have
+
+    candidates = _candidates(body, UPLOAD_CONTAINER_KEYS)
+    info['file_id'] = _field(candidates, UPLOAD_ID_KEYS)
+    size = _field(candidates, UPLOAD_SIZE_KEYS)
+    try:
+        info['size'] = int(size) if size is not None else None
+    except (TypeError, ValueError):
+        pass
+    return info
+
+
+def graphql_operation(request) -> Optional[str]:
+    """Operation name of a GraphQL request (from operationName or the mutation text)."""
+    try:
+        payload = request.post_data_json
+    except Exception:
+        return None
+    if isinstance(payload, list):
+        payload = payload[0] if len(payload) == 1 else None
+    if not isinstance(payload, dict):
+        return None
+    if payload.get('operationName'):
+        return payload['operationName']
+    match = GRAPHQL_OPERATION_NAME_PATTERN.search(payload.get('query') or '')
+    return match.group(1) if match else None
+
+
+def is_product_save_response(response) -> bool:
+    """Return True if a Playwright response answers the product form's save request."""
+    request = response.request
+    if request.method not in ('POST', 'PUT', 'PATCH'):
+        return False
+    if not (urlparse(request.url).hostname or '').endswith(TPT_HOST_SUFFIX) or is_upload_response(response):
+        return False
+
+    path = _request_path(request)
+    if GRAPHQL_PATH_PATTERN.search(path):
+        return bool(PRODUCT_SAVE_OPERATION_PATTERN.match(graphql_operation(request) or ''))
+    return bool(PRODUCT_SAVE_PATH_PATTERN.match(path))
+
+
+async def parse_product_save_response(response) -> dict:
+    """
+    Summarise the server's answer to saving the product form.
+
+    The listing ID and URL are read from known places in the JSON body
+    (see LISTING_CONTAINER_KEYS), otherwise from the Location header or the
+    response URL (the save may redirect straight to the new listing). An
+    ID that is not numeric, or that disagrees with the listing URL, is
+    not trusted.
+
+    Returns:
+        Dictionary with 'ok', 'status', 'listing_id' and 'url'
+        (the last two are None if the response does not include them)
+    """
+    info = {'ok': response.ok, 'status': response.status, 'listing_id': None, 'url': None}
+
+    try:
+        body = await response.json()
+    except Exception:
+        body = None  # Not JSON - fall back to headers and URL
+
+    if body is not None:
+        # Error payloads (e.g. GraphQL 'errors') come back with HTTP 200
+        if isinstance(body, dict) and body.get('errors'):
+            info['ok'] = False
+        candidates = _candidates(body, LISTING_CONTAINER_KEYS)
+        url = _field(candidates, LISTING_URL_KEYS)
+        info['url'] = url if isinstance(url, str) else None
+        listing_id = _field(candidates, LISTING_ID_KEYS)
+        if listing_id is not None and LISTING_ID_PATTERN.fullmatch(str(listing_id)):
+            info['listing_id'] = str(listing_id)
+
+    if not info['url']:
+        location = (response.headers or {}).get('location')
+        if location or LISTING_URL_ID_PATTERN.search(response.url):
+            info['url'] = location or response.url
+
+    if info['url']:
+        if info['url'].startswith('/'):
+            info['url'] = f"{TPT_BASE_URL}{info['url']}"
+        match = LISTING_URL_ID_PATTERN.search(info['url'])
+        url_id = match.group(1) if match else None
+        if info['listing_id'] and url_id and url_id != info['listing_id']:
+            logger.warning(f"Save response names listing {info['listing_id']} but links {info['url']}; "
+                           f"using neither")
+            info['listing_id'] = None
+            info['url'] = None
+        elif not info['listing_id']:
+            info['listing_id'] = url_id
+
+    if info['listing_id'] and not info['url']:
+        info['url'] = f"{TPT_BASE_URL}/Product/{info['listing_id']}"
+
+    return info
 
 
 class TPTBrowser:
@@ -61,11 +306,25 @@ class TPTBrowser:
         self.page = None
         self.playwright = None
         self.is_logged_in = False
+        self.parent = None  # Set on pages opened with fork() or open_session()
+        self.owns_context = False  # True for open_session(): own cookies, shared Chromium
+        self._warm_form = None  # Task loading the next product form (prewarm_new_product)
+        self.session_state = None  # Cookies/storage saved after login, used by relaunch()
+        self.timeouts = None  # AdaptiveTimeouts (src/latency.py), opened by start()
+        self.error_page = None  # HTTP status of the last navigation, if TPT served an error page
+        self._pid = None  # Chromium browser process, found by _browser_pid()
+        self._pid_browser = None  # The Browser self._pid belongs to (changes on relaunch)
+        self._relaunch_lock = None  # Serialises relaunch() between this browser's pages
 
         # Browser settings with defaults
-        self.headless = settings.get('browser', {}).get('headless', False)
+        self.headless = settings.get('browser', {}).get('headless', True)
+        # Open a visible window when login hits 2FA/CAPTCHA instead of failing
+        self.interactive_login = settings.get('browser', {}).get('interactive_login', True)
+        self.challenge_timeout = settings.get('browser', {}).get('challenge_timeout', DEFAULT_CHALLENGE_TIMEOUT)
         self.slow_motion = settings.get('browser', {}).get('slow_motion', 100)
         self.timeout = settings.get('browser', {}).get('timeout', 30000)
+        # Login cookies kept between runs so start-up can skip the login form
+        self.session_file = settings.get('browser', {}).get('session_file', DEFAULT_SESSION_FILE)
 
     async def start(self):
         """
@@ -85,13 +344,11 @@ class TPTBrowser:
                 slow_mo=self.slow_motion
             )
 
-            # Create context with reasonable viewport
-            self.context = await self.browser.new_context(
-                viewport={'width': 1280, 'height': 800},
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            )
-            self.page = await self.context.new_page()
-            self.page.set_default_timeout(self.timeout)
+            self.session_state = self._load_session_file()
+            self.context = await self._new_context(storage_state=self.session_state)
+            self.page = await self._open_page()
+            if self.timeouts is None:
+                self.timeouts = open_adaptive_timeouts(self.settings)
 
             logger.info("Browser started successfully")
             return True
@@ -100,9 +357,247 @@ class TPTBrowser:
             logger.error(f"Failed to start browser: {e}")
             return False
 
+    async def _new_context(self, storage_state: Optional[dict] = None, browser=None):
+        """Create a browser context with a reasonable viewport (and optional saved session)."""
+        return await (browser or self.browser).new_context(
+            viewport={'width': 1280, 'height': 800},
+            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+            storage_state=storage_state
+        )
+
+    async def _open_page(self):
+        """Open a page in this context with the default timeout and crash tracking."""
+        page = await self.context.new_page()
+        page.set_default_timeout(self.timeout)
+        page.on('crash', _crashed_pages.add)
+        return page
+
+    async def fork(self) -> 'TPTBrowser':
+        """
+        Open another page in this browser's logged-in context.
+
+        The returned TPTBrowser shares the Chromium instance and session
+        cookies, so it needs no start-up or login of its own. Closing it
+        closes only its page.
+
+        Returns:
+            A TPTBrowser driving the new page
+        """
+        clone = TPTBrowser(self.settings)
+        clone.parent = self
+        clone.playwright = self.playwright
+        clone.browser = self.browser
+        clone.context = self.context
+        clone.is_logged_in = self.is_logged_in
+        clone.session_state = self.session_state
+        clone.timeouts = self.timeouts
+
+        clone.page = await self._open_page()
+
+        logger.info("Opened additional browser page")
+        return clone
+
+    async def open_session(self, settings: dict) -> 'TPTBrowser':
+        """
+        Open an isolated browser context in this browser's Chromium.
+
+        Unlike fork(), the new TPTBrowser has its own cookies and storage
+        (restored from its settings' browser.session_file, if any), so it can
+        log in to a different TPT account while sharing the one Chromium
+        process. Closing it closes only its context.
+
+        Args:
+            settings: Settings for the new session (its own tpt account,
+                session file, etc.)
+
+        Returns:
+            A TPTBrowser driving a page in the new context (not logged in yet)
+        """
+        session = TPTBrowser(settings)
+        session.parent = self
+        session.owns_context = True
+        session.playwright = self.playwright
+        session.browser = self.browser
+        session.timeouts = self.timeouts
+
+        session.session_state = session._load_session_file()
+        session.context = await session._new_context(storage_state=session.session_state)
+        session.page = await session._open_page()
+
+        logger.info("Opened isolated browser session")
+        return session
+
+    def prewarm_new_product(self):
+        """
+        Start loading a fresh product-create form in a background page.
+
+        The next navigate_to_new_product() switches to that page instead of
+        navigating, so the next product starts on an already-loaded form.
+        Does nothing if a form is already being prepared.
+        """
+        import asyncio
+        import contextvars
+
+        if self._warm_form is None:
+            # A fresh context: the form loads on its own time, not the
+            # current product's budget (src/deadline.py)
+            self._warm_form = asyncio.create_task(self._load_warm_form(), context=contextvars.Context())
+
+    async def _load_warm_form(self) -> Optional['TPTBrowser']:
+        """Open a page in this context and navigate it to the product form."""
+        warm = None
+        try:
+            warm = await self.fork()
+            if await warm.navigate_to_new_product():
+                logger.info("Next product form is ready")
+                return warm
+        except Exception as e:
+            logger.warning(f"Could not pre-load next product form: {e}")
+        if warm:
+            await warm.close()
+        return None
+
+    async def _discard_warm_form(self):
+        """Cancel or close a pre-loaded product form that will not be used."""
+        task, self._warm_form = self._warm_form, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            warm = await task
+        except BaseException:
+            return
+        if warm:
+            await warm.close()
+
+    async def memory_usage(self) -> dict:
+        """
+        Sample the browser's memory use.
+
+        The page's JavaScript heap comes from the Chrome DevTools Protocol.
+        Resident memory of the Chromium this page runs in (the browser process and
+        its renderer, GPU and utility children) needs psutil and is None
+        without it. Other processes of this program - prepare workers,
+        other sessions' browsers - are not counted.
+
+        Returns:
+            Dictionary with 'js_heap_mb' and 'rss_mb' (None if unavailable)
+        """
+        usage = {'js_heap_mb': None, 'rss_mb': None}
+
+        try:
+            session = await self.context.new_cdp_session(self.page)
+            try:
+                await session.send('Performance.enable')
+                metrics = (await session.send('Performance.getMetrics'))['metrics']
+            finally:
+                await session.detach()
+            heap = next((m['value'] for m in metrics if m['name'] == 'JSHeapUsedSize'), None)
+            if heap is not None:
+                usage['js_heap_mb'] = round(heap / 1_000_000, 1)
+        except Exception as e:
+            logger.debug(f"Could not read JS heap size: {e}")
+
+        try:
+            import psutil
+        except ImportError:
+            return usage
+
+        pid = await self._browser_pid()
+        if pid is None:
+            return usage
+
+        try:
+            root = psutil.Process(pid)
+            total = 0
+            for process in [root, *root.children(recursive=True)]:
+                try:
+                    total += process.memory_info().rss
+                except psutil.Error:
+                    continue
+            usage['rss_mb'] = round(total / 1_000_000, 1)
+        except psutil.Error as e:
+            logger.debug(f"Could not read browser RSS: {e}")
+
+        return usage
+
+    async def _browser_pid(self) -> Optional[int]:
+        """
+        PID of this session's Chromium browser process, from the DevTools
+        Protocol (cached until the browser is relaunched).
+
+        Returns:
+            The PID, or None if the browser does not report it
+        """
+        if self._pid_browser is self.browser and self._pid is not None:
+            return self._pid
+
+        try:
+            session = await self.browser.new_browser_cdp_session()
+            try:
+                info = await session.send('SystemInfo.getProcessInfo')
+            finally:
+                await session.detach()
+            self._pid = next((p['id'] for p in info['processInfo'] if p['type'] == 'browser'), None)
+            self._pid_browser = self.browser
+        except Exception as e:
+            logger.debug(f"Could not find the browser process: {e}")
+            return None
+
+        return self._pid
+
+    async def recycle(self, full: bool = False) -> str:
+        """
+        Replace the page (or the whole context) to release renderer memory.
+
+        Either way the session survives: a new page shares the context's
+        cookies, and a new context is created from the old one's storage
+        state, so no login is needed.
+
+        Args:
+            full: Recreate the context too. Only done when this page is
+                alone in its context (no fork()ed pages share it) - otherwise
+                just the page is replaced.
+
+        Returns:
+            'context' or 'page', whichever was recycled
+        """
+        await self._discard_warm_form()
+        old_page = self.page
+
+        if full and (not self.parent or self.owns_context) and len(self.context.pages) == 1:
+            old_context = self.context
+            self.session_state = await old_context.storage_state()
+            self.context = await self._new_context(storage_state=self.session_state)
+            self.page = await self._open_page()
+            await old_context.close()
+            logger.info("Recycled browser context (session kept)")
+            return 'context'
+
+        self.page = await self._open_page()
+        await old_page.close()
+        logger.info("Recycled browser page")
+        return 'page'
+
     async def close(self):
         """Close the browser and cleanup."""
+        await self._discard_warm_form()
+
+        if self.parent:
+            # Forked page or isolated session: leave the shared browser running
+            try:
+                if self.owns_context:
+                    await self.context.close()
+                elif self.page and not self.page.is_closed():
+                    await self.page.close()
+            except Exception as e:
+                logger.error(f"Error closing page: {e}")
+            return
+
         try:
+            if self.timeouts:
+                self.timeouts.close()
+                self.timeouts = None
             if self.browser:
                 await self.browser.close()
             if self.playwright:
@@ -126,10 +621,15 @@ class TPTBrowser:
             logger.error("Email and password are required for login")
             return False
 
+        if await self.check_session():
+            self.is_logged_in = True
+            logger.info("Already logged in (saved session)")
+            return True
+
         try:
             logger.info("Navigating to TPT login page...")
             await self.page.goto(TPT_LOGIN_URL)
-            await self.page.wait_for_load_state('networkidle')
+            await self.timed_wait('networkidle', lambda t: self.page.wait_for_load_state('networkidle', timeout=t))
 
             # Take screenshot of login page for debugging
             await self.take_screenshot("login_page")
@@ -154,6 +654,8 @@ class TPTBrowser:
                     continue
 
             if not email_input or await email_input.count() == 0:
+                if await self._detect_login_challenge():
+                    return await self._login_via_challenge()
                 logger.error("Could not find email input field")
                 await self.take_screenshot("login_error_no_email_field")
                 return False
@@ -213,17 +715,29 @@ class TPTBrowser:
                 logger.info("No submit button found, pressing Enter...")
                 await password_input.press('Enter')
 
-            # Wait for navigation
-            await self.page.wait_for_load_state('networkidle')
-            await self.page.wait_for_timeout(2000)  # Extra wait for any redirects
-
-            # Verify login success
-            logged_in = await self._verify_logged_in()
+            # Wait for navigation and any redirect away from the login page
+            await self.timed_wait('networkidle', lambda t: self.page.wait_for_load_state('networkidle', timeout=t))
+            try:
+                await self.timed_wait(
+                    'login_redirect',
+                    lambda t: self.page.wait_for_url(lambda url: '/Login' not in url, timeout=t),
+                    LOGIN_REDIRECT_TIMEOUT_MS
+                )
+            except Exception:
+                pass  # Still on the login page - verification below decides
+
+            # Verify login success (the page check only if the probe says no)
+            logged_in = await self.check_session()
+            if not logged_in and await self._detect_login_challenge():
+                return await self._login_via_challenge()
+            if not logged_in:
+                logged_in = await self._verify_logged_in()
 
             if logged_in:
                 self.is_logged_in = True
                 logger.info("Login successful!")
                 await self.take_screenshot("login_success")
+                await self.save_session()
                 return True
             else:
                 logger.error("Login verification failed")
@@ -235,6 +749,344 @@ class TPTBrowser:
             await self.take_screenshot("login_exception")
             return False
 
+    async def save_session(self):
+        """
+        Remember the context's cookies and storage so relaunch() can restore
+        the login, and write them to browser.session_file for the next run.
+        """
+        try:
+            self.session_state = await self.context.storage_state()
+        except Exception as e:
+            logger.warning(f"Could not save browser session: {e}")
+            return
+
+        if not self.session_file:
+            return
+        try:
+            path = Path(self.session_file)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Login cookies: readable by this user only
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.session_state, f)
+        except Exception as e:
+            logger.warning(f"Could not write session file {self.session_file}: {e}")
+
+    def _load_session_file(self) -> Optional[dict]:
+        """Return the session saved by an earlier run, if there is one."""
+        if not self.session_file or not Path(self.session_file).exists():
+            return None
+        try:
+            with open(self.session_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable session file {self.session_file}: {e}")
+            return None
+
+    async def check_session(self) -> bool:
+        """
+        Check the login without rendering a page.
+
+        The context's cookies are looked at first: with no unexpired TPT
+        cookies there is nothing to check. Otherwise one request for the
+        dashboard is sent with redirects turned off. A logged-in session
+        gets the page (2xx); a logged-out one is redirected to /Login.
+
+        Returns:
+            True if the session is logged in
+        """
+        start = time.perf_counter()
+        logged_in = await self._probe_session(self.context)
+        logger.info(f"Session probe: {'logged in' if logged_in else 'not logged in'} "
+                    f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+        return logged_in
+
+    async def _probe_session(self, context) -> bool:
+        """Run check_session's cookie and request probe against any context."""
+        try:
+            now = time.time()
+            cookies = await context.cookies(TPT_BASE_URL)
+            if not any(cookie.get('expires', -1) == -1 or cookie['expires'] > now for cookie in cookies):
+                logger.debug("No TPT session cookies")
+                return False
+
+            response = await context.request.get(
+                TPT_DASHBOARD_URL, max_redirects=0, timeout=budget_ms(SESSION_PROBE_TIMEOUT_MS)
+            )
+            logger.debug(f"Session probe: HTTP {response.status}")
+            await response.dispose()
+            return 200 <= response.status < 300
+        except Exception as e:
+            logger.warning(f"Session probe failed: {e}")
+            return False
+
+    async def _detect_login_challenge(self) -> bool:
+        """Return True if the page is a 2FA, verification or CAPTCHA step of the login."""
+        try:
+            if LOGIN_CHALLENGE_URL_PATTERN.search(urlparse(self.page.url).path):
+                return True
+            challenge = self.page.locator(LOGIN_CHALLENGE_SELECTORS[0])
+            for selector in LOGIN_CHALLENGE_SELECTORS[1:]:
+                challenge = challenge.or_(self.page.locator(selector))
+            return await challenge.count() > 0
+        except Exception:
+            return False
+
+    async def _login_via_challenge(self) -> bool:
+        """
+        Let a person finish a login challenge, then carry on with the session.
+
+        A headed browser waits on its own page. A headless one opens a
+        separate visible window with the same cookies on the challenge page.
+        Once TPT accepts the session there, the window closes and its
+        cookies are copied into this context, so this page and every page
+        forked from it continue headless and logged in.
+
+        Returns:
+            True if logged in
+        """
+        import asyncio
+
+        await self.take_screenshot("login_challenge")
+        if not self.interactive_login:
+            logger.error("Login needs a 2FA/verification step (browser.interactive_login is off)")
+            return False
+
+        async def wait_for_session(context) -> bool:
+            deadline_at = time.monotonic() + self.challenge_timeout
+            while time.monotonic() < deadline_at:
+                if await self._probe_session(context):
+                    return True
+                await asyncio.sleep(CHALLENGE_POLL_SECONDS)
+            logger.error(f"Login challenge not finished within {self.challenge_timeout}s")
+            return False
+
+        if not self.headless:
+            logger.warning("TPT needs a verification step - finish the login in the browser window")
+            logged_in = await wait_for_session(self.context)
+        else:
+            logger.warning("TPT needs a verification step - opening a browser window to finish the login")
+            headed = await self.playwright.chromium.launch(headless=False)
+            try:
+                context = await self._new_context(await self.context.storage_state(), browser=headed)
+                page = await context.new_page()
+                await page.goto(self.page.url)
+                logged_in = await wait_for_session(context)
+                if logged_in:
+                    await self.context.add_cookies((await context.storage_state())['cookies'])
+            finally:
+                await headed.close()
+            logged_in = logged_in and await self.check_session()
+
+        if not logged_in:
+            return False
+
+        self.is_logged_in = True
+        logger.info("Login completed - continuing")
+        await self.save_session()
+        return True
+
+    def _page_key(self) -> str:
+        """Describe the current page for latency keys, e.g. '/Product/Edit/#'."""
+        try:
+            return re.sub(r'\d+', '#', urlparse(self.page.url).path) or '/'
+        except Exception:
+            return '?'
+
+    def adaptive_timeout(self, action: str, default_ms: Optional[float] = None) -> tuple[str, float]:
+        """
+        Work out the timeout for a wait on the current page.
+
+        Args:
+            action: What is being waited for, e.g. 'networkidle'
+            default_ms: Configured timeout (browser.timeout if None)
+
+        Returns:
+            (latency key, timeout in ms) - learned from past waits when
+            there is enough history, capped by the current time budget
+        """
+        key = f"{action}@{self._page_key()}"
+        default = self.timeout if default_ms is None else default_ms
+        timeout = self.timeouts.timeout(key, default) if self.timeouts else default
+        return key, budget_ms(timeout)
+
+    def record_latency(self, key: str, start: float, ok: bool = True):
+        """Record a wait that began at time.perf_counter() value start."""
+        if self.timeouts:
+            self.timeouts.record(key, (time.perf_counter() - start) * 1000, ok)
+
+    async def timed_wait(self, action: str, wait, default_ms: Optional[float] = None):
+        """
+        Run a Playwright wait with an adaptive timeout and record how long it took.
+
+        Args:
+            action: What is being waited for (see adaptive_timeout)
+            wait: Callable taking the timeout in ms and returning the awaitable
+            default_ms: Configured timeout (browser.timeout if None)
+
+        Returns:
+            Whatever the wait returns; exceptions (including timeouts) propagate
+        """
+        key, timeout = self.adaptive_timeout(action, default_ms)
+        start = time.perf_counter()
+        try:
+            result = await wait(timeout)
+        except Exception:
+            self.record_latency(key, start, ok=False)
+            raise
+        self.record_latency(key, start)
+        return result
+
+    def is_alive(self) -> bool:
+        """Return False if Chromium has exited or this page was closed or crashed."""
+        try:
+            return (self.browser is not None and self.browser.is_connected()
+                    and self.page is not None and not self.page.is_closed()
+                    and self.page not in _crashed_pages)
+        except Exception:
+            return False
+
+    async def relaunch(self) -> bool:
+        """
+        Recover from a crashed browser or page without a new login.
+
+        A dead page is replaced by a new one in the same context. If
+        Chromium itself is gone it is started again and the context is
+        restored from the session saved at login; only if that session is
+        no longer accepted does this log in again.
+
+        A page opened with fork() or open_session() shares its parent's
+        Chromium: it has the parent restart Chromium (once, however many of
+        its pages notice the crash) and then opens a new page there.
+
+        Returns:
+            True if a working, logged-in page is available again
+        """
+        import asyncio
+
+        self._warm_form = None  # Any pre-loaded form died with the page
+
+        if self.parent:
+            return await self._relaunch_from_parent()
+
+        if self._relaunch_lock is None:
+            self._relaunch_lock = asyncio.Lock()
+
+        async with self._relaunch_lock:
+            if self.is_alive():
+                return True  # Already recovered for one of the forked pages
+
+            if self.browser is not None and self.browser.is_connected():
+                try:
+                    self.page = await self._open_page()
+                    logger.info("Replaced crashed page")
+                    return True
+                except Exception as e:
+                    logger.warning(f"Could not open a new page, restarting browser: {e}")
+
+            return await self._restart_browser()
+
+    async def _relaunch_from_parent(self) -> bool:
+        """Recover a fork()ed or open_session() page, restarting the shared Chromium if needed."""
+        if self.browser is not None and self.browser.is_connected():
+            try:
+                self.page = await self._open_page()
+                logger.info("Replaced crashed page")
+                return True
+            except Exception as e:
+                logger.warning(f"Could not open a new page, restarting browser: {e}")
+
+        # Restarts the shared Chromium, or returns at once if that was already done
+        if not await self.parent.relaunch():
+            logger.error("Shared browser could not be restarted - cannot recover this page")
+            return False
+
+        try:
+            self.playwright = self.parent.playwright
+            self.browser = self.parent.browser
+            if self.owns_context:
+                # Own account: restore this session's cookies, not the parent's
+                self.context = await self._new_context(storage_state=self.session_state)
+            else:
+                self.context = self.parent.context
+                self.session_state = self.parent.session_state
+                self.is_logged_in = self.parent.is_logged_in
+            self.page = await self._open_page()
+        except Exception as e:
+            logger.error(f"Could not reopen page in the restarted browser: {e}")
+            return False
+
+        logger.info("Reopened page in the restarted browser")
+        return True
+
+    async def _restart_browser(self) -> bool:
+        """Start Chromium again and restore the saved session (relaunch, root browser only)."""
+        try:
+            if self.playwright:
+                await self.playwright.stop()
+        except Exception:
+            pass
+
+        try:
+            from playwright.async_api import async_playwright
+
+            logger.info("Restarting browser after crash...")
+            self.playwright = await async_playwright().start()
+            self.browser = await self.playwright.chromium.launch(
+                headless=self.headless,
+                slow_mo=self.slow_motion
+            )
+            self.context = await self._new_context(storage_state=self.session_state)
+            self.page = await self._open_page()
+        except Exception as e:
+            logger.error(f"Failed to restart browser: {e}")
+            return False
+
+        if self.session_state and await self.check_session():
+            logger.info("Browser restarted with saved session")
+            return True
+
+        self.is_logged_in = False
+        email = self.settings.get('tpt', {}).get('email')
+        password = self.settings.get('tpt', {}).get('password')
+        return bool(email and password) and await self.login(email, password)
+
+    def _is_error_page(self, response) -> bool:
+        """
+        Check a navigation response for a TPT error page (HTTP 5xx).
+
+        The status is kept in self.error_page so callers (and the circuit
+        breaker, src/breaker.py) can tell a site outage from a product problem.
+
+        Returns:
+            True if TPT answered with a server error
+        """
+        status = response.status if response is not None else None
+        self.error_page = status if status and status >= 500 else None
+        if self.error_page:
+            logger.error(f"TPT returned an error page (HTTP {status}) for {response.url}")
+        return self.error_page is not None
+
+    async def health_check(self) -> bool:
+        """
+        Cheaply check whether TPT is answering normally.
+
+        Sends one request with the session's cookies instead of loading a
+        page, so probing a struggling site costs little on either side.
+
+        Returns:
+            True if the dashboard answered without a server error
+        """
+        try:
+            response = await self.context.request.get(TPT_DASHBOARD_URL, timeout=self.timeout, max_redirects=0)
+            healthy = response.status < 500
+            logger.info(f"Health check: HTTP {response.status}")
+            await response.dispose()
+            return healthy
+        except Exception as e:
+            logger.warning(f"Health check failed: {e}")
+            return False
+
     async def _verify_logged_in(self) -> bool:
         """
         Verify that we're logged in by checking for logged-in indicators.
@@ -282,11 +1134,11 @@ class TPTBrowser:
 
         try:
             logger.info("Navigating to seller dashboard...")
-            await self.page.goto(TPT_DASHBOARD_URL)
-            await self.page.wait_for_load_state('networkidle')
+            if self._is_error_page(await self.page.goto(TPT_DASHBOARD_URL)):
+                return False
+            await self.timed_wait('networkidle', lambda t: self.page.wait_for_load_state('networkidle', timeout=t))
 
             # Verify we're on the dashboard
-            await self.page.wait_for_timeout(1000)
             await self.take_screenshot("dashboard")
 
             logger.info("On seller dashboard")
@@ -307,16 +1159,25 @@ class TPTBrowser:
             logger.error("Must be logged in before navigating to new product page")
             return False
 
+        self.error_page = None
+        if self._warm_form is not None:
+            # Waiting for a form that is already loading beats starting over
+            task, self._warm_form = self._warm_form, None
+            warm = await task
+            if warm:
+                old_page, self.page = self.page, warm.page
+                await old_page.close()
+                logger.info("Switched to pre-loaded product form")
+                return True
+
         try:
             logger.info("Navigating to Add New Product page...")
 
             # Try direct URL first
-            await self.page.goto(TPT_NEW_PRODUCT_URL)
-            await self.page.wait_for_load_state('networkidle')
-            await self.page.wait_for_timeout(2000)
-
-            # Take screenshot to see what we got
-            await self.take_screenshot("new_product_page")
+            if self._is_error_page(await self.page.goto(TPT_NEW_PRODUCT_URL)):
+                await self.take_screenshot("new_product_error_page")
+                return False
+            await self.timed_wait('networkidle', lambda t: self.page.wait_for_load_state('networkidle', timeout=t))
 
             # Verify we're on the product creation page
             # Look for form elements or product creation indicators
@@ -328,6 +1189,22 @@ class TPTBrowser:
                 'text="Upload"'
             ]
 
+            # Wait for the form to render instead of sleeping a fixed time
+            any_indicator = self.page.locator(form_indicators[0])
+            for indicator in form_indicators[1:]:
+                any_indicator = any_indicator.or_(self.page.locator(indicator))
+            try:
+                await self.timed_wait(
+                    'form_ready',
+                    lambda t: any_indicator.first.wait_for(state='attached', timeout=t),
+                    FORM_READY_TIMEOUT_MS
+                )
+            except Exception:
+                pass  # Checked below; falls back to the dashboard route
+
+            # Take screenshot to see what we got
+            await self.take_screenshot("new_product_page")
+
             for indicator in form_indicators:
                 try:
                     element = self.page.locator(indicator)
@@ -356,7 +1233,9 @@ class TPTBrowser:
                     if await button.count() > 0:
                         logger.info(f"Found Add New Product button: {selector}")
                         await button.click()
-                        await self.page.wait_for_load_state('networkidle')
+                        await self.timed_wait(
+                            'networkidle', lambda t: self.page.wait_for_load_state('networkidle', timeout=t)
+                        )
                         await self.take_screenshot("new_product_after_click")
                         return True
                 except:
@@ -370,6 +1249,48 @@ class TPTBrowser:
             await self.take_screenshot("new_product_error")
             return False
 
+    async def navigate_to_edit_product(self, listing_id: str) -> bool:
+        """
+        Navigate to the edit form of an existing listing.
+
+        Args:
+            listing_id: TPT product ID
+
+        Returns:
+            True if the edit form appears to have loaded
+        """
+        if not self.is_logged_in:
+            logger.error("Must be logged in before editing a product")
+            return False
+
+        try:
+            logger.info(f"Opening edit form for listing {listing_id}...")
+            if self._is_error_page(await self.page.goto(TPT_EDIT_PRODUCT_URL.format(listing_id=listing_id))):
+                return False
+            await self.timed_wait('networkidle', lambda t: self.page.wait_for_load_state('networkidle', timeout=t))
+
+            form_indicators = [
+                'input[name="title"]',
+                'input[placeholder="Name your product"]',
+                'text="Product Title"'
+            ]
+
+            for indicator in form_indicators:
+                try:
+                    if await self.page.locator(indicator).count() > 0:
+                        logger.info(f"Edit form loaded for listing {listing_id}")
+                        return True
+                except:
+                    continue
+
+            logger.error(f"Could not find edit form for listing {listing_id}")
+            await self.take_screenshot(f"edit_form_missing_{listing_id}")
+            return False
+
+        except Exception as e:
+            logger.error(f"Failed to open edit form for listing {listing_id}: {e}")
+            return False
+
     async def take_screenshot(self, name: str = None) -> Optional[str]:
         """
         Take a screenshot for verification/debugging.
@@ -418,8 +1339,8 @@ class TPTBrowser:
             logger.info(f"Waiting for: {desc}")
 
             element = self.page.locator(selector).first
-            await element.wait_for(state='visible', timeout=self.timeout)
-            await element.click()
+            await self.timed_wait('visible', lambda t: element.wait_for(state='visible', timeout=t))
+            await element.click(timeout=budget_ms(self.timeout))
 
             logger.info(f"Clicked: {desc}")
             return True
@@ -445,8 +1366,8 @@ class TPTBrowser:
             logger.info(f"Filling {desc}...")
 
             element = self.page.locator(selector).first
-            await element.wait_for(state='visible', timeout=self.timeout)
-            await element.fill(value)
+            await self.timed_wait('visible', lambda t: element.wait_for(state='visible', timeout=t))
+            await element.fill(value, timeout=budget_ms(self.timeout))
 
             logger.info(f"Filled {desc}")
             return True
@@ -465,7 +1386,7 @@ class TPTBrowser:
             description: Human-readable description for logging
 
         Returns:
-            True if upload initiated successfully
+            True if the server acknowledged the upload
         """
         try:
             desc = description or "file"
@@ -478,14 +1399,100 @@ class TPTBrowser:
             logger.info(f"Uploading {desc}: {path.name}")
 
             file_input = self.page.locator(selector).first
-            await file_input.set_input_files(str(path))
-
-            # Wait for upload to process
-            await self.page.wait_for_timeout(2000)
+            info = await self.set_files_and_wait(file_input, path)
+            if not info:
+                return False
 
-            logger.info(f"Upload initiated: {desc}")
+            logger.info(f"Upload complete: {desc}")
             return True
 
         except Exception as e:
             logger.error(f"Failed to upload {description or 'file'}: {e}")
             return False
+
+    async def set_files_and_wait(self, file_input, filepath: Path) -> Optional[dict]:
+        """
+        Set a file input and wait for the server to acknowledge the upload.
+
+        Instead of sleeping for a fixed time, this waits for the upload
+        request's response, so it returns as soon as a small file is stored
+        and keeps waiting (up to a size-scaled timeout) for a large one.
+
+        Args:
+            file_input: Locator of the file input element
+            filepath: File to upload
+
+        Returns:
+            Output of parse_upload_response, plus 'elapsed_ms' and 'local_size';
+            None if no successful upload response arrived in time
+        """
+        local_size = filepath.stat().st_size
+        start = time.perf_counter()
+
+        try:
+            timeout = budget_ms(self.timeout + UPLOAD_MS_PER_MB * local_size / 1_000_000)
+            async with self.page.expect_response(is_upload_response, timeout=timeout) as response_info:
+                await file_input.set_input_files(str(filepath))
+            response = await response_info.value
+        except Exception as e:
+            logger.error(f"No upload response for {filepath.name}: {e}")
+            return None
+
+        info = await parse_upload_response(response)
+        info['elapsed_ms'] = round((time.perf_counter() - start) * 1000)
+        info['local_size'] = local_size
+
+        if not info['ok']:
+            logger.error(f"Upload of {filepath.name} rejected: HTTP {info['status']} from {info['url']}")
+            return None
+
+        if info['size'] is not None and info['size'] != local_size:
+            logger.warning(f"Server reports {info['size']} bytes for {filepath.name}, local file is {local_size}")
+
+        logger.info(
+            f"Server acknowledged {filepath.name} in {info['elapsed_ms']} ms"
+            + (f" (file ID {info['file_id']})" if info['file_id'] else "")
+        )
+        return info
+
+    async def click_and_wait_for_save(self, button) -> Optional[dict]:
+        """
+        Click a save/publish button and wait for the product save response.
+
+        The response tells us whether the save worked and which listing it
+        created, so no screenshot, extra navigation or page scan is needed
+        to verify it.
+
+        Args:
+            button: Locator of the button to click
+
+        Returns:
+            Output of parse_product_save_response plus 'elapsed_ms';
+            None if no save response arrived in time
+        """
+        start = time.perf_counter()
+        key = None
+
+        try:
+            key, timeout = self.adaptive_timeout('save_response')
+            async with self.page.expect_response(is_product_save_response, timeout=timeout) as response_info:
+                await button.click(timeout=timeout)
+            response = await response_info.value
+        except Exception as e:
+            if key:
+                self.record_latency(key, start, ok=False)
+            logger.error(f"No product save response: {e}")
+            return None
+        self.record_latency(key, start)
+
+        info = await parse_product_save_response(response)
+        info['elapsed_ms'] = round((time.perf_counter() - start) * 1000)
+
+        if not info['ok']:
+            logger.error(f"Product save rejected: HTTP {info['status']} from {response.url}")
+        else:
+            logger.info(
+                f"Product saved in {info['elapsed_ms']} ms"
+                + (f" as listing {info['listing_id']}" if info['listing_id'] else "")
+            )
+        return info
@@ -0,0 +1,170 @@
+"""
+Bulk edits of existing listings.
+
+Store-wide changes (a sale price, refreshed tags, unpublishing drafts) are
+described in a CSV with one row per listing:
+
+    listing_id,price,title,description,tags,status
+    12345678,2.50,,,,
+    12345679,,,,reading;close reading,draft
+
+Empty cells are left unchanged. Each listing's edit form is opened and only
+fields that differ from the requested values are set. Listings are spread
+over a pool of pages in the same logged-in browser, so many edits run at
+once.
+"""
+
+import csv
+import logging
+from pathlib import Path
+from typing import Optional
+
+from src.uploader import EDITABLE_FIELDS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EDIT_WORKERS = 3
+
+
+def load_edits_csv(csv_path: str) -> list[dict]:
+    """
+    Load listing edits from a CSV file.
+
+    Args:
+        csv_path: Path to the edits CSV (must have a listing_id column)
+
+    Returns:
+        List of {'listing_id', 'changes'} dictionaries; rows without a
+        listing ID or without any change are skipped
+    """
+    path = Path(csv_path)
+
+    if not path.exists():
+        logger.error(f"CSV file not found: {csv_path}")
+        return []
+
+    edits = []
+
+    try:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+
+            if not reader.fieldnames or 'listing_id' not in reader.fieldnames:
+                logger.error("Edits CSV must have a listing_id column")
+                return []
+
+            unknown = set(reader.fieldnames) - set(EDITABLE_FIELDS) - {'listing_id'}
+            if unknown:
+                logger.warning(f"Ignoring unsupported columns: {', '.join(sorted(unknown))}")
+
+            for row_num, row in enumerate(reader, start=2):
+                listing_id = (row.get('listing_id') or '').strip()
+                if not listing_id:
+                    logger.warning(f"Row {row_num}: no listing_id, skipping")
+                    continue
+
+                changes = {
+                    field: row[field].strip()
+                    for field in EDITABLE_FIELDS
+                    if (row.get(field) or '').strip()
+                }
+                if changes:
+                    edits.append({'listing_id': listing_id, 'changes': changes})
+
+        logger.info(f"Loaded {len(edits)} listing edits from {csv_path}")
+        return edits
+
+    except (csv.Error, UnicodeDecodeError) as e:
+        logger.error(f"Error reading {csv_path}: {e}")
+        return []
+
+
+async def run_bulk_edit(edits: list[dict], settings: dict, dry_run: bool = False,
+                        workers: Optional[int] = None, browser=None) -> dict:
+    """
+    Apply listing edits across a pool of browser pages.
+
+    Args:
+        edits: Output of load_edits_csv
+        settings: Configuration dictionary
+        dry_run: Open each listing and report differences without saving
+        workers: Number of pages editing at once (default bulk_edit.workers)
+        browser: An already started and logged-in TPTBrowser to reuse
+
+    Returns:
+        Summary dictionary with 'total', 'updated', 'unchanged', 'failed'
+        and per-listing 'results'
+    """
+    import asyncio
+    from src.browser import TPTBrowser
+    from src.structured_logging import log_context
+    from src.uploader import TPTUploader
+
+    summary = {'total': len(edits), 'updated': 0, 'unchanged': 0, 'failed': 0, 'results': []}
+    if not edits:
+        return summary
+
+    if workers is None:
+        workers = (settings.get('bulk_edit', {}) or {}).get('workers', DEFAULT_EDIT_WORKERS)
+    workers = max(1, min(workers, len(edits)))
+
+    owns_browser = browser is None
+    pages = []
+
+    try:
+        if owns_browser:
+            browser = TPTBrowser(settings)
+            if not await browser.start():
+                summary['error'] = 'Failed to start browser'
+                return summary
+
+            email = settings.get('tpt', {}).get('email')
+            password = settings.get('tpt', {}).get('password')
+            if not email or not password or not await browser.login(email, password):
+                summary['error'] = 'Failed to login to TPT'
+                return summary
+
+        pages = [await browser.fork() for _ in range(workers)]
+
+        queue = asyncio.Queue()
+        for edit in edits:
+            queue.put_nowait(edit)
+
+        async def worker(name, page):
+            uploader = TPTUploader(page, settings)
+            while True:
+                try:
+                    edit = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                try:
+                    with log_context(worker=name, product=edit['listing_id']):
+                        result = await uploader.update_listing(edit['listing_id'], edit['changes'],
+                                                               dry_run=dry_run)
+                except Exception as e:
+                    result = {'success': False, 'listing_id': edit['listing_id'], 'message': str(e), 'changed': []}
+
+                summary['results'].append(result)
+                if not result['success']:
+                    summary['failed'] += 1
+                elif result['changed']:
+                    summary['updated'] += 1
+                else:
+                    summary['unchanged'] += 1
+                logger.info(f"Listing {result['listing_id']}: {result['message']}")
+
+        logger.info(f"Editing {len(edits)} listings with {workers} pages...")
+        await asyncio.gather(*(worker(f"page-{i + 1}", page) for i, page in enumerate(pages)))
+
+    finally:
+        for page in pages:
+            await page.close()
+        if owns_browser and browser:
+            await browser.close()
+
+    logger.info(
+        f"Bulk edit complete: {summary['updated']} updated, {summary['unchanged']} unchanged, "
+        f"{summary['failed']} failed"
+    )
+    return summary
@@ -0,0 +1,367 @@
+"""
+SQLite product catalog.
+
+An optional, indexed copy of products.csv. The CSV stays the source of
+truth: the catalog is imported from it, re-imported incrementally whenever
+the CSV's size or modification time changes, and can be exported back.
+
+Each catalog database holds one CSV. `catalog.db_path` is the catalog of
+`paths.products_csv`; any other CSV (e.g. a batch folder's products.csv)
+gets its own database next to it (see catalog_path), so switching between
+commands never deletes one CSV's rows - and their status - for another's.
+
+Indexed columns:
+- filename (primary key)
+- number (the numeric prefix of the filename, e.g. 041)
+- status (pending, uploaded, failed, ...)
+- grades
+- tags (reading_tags, themes and subjects, one row per tag)
+"""
+
+import csv
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+from pathlib import Path
+from typing import Iterator, Optional
+
+from src.metadata import MissingColumnsError, parse_tags, product_row_hash, read_csv_rows
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_PATH = "./logs/catalog.db"
+
+# Columns whose values are indexed as individual tags
+TAG_COLUMNS = ('reading_tags', 'themes', 'subjects')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    filename TEXT PRIMARY KEY,
+    number INTEGER,
+    status TEXT NOT NULL DEFAULT 'pending',
+    grades TEXT,
+    row_number INTEGER,
+    row_hash TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_products_number ON products(number);
+CREATE INDEX IF NOT EXISTS idx_products_status ON products(status);
+CREATE INDEX IF NOT EXISTS idx_products_grades ON products(grades);
+CREATE INDEX IF NOT EXISTS idx_products_row_number ON products(row_number);
+
+CREATE TABLE IF NOT EXISTS product_tags (
+    filename TEXT NOT NULL REFERENCES products(filename) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (tag, filename)
+);
+CREATE INDEX IF NOT EXISTS idx_product_tags_filename ON product_tags(filename);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def product_number(filename: str) -> Optional[int]:
+    """Extract the numeric prefix from a filename like '041_title.pdf'."""
+    match = re.match(r'^(\d+)_', filename or '')
+    return int(match.group(1)) if match else None
+
+
+class ProductCatalog:
+    """
+    Indexed product store backed by SQLite.
+
+    Lookups by filename or number and filtered selections by status, grade
+    or tag use indexes, so they do not grow with the size of the catalog.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_CATALOG_PATH):
+        """
+        Open (and create if needed) the catalog database.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Batch uploads read selections from a worker thread, one row at a time
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value)
+        )
+
+    def import_csv(self, csv_path: str, force: bool = False) -> dict:
+        """
+        Import products from CSV, touching only rows that changed.
+
+        The import is skipped entirely when the CSV's path, size and
+        modification time match the previous import. Otherwise each row's
+        content hash is compared with the stored one: new and changed rows
+        are upserted (keeping their status), and rows no longer in the CSV
+        are removed. A CSV that cannot be parsed to the end changes nothing.
+
+        Args:
+            csv_path: Path to the products CSV file
+            force: Re-read the CSV even if it appears unchanged
+
+        Returns:
+            Dictionary with 'added', 'updated', 'removed' and 'unchanged' counts
+            (and 'skipped': True if the CSV was not re-read, 'error' if it
+            could not be parsed)
+        """
+        counts = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0, 'skipped': False}
+
+        path = Path(csv_path)
+        if not path.exists():
+            logger.error(f"CSV file not found: {csv_path}")
+            return counts
+
+        stat = path.stat()
+        signature = json.dumps([str(path.resolve()), stat.st_size, stat.st_mtime_ns])
+
+        previous = self._get_meta('csv_signature')
+        if not force and previous == signature:
+            counts['skipped'] = True
+            return counts
+
+        # Importing a different CSV would delete every row of the one held here
+        source = json.loads(previous)[0] if previous else None
+        if source and source != str(path.resolve()):
+            error = f"{self.db_path} is the catalog of {source}, not {path.resolve()}"
+            logger.error(f"Catalog import refused: {error}")
+            return {**counts, 'error': error}
+
+        stored = {
+            row['filename']: row['row_hash']
+            for row in self.conn.execute("SELECT filename, row_hash FROM products")
+        }
+        seen = set()
+        fieldnames = None
+
+        try:
+            with self.conn:
+                for product in read_csv_rows(path):
+                    filename = product.get('filename')
+                    if not filename or filename in seen:
+                        continue
+                    seen.add(filename)
+
+                    if fieldnames is None:
+                        fieldnames = [k for k in product if k and not k.startswith('_')]
+
+                    row_hash = product_row_hash(product)
+                    if stored.get(filename) == row_hash:
+                        # Content unchanged; keep the row position current
+                        self.conn.execute(
+                            "UPDATE products SET row_number = ? WHERE filename = ?",
+                            (product.get('_row_number'), filename)
+                        )
+                        counts['unchanged'] += 1
+                        continue
+
+                    self._upsert(product, row_hash)
+                    counts['updated' if filename in stored else 'added'] += 1
+
+                removed = [name for name in stored if name not in seen]
+                for name in removed:
+                    self.conn.execute("DELETE FROM products WHERE filename = ?", (name,))
+                counts['removed'] = len(removed)
+
+                if fieldnames:
+                    self._set_meta('csv_fieldnames', json.dumps(fieldnames))
+                self._set_meta('csv_signature', signature)
+        except (MissingColumnsError, csv.Error, UnicodeDecodeError) as e:
+            # The transaction was rolled back: no row removed and the old
+            # signature kept, so the import is retried once the CSV is fixed
+            logger.error(f"Catalog import from {csv_path} aborted, catalog left unchanged: {e}")
+            return {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0, 'skipped': False, 'error': str(e)}
+
+        logger.info(
+            f"Catalog import from {csv_path}: {counts['added']} added, {counts['updated']} updated, "
+            f"{counts['removed']} removed, {counts['unchanged']} unchanged"
+        )
+        return counts
+
+    def _upsert(self, product: dict, row_hash: str):
+        """Insert or replace one product row and its tags."""
+        filename = product['filename']
+        data = {k: v for k, v in product.items() if k and not k.startswith('_')}
+
+        self.conn.execute(
+            "INSERT INTO products (filename, number, grades, row_number, row_hash, data) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(filename) DO UPDATE SET number = excluded.number, grades = excluded.grades, "
+            "row_number = excluded.row_number, row_hash = excluded.row_hash, data = excluded.data",
+            (filename, product_number(filename), (product.get('grades') or '').lower(),
+             product.get('_row_number'), row_hash, json.dumps(data, ensure_ascii=False))
+        )
+
+        self.conn.execute("DELETE FROM product_tags WHERE filename = ?", (filename,))
+        tags = {
+            tag.lower()
+            for column in TAG_COLUMNS
+            for tag in parse_tags(product.get(column) or '')
+        }
+        self.conn.executemany(
+            "INSERT INTO product_tags (filename, tag) VALUES (?, ?)",
+            [(filename, tag) for tag in tags]
+        )
+
+    @staticmethod
+    def _to_product(row: sqlite3.Row) -> dict:
+        product = json.loads(row['data'])
+        product['_row_number'] = row['row_number']
+        product['_status'] = row['status']
+        return product
+
+    def get(self, filename: str) -> Optional[dict]:
+        """Look up a single product by filename."""
+        row = self.conn.execute(
+            "SELECT data, status, row_number FROM products WHERE filename = ?", (filename,)
+        ).fetchone()
+        return self._to_product(row) if row else None
+
+    def get_by_number(self, number: int) -> Optional[dict]:
+        """Look up a single product by its numeric filename prefix."""
+        row = self.conn.execute(
+            "SELECT data, status, row_number FROM products WHERE number = ? ORDER BY row_number LIMIT 1", (number,)
+        ).fetchone()
+        return self._to_product(row) if row else None
+
+    def select(self, status: str = None, grades: str = None, tag: str = None,
+               min_number: int = None, max_number: int = None) -> Iterator[dict]:
+        """
+        Yield products matching all given filters, in CSV order.
+
+        Args:
+            status: Upload status, e.g. 'pending'
+            grades: Grade specification as written in the CSV, e.g. '4-8'
+            tag: A single reading tag, theme or subject
+            min_number: Lowest filename number to include
+            max_number: Highest filename number to include
+        """
+        clauses = []
+        params = []
+
+        if status:
+            clauses.append("p.status = ?")
+            params.append(status)
+        if grades:
+            clauses.append("p.grades = ?")
+            params.append(grades.strip().lower())
+        if tag:
+            clauses.append("p.filename IN (SELECT filename FROM product_tags WHERE tag = ?)")
+            params.append(tag.strip().lower())
+        if min_number is not None:
+            clauses.append("p.number >= ?")
+            params.append(min_number)
+        if max_number is not None:
+            clauses.append("p.number <= ?")
+            params.append(max_number)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = f"SELECT p.data, p.status, p.row_number FROM products p {where} ORDER BY p.row_number"
+
+        for row in self.conn.execute(query, params):
+            yield self._to_product(row)
+
+    def count(self) -> int:
+        """Return the number of products in the catalog."""
+        return self.conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    def set_status(self, filename: str, status: str):
+        """Record the upload status of a product."""
+        with self.conn:
+            self.conn.execute("UPDATE products SET status = ? WHERE filename = ?", (status, filename))
+
+    def export_csv(self, csv_path: str) -> int:
+        """
+        Write the catalog back out as a products CSV.
+
+        Args:
+            csv_path: Destination path
+
+        Returns:
+            Number of products written
+        """
+        fieldnames = json.loads(self._get_meta('csv_fieldnames') or '[]')
+        count = 0
+
+        with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+            writer = None
+            for product in self.select():
+                row = {k: v for k, v in product.items() if not k.startswith('_')}
+                if writer is None:
+                    fieldnames = fieldnames or list(row)
+                    writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+                    writer.writeheader()
+                writer.writerow(row)
+                count += 1
+
+            if writer is None and fieldnames:
+                csv.DictWriter(f, fieldnames=fieldnames).writeheader()
+
+        logger.info(f"Exported {count} products to {csv_path}")
+        return count
+
+
+def catalog_path(settings: dict, csv_path: str = None) -> str:
+    """
+    Database path of the catalog for a CSV.
+
+    Args:
+        settings: Configuration dictionary
+        csv_path: The CSV (defaults to paths.products_csv)
+
+    Returns:
+        catalog.db_path for paths.products_csv; for any other CSV, a
+        database next to it named after the CSV's resolved path
+    """
+    db_path = Path((settings.get('catalog', {}) or {}).get('db_path', DEFAULT_CATALOG_PATH))
+    default_csv = settings.get('paths', {}).get('products_csv', './products/products.csv')
+    if not csv_path or Path(csv_path).resolve() == Path(default_csv).resolve():
+        return str(db_path)
+
+    key = hashlib.sha1(str(Path(csv_path).resolve()).encode('utf-8')).hexdigest()[:10]
+    return str(db_path.with_name(f"{db_path.stem}-{key}{db_path.suffix}"))
+
+
+def open_catalog(settings: dict, csv_path: str = None) -> Optional[ProductCatalog]:
+    """
+    Open the catalog if enabled in settings, importing CSV changes first.
+
+    Args:
+        settings: Configuration dictionary
+        csv_path: CSV to import from (defaults to paths.products_csv)
+
+    Returns:
+        An up-to-date ProductCatalog, or None if the catalog is disabled
+    """
+    catalog_settings = settings.get('catalog', {}) or {}
+    if not catalog_settings.get('enabled', False):
+        return None
+
+    catalog = ProductCatalog(catalog_path(settings, csv_path))
+    catalog.import_csv(csv_path or settings.get('paths', {}).get('products_csv', './products/products.csv'))
+    return catalog
@@ -0,0 +1,529 @@
+"""
+Upload coordinator and workers for spreading a batch over several machines.
+
+One machine and one browser session limit how fast a batch can go. The
+coordinator (`tpt_agent.py coordinator start`) holds the product queue
+(src/jobqueue.py) and hands products out over HTTP; any number of workers
+(`tpt_agent.py worker`), on the same host or on others, each run their own
+logged-in browser and TPTUploader against the products they lease.
+
+- A lease lasts `coordinator.lease_seconds`. Workers renew it with
+  heartbeats while an upload runs; if a worker dies its product goes back
+  to the queue once the lease expires, and a late result for it is refused.
+  A worker told its lease is lost cancels the upload still in progress,
+  so it does not save a product the coordinator has handed to another.
+- `coordinator.uploads_per_minute` is a rate budget for the whole fleet.
+  The coordinator only hands out a product when the budget allows it and
+  otherwise tells the worker how long to wait, so adding workers never
+  pushes the combined upload rate over the site's limits.
+- A product leased more than once may already have been saved by the
+  worker that lost it. Before uploading it again a worker returns the
+  listing its own upload state recorded, or has the uploader look for the
+  listing on My-Products first. Results are reported until the
+  coordinator answers, so a brief outage does not lose them.
+- Workers need the product files under their own `paths.products_folder`
+  (a shared or synced folder); jobs carry the product row, not the files.
+
+Endpoints (JSON bodies; `X-TPT-Token` header when `coordinator.token` is set):
+    POST /submit     {"filenames": [...]}
+    POST /lease      {"worker": "host-1", "dry_run": false}
+    POST /heartbeat  {"worker": "host-1", "id": 12}
+    POST /complete   {"worker": "host-1", "id": 12, "result": {...}}
+    GET  /status
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from src.jobqueue import JobQueue
+from src.scheduler import Scheduler, product_bytes
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8766
+DEFAULT_QUEUE_PATH = "./logs/coordinator_jobs.db"
+DEFAULT_LEASE_SECONDS = 120
+
+# Seconds a worker waits before asking again when the queue is empty
+IDLE_POLL_INTERVAL = 5
+
+# Longest wait between attempts to report a result to an unreachable coordinator
+MAX_REPORT_INTERVAL = 60
+
+TOKEN_HEADER = 'X-TPT-Token'
+
+
+def coordinator_token(settings: dict) -> Optional[str]:
+    """Shared secret workers and clients must send (env TPT_COORDINATOR_TOKEN wins)."""
+    return os.getenv('TPT_COORDINATOR_TOKEN') or (settings.get('coordinator', {}) or {}).get('token')
+
+
+def coordinator_url(settings: dict) -> str:
+    """URL workers and clients reach the coordinator at."""
+    coordinator_settings = settings.get('coordinator', {}) or {}
+    if coordinator_settings.get('url'):
+        return coordinator_settings['url'].rstrip('/')
+    host = coordinator_settings.get('host', DEFAULT_HOST)
+    if host in ('0.0.0.0', ''):
+        host = '127.0.0.1'
+    return f"http://{host}:{coordinator_settings.get('port', DEFAULT_PORT)}"
+
+
+class RateBudget:
+    """
+    Token bucket shared by every worker of the coordinator.
+
+    Refills at `per_minute` uploads a minute and holds at most `burst`
+    tokens, so an idle fleet cannot save up a burst of uploads.
+    """
+
+    def __init__(self, per_minute: float, burst: int = 1):
+        self.rate = per_minute / 60 if per_minute else 0
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """Seconds until an upload may start (0 if one may start now)."""
+        if not self.rate:
+            return 0
+        self._refill()
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        """Spend one upload from the budget."""
+        if self.rate:
+            self._refill()
+            self.tokens -= 1
+
+
+class Coordinator:
+    """
+    Leases queued products to workers and collects their results.
+    """
+
+    def __init__(self, settings: dict):
+        """
+        Initialize the coordinator.
+
+        Args:
+            settings: Configuration dictionary (the 'coordinator' section)
+        """
+        self.settings = settings
+        coordinator_settings = settings.get('coordinator', {}) or {}
+        self.lease_seconds = coordinator_settings.get('lease_seconds', DEFAULT_LEASE_SECONDS)
+        self.token = coordinator_token(settings)
+        self.budget = RateBudget(coordinator_settings.get('uploads_per_minute', 0),
+                                 coordinator_settings.get('burst', 1))
+        self.queue = JobQueue(coordinator_settings.get('queue_path', DEFAULT_QUEUE_PATH))
+        # One scheduler for the coordinator's lifetime: finished uploads feed
+        # its bandwidth meter, so later submits are ranked by the observed rate
+        self.scheduler = Scheduler(settings)
+        # Requests are served on their own threads; the queue and the budget
+        # are only touched under this lock
+        self.lock = threading.Lock()
+
+    def close(self):
+        """Close the queue database."""
+        self.queue.close()
+
+    def dispatch(self, method: str, path: str, request: dict) -> dict:
+        """
+        Answer one API request.
+
+        Reading the products of a submit (CSV, catalog, file checks) runs
+        outside the lock, so a large submit never holds up leases and
+        heartbeats.
+
+        Args:
+            method: 'GET' or 'POST'
+            path: Endpoint path, e.g. '/lease'
+            request: Decoded JSON body ({} for GET)
+
+        Returns:
+            Reply with 'ok' and the endpoint's fields, or 'error'
+        """
+        from src.daemon import resolve_products
+
+        if method == 'POST' and path == '/submit':
+            products, missing = resolve_products(self.settings, request.get('filenames', []))
+            self.scheduler.refresh()
+            ranks = [self.scheduler.rank(product) for product in products]
+            with self.lock:
+                job_ids = [self.queue.submit(product, *rank) for product, rank in zip(products, ranks)]
+            if job_ids:
+                logger.info(f"Queued {len(job_ids)} jobs: {job_ids}")
+            return {'ok': True, 'jobs': job_ids, 'missing': missing}
+
+        with self.lock:
+            return self._dispatch_locked(method, path, request)
+
+    def _dispatch_locked(self, method: str, path: str, request: dict) -> dict:
+        """Answer a request that reads or changes the queue (self.lock held)."""
+        if method == 'GET' and path == '/status':
+            self.queue.expire_leases()
+            return {'ok': True, 'counts': self.queue.counts(), 'jobs': self.queue.list(limit=request.get('limit', 20)),
+                    'wait': round(self.budget.wait_time(), 1)}
+
+        if method != 'POST':
+            return {'ok': False, 'error': f"Unknown endpoint: {method} {path}"}
+
+        worker = request.get('worker')
+        if not worker:
+            return {'ok': False, 'error': 'Missing worker name'}
+
+        if path == '/lease':
+            # Dry runs only validate, so they do not count against the budget
+            wait = 0 if request.get('dry_run') else self.budget.wait_time()
+            if wait:
+                return {'ok': True, 'job': None, 'retry_after': round(wait, 2)}
+
+            job = self.queue.lease(worker, self.lease_seconds)
+            if not job:
+                counts = self.queue.counts()
+                # Running jobs may still come back if their worker dies
+                return {'ok': True, 'job': None, 'retry_after': IDLE_POLL_INTERVAL,
+                        'empty': not counts.get('queued') and not counts.get('running')}
+
+            if not request.get('dry_run'):
+                self.budget.take()
+            logger.info(f"Job {job['id']} ({job['filename']}) leased to {worker}")
+            return {'ok': True, 'job': job, 'lease_seconds': self.lease_seconds}
+
+        if path == '/heartbeat':
+            if not self.queue.heartbeat(int(request['id']), worker, self.lease_seconds):
+                return {'ok': False, 'error': 'Lease lost'}
+            return {'ok': True}
+
+        if path == '/complete':
+            result = request.get('result') or {}
+            if not self.queue.complete(int(request['id']), result, worker=worker):
+                logger.warning(f"Refused late result for job {request['id']} from {worker}")
+                return {'ok': False, 'error': 'Lease lost (the job was requeued)'}
+            logger.info(f"Job {request['id']} {'done' if result.get('success') else 'failed'} "
+                        f"on {worker}: {result.get('message')}")
+            job = self.queue.get(int(request['id']))
+            self.scheduler.meter.observe_result(product_bytes(job['product'], self.scheduler.products_folder), result)
+            return {'ok': True}
+
+        return {'ok': False, 'error': f"Unknown endpoint: {method} {path}"}
+
+    def make_server(self) -> ThreadingHTTPServer:
+        """
+        Bind the HTTP server (coordinator.host / coordinator.port).
+
+        Each request is handled on its own thread (see dispatch for what
+        runs under the lock).
+        """
+        coordinator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, status: int, reply: dict):
+                body = json.dumps(reply, default=str).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _handle(self, method: str):
+                if coordinator.token and self.headers.get(TOKEN_HEADER) != coordinator.token:
+                    self._reply(403, {'ok': False, 'error': 'Bad or missing token'})
+                    return
+                try:
+                    length = int(self.headers.get('Content-Length') or 0)
+                    request = json.loads(self.rfile.read(length) or b'{}') if length else {}
+                    reply = coordinator.dispatch(method, self.path.split('?')[0], request)
+                except Exception as e:
+                    logger.error(f"Coordinator request {method} {self.path} failed: {e}")
+                    reply = {'ok': False, 'error': str(e)}
+                self._reply(200, reply)
+
+            def do_GET(self):
+                self._handle('GET')
+
+            def do_POST(self):
+                self._handle('POST')
+
+            def log_message(self, format, *args):
+                logger.debug(f"{self.client_address[0]} {format % args}")
+
+        coordinator_settings = self.settings.get('coordinator', {}) or {}
+        address = (coordinator_settings.get('host', DEFAULT_HOST), coordinator_settings.get('port', DEFAULT_PORT))
+        server = ThreadingHTTPServer(address, Handler)
+        server.daemon_threads = True
+        return server
+
+    def serve(self):
+        """Serve requests until interrupted."""
+        server = self.make_server()
+        requeued = self.queue.expire_leases()
+        logger.info(f"Coordinator listening on {server.server_address} "
+                    f"(lease {self.lease_seconds}s, budget "
+                    f"{self.budget.rate * 60 or 'unlimited'} uploads/min, {requeued} expired leases requeued)")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            self.close()
+            logger.info("Coordinator stopped")
+
+
+def coordinator_request(settings: dict, method: str, path: str, payload: Optional[dict] = None,
+                        url: Optional[str] = None, timeout: float = 30) -> dict:
+    """
+    Send one request to the coordinator.
+
+    Synchronous and dependency-free, like the daemon client; workers call
+    it through asyncio.to_thread.
+
+    Args:
+        settings: Configuration dictionary
+        method: 'GET' or 'POST'
+        path: Endpoint path, e.g. '/lease'
+        payload: JSON body for POST requests
+        url: Coordinator URL (default: coordinator_url(settings))
+        timeout: Seconds to wait for a reply
+
+    Returns:
+        The coordinator's reply, or {'ok': False, 'error': ..., 'unreachable': True}
+        if it cannot be reached
+    """
+    import urllib.error
+    import urllib.request
+
+    headers = {'Content-Type': 'application/json'}
+    token = coordinator_token(settings)
+    if token:
+        headers[TOKEN_HEADER] = token
+    data = json.dumps(payload or {}, default=str).encode('utf-8') if method == 'POST' else None
+    request = urllib.request.Request((url or coordinator_url(settings)) + path, data=data,
+                                     headers=headers, method=method)
+
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read() or b'{}')
+    except urllib.error.HTTPError as e:
+        try:
+            return json.loads(e.read())
+        except ValueError:
+            return {'ok': False, 'error': f"HTTP {e.code} from coordinator", 'unreachable': e.code >= 500}
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        return {'ok': False, 'error': f"Could not reach coordinator: {e}", 'unreachable': True}
+
+
+async def _keep_lease(settings: dict, url: str, worker: str, job_id: int, interval: float):
+    """
+    Renew a job's lease until cancelled.
+
+    Returns once the coordinator answers that the lease is lost (the job
+    was requeued); an unreachable coordinator is retried on the next beat.
+    """
+    import asyncio
+
+    while True:
+        await asyncio.sleep(interval)
+        reply = await asyncio.to_thread(coordinator_request, settings, 'POST', '/heartbeat',
+                                        {'worker': worker, 'id': job_id}, url)
+        if reply.get('ok'):
+            continue
+        logger.warning(f"Heartbeat for job {job_id} failed: {reply.get('error')}")
+        if not reply.get('unreachable'):
+            return
+
+
+async def _report_result(settings: dict, url: str, worker: str, job_id: int, result: dict):
+    """
+    Send a job's result to the coordinator, retrying until it answers.
+
+    The result is kept in memory meanwhile: a worker that dropped it would
+    leave the job running until its lease expires, and another worker
+    would then upload the product a second time.
+    """
+    import asyncio
+
+    interval = IDLE_POLL_INTERVAL
+    while True:
+        reply = await asyncio.to_thread(coordinator_request, settings, 'POST', '/complete',
+                                        {'worker': worker, 'id': job_id, 'result': result}, url)
+        if not reply.get('unreachable'):
+            break
+        logger.warning(f"Could not report job {job_id}, retrying in {interval}s: {reply.get('error')}")
+        await asyncio.sleep(interval)
+        interval = min(interval * 2, MAX_REPORT_INTERVAL)
+
+    if not reply.get('ok'):
+        logger.warning(f"Result for job {job_id} not accepted: {reply.get('error')}")
+
+
+def _earlier_upload(settings: dict, job: dict) -> Optional[dict]:
+    """
+    Prepare a product that was leased before for its next upload.
+
+    The worker that held it may have saved it before losing the lease. If
+    this machine's upload state has a listing confirmed since the job was
+    submitted, that is the result (no second upload). Otherwise the product is marked as an
+    unconfirmed save, so TPTUploader looks for the listing on My-Products
+    before creating one.
+
+    Returns:
+        The result to report if this worker already uploaded the product,
+        otherwise None
+    """
+    from src.state import open_upload_state
+    from src.uploader import is_unconfirmed_save
+
+    filename = job['filename']
+    try:
+        state = open_upload_state(settings)
+    except Exception as e:
+        logger.warning(f"Could not open upload state for {filename}: {e}")
+        return None
+
+    try:
+        record = state.get(filename)
+        # Only a listing saved since the job was submitted is this job's result
+        if record and record.get('listing_id') and record.get('status') not in ('submitting', 'save_failed') \
+                and record['updated_at'] >= job['created_at']:
+            logger.info(f"Job {job['id']}: {filename} was already uploaded here as listing {record['listing_id']}")
+            return {
+                'success': True,
+                'filename': filename,
+                'listing_id': record['listing_id'],
+                'url': record.get('url'),
+                'message': f"Already uploaded as listing {record['listing_id']} (result of an earlier lease)",
+            }
+        if not is_unconfirmed_save(record):
+            state.record(filename, status='submitting', http_status=None)
+    except Exception as e:
+        logger.warning(f"Could not check upload state for {filename}: {e}")
+    finally:
+        state.close()
+    return None
+
+
+async def run_worker(settings: dict, url: Optional[str] = None, name: Optional[str] = None,
+                     dry_run: bool = False, exit_when_empty: bool = False) -> dict:
+    """
+    Lease products from the coordinator and upload them until stopped.
+
+    Args:
+        settings: Configuration dictionary (this machine's credentials and
+            products folder)
+        url: Coordinator URL (default: coordinator_url(settings))
+        name: Worker name shown in the coordinator (default: host-pid)
+        dry_run: Validate leased products instead of uploading (no browser)
+        exit_when_empty: Stop once the queue has nothing queued or running
+
+    Returns:
+        {'worker', 'successful', 'failed'} counts, plus 'error' if the
+        worker could not start
+    """
+    import asyncio
+    from src.structured_logging import log_context
+    from src.uploader import TPTUploader
+
+    url = url or coordinator_url(settings)
+    name = name or f"{socket.gethostname()}-{os.getpid()}"
+    stats = {'worker': name, 'successful': 0, 'failed': 0}
+    # Without a fleet-wide budget each worker keeps its own pacing
+    budgeted = bool((settings.get('coordinator', {}) or {}).get('uploads_per_minute'))
+    delay = settings.get('upload', {}).get('delay_between_uploads', 5)
+
+    browser = None
+    watchdog = None
+    with log_context(worker=name):
+        try:
+            if not dry_run:
+                from src.browser import TPTBrowser
+                from src.watchdog import MemoryWatchdog
+
+                email = settings.get('tpt', {}).get('email')
+                password = settings.get('tpt', {}).get('password')
+                if not email or not password:
+                    stats['error'] = 'TPT credentials not configured'
+                    return stats
+                browser = TPTBrowser(settings)
+                if not await browser.start() or not await browser.login(email, password):
+                    stats['error'] = 'Failed to start the browser or log in'
+                    return stats
+                watchdog = MemoryWatchdog(browser, settings)
+
+            uploader = TPTUploader(browser, settings)
+            logger.info(f"Worker {name} polling {url}")
+            uploaded_any = False
+
+            while True:
+                reply = await asyncio.to_thread(coordinator_request, settings, 'POST', '/lease',
+                                                {'worker': name, 'dry_run': dry_run}, url)
+                if not reply.get('ok'):
+                    logger.warning(f"Lease request failed: {reply.get('error')}")
+                    await asyncio.sleep(IDLE_POLL_INTERVAL)
+                    continue
+
+                job = reply.get('job')
+                if not job:
+                    if reply.get('empty') and exit_when_empty:
+                        break
+                    await asyncio.sleep(reply.get('retry_after', IDLE_POLL_INTERVAL))
+                    continue
+
+                if uploaded_any and not budgeted and not dry_run:
+                    await asyncio.sleep(delay)
+
+                # Leased before: the earlier worker may have created the listing
+                earlier = _earlier_upload(settings, job) if job.get('attempts', 1) > 1 and not dry_run else None
+                if earlier:
+                    stats['successful'] += 1
+                    await _report_result(settings, url, name, job['id'], earlier)
+                    continue
+
+                logger.info(f"Job {job['id']}: uploading {job['filename']}")
+                lease_seconds = reply.get('lease_seconds', DEFAULT_LEASE_SECONDS)
+                heartbeat = asyncio.create_task(
+                    _keep_lease(settings, url, name, job['id'], max(1, lease_seconds / 3))
+                )
+                upload = asyncio.create_task(uploader.upload_product(job['product'], dry_run=dry_run))
+                try:
+                    await asyncio.wait({upload, heartbeat}, return_when=asyncio.FIRST_COMPLETED)
+                    if not upload.done():
+                        # The job was requeued and may already be with another
+                        # worker: saving it here too could create a duplicate
+                        upload.cancel()
+                        await asyncio.gather(upload, return_exceptions=True)
+                        logger.error(f"Job {job['id']}: lease lost - upload of {job['filename']} cancelled")
+                        stats['failed'] += 1
+                        uploaded_any = True
+                        continue
+                    result = upload.result()
+                    if watchdog:
+                        await watchdog.after_product()
+                except Exception as e:
+                    logger.error(f"Job {job['id']} crashed: {e}")
+                    result = {'success': False, 'filename': job['filename'], 'message': str(e)}
+                finally:
+                    heartbeat.cancel()
+                    upload.cancel()
+
+                uploaded_any = True
+                stats['successful' if result.get('success') else 'failed'] += 1
+                await _report_result(settings, url, name, job['id'], result)
+
+        finally:
+            if browser:
+                await browser.close()
+
+    logger.info(f"Worker {name} finished: {stats['successful']} succeeded, {stats['failed']} failed")
+    return stats
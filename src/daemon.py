@@ -0,0 +1,311 @@
+"""
+Long-lived upload daemon.
+
+Starting Chromium and logging in costs more than uploading a single
+product. The daemon does both once, keeps the session warm, and serves
+upload jobs submitted by thin CLI clients (`tpt_agent.py daemon submit`).
+
+- Jobs are stored in a SQLite queue (src/jobqueue.py), so nothing is lost
+  if the daemon stops; interrupted jobs are requeued on the next start.
+- `daemon.workers` pages in the same logged-in context process jobs
+  concurrently, highest priority and longest upload first
+  (src/scheduler.py), without starting more uploads at once than the
+  observed bandwidth carries.
+- Clients talk to the daemon over a local Unix socket (or 127.0.0.1 on
+  platforms without Unix sockets) using one JSON object per line.
+
+Requests:
+    {"cmd": "submit", "filenames": ["041_x.pdf", ...]}
+    {"cmd": "status", "id": 12}          # one job
+    {"cmd": "status"}                    # counts and recent jobs
+    {"cmd": "shutdown"}
+"""
+
+import json
+import logging
+import socket
+from pathlib import Path
+
+from src.jobqueue import JobQueue, DEFAULT_QUEUE_PATH
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET_PATH = "./logs/tpt_agent.sock"
+DEFAULT_PORT = 8765
+
+# Seconds between queue checks when no submit wakes the workers up
+IDLE_POLL_INTERVAL = 5
+
+
+def daemon_address(settings: dict) -> tuple[str, object]:
+    """
+    Work out where the daemon listens.
+
+    Returns:
+        ('unix', socket path) or ('tcp', (host, port))
+    """
+    daemon_settings = settings.get('daemon', {}) or {}
+    if hasattr(socket, 'AF_UNIX') and daemon_settings.get('socket', DEFAULT_SOCKET_PATH):
+        return 'unix', daemon_settings.get('socket', DEFAULT_SOCKET_PATH)
+    return 'tcp', ('127.0.0.1', daemon_settings.get('port', DEFAULT_PORT))
+
+
+def send_request(settings: dict, payload: dict, timeout: float = 10) -> dict:
+    """
+    Send one request to a running daemon and wait for its reply.
+
+    Deliberately synchronous and dependency-free so client commands start
+    instantly.
+
+    Args:
+        settings: Configuration dictionary
+        payload: Request object (see module docstring)
+        timeout: Seconds to wait for the daemon
+
+    Returns:
+        The daemon's reply, or {'ok': False, 'error': ...} if it is not running
+    """
+    kind, address = daemon_address(settings)
+    family = socket.AF_UNIX if kind == 'unix' else socket.AF_INET
+
+    try:
+        with socket.socket(family, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(address)
+            sock.sendall(json.dumps(payload).encode('utf-8') + b'\n')
+
+            data = b''
+            while not data.endswith(b'\n'):
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+
+        return json.loads(data) if data else {'ok': False, 'error': 'Empty reply from daemon'}
+
+    except (FileNotFoundError, ConnectionRefusedError):
+        return {'ok': False, 'error': 'Daemon is not running (start it with: tpt_agent.py daemon start)'}
+    except (OSError, ValueError) as e:
+        return {'ok': False, 'error': f"Could not talk to daemon: {e}"}
+
+
+def resolve_products(settings: dict, filenames: list[str]) -> tuple[list[dict], list[str]]:
+    """
+    Look up product rows for the given filenames.
+
+    Uses the product catalog if one is configured, otherwise products.csv.
+
+    Returns:
+        (products found, filenames not found)
+    """
+    from src.catalog import open_catalog
+    from src.metadata import load_products_csv
+
+    catalog = open_catalog(settings)
+    if catalog:
+        found = {name: catalog.get(name) for name in filenames}
+        catalog.close()
+    else:
+        rows = {p['filename']: p for p in load_products_csv(settings['paths']['products_csv'])}
+        found = {name: rows.get(name) for name in filenames}
+
+    products = [p for p in found.values() if p]
+    missing = [name for name, p in found.items() if not p]
+    return products, missing
+
+
+class UploadDaemon:
+    """
+    Serves upload jobs from a persistent queue using a warm browser.
+    """
+
+    def __init__(self, settings: dict):
+        """
+        Initialize the daemon.
+
+        Args:
+            settings: Configuration dictionary
+        """
+        self.settings = settings
+        daemon_settings = settings.get('daemon', {}) or {}
+        self.worker_count = max(1, daemon_settings.get('workers', 1))
+        self.queue = JobQueue(daemon_settings.get('queue_path', DEFAULT_QUEUE_PATH))
+
+        self.browser = None
+        self.wakeup = None
+        self.stopping = None
+        self.scheduler = None
+        self.throttle = None
+        self.live_workers = 0
+
+    async def _handle_client(self, reader, writer):
+        """Answer one JSON request from a client."""
+        try:
+            line = await reader.readline()
+            request = json.loads(line or b'{}')
+            reply = await self._dispatch(request)
+        except Exception as e:
+            reply = {'ok': False, 'error': str(e)}
+
+        writer.write(json.dumps(reply, default=str).encode('utf-8') + b'\n')
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    def _prepare_jobs(self, filenames: list[str]) -> tuple[list[tuple[dict, tuple]], list[str]]:
+        """Look up products and their queue rank (blocking: catalog import, file sizes)."""
+        products, missing = resolve_products(self.settings, filenames)
+        self.scheduler.refresh()
+        return [(product, self.scheduler.rank(product)) for product in products], missing
+
+    async def _dispatch(self, request: dict) -> dict:
+        import asyncio
+
+        cmd = request.get('cmd')
+
+        if cmd == 'submit':
+            # Off the event loop, so a slow catalog import never stalls the workers
+            jobs, missing = await asyncio.to_thread(self._prepare_jobs, request.get('filenames', []))
+            job_ids = [self.queue.submit(product, *rank) for product, rank in jobs]
+            if job_ids:
+                logger.info(f"Queued {len(job_ids)} jobs: {job_ids}")
+                self.wakeup.set()
+            return {'ok': True, 'jobs': job_ids, 'missing': missing}
+
+        if cmd == 'status':
+            if request.get('id') is not None:
+                job = self.queue.get(int(request['id']))
+                return {'ok': bool(job), 'job': job, 'error': None if job else 'No such job'}
+            return {'ok': True, 'counts': self.queue.counts(), 'jobs': self.queue.list(limit=request.get('limit', 20))}
+
+        if cmd == 'shutdown':
+            logger.info("Shutdown requested by client")
+            self.stopping.set()
+            self.wakeup.set()
+            return {'ok': True}
+
+        return {'ok': False, 'error': f"Unknown command: {cmd}"}
+
+    async def _worker(self, name: str, browser):
+        """Claim and upload jobs until the daemon stops."""
+        import asyncio
+        from src.scheduler import product_bytes
+        from src.structured_logging import log_context
+        from src.supervisor import BrowserSupervisor
+        from src.uploader import TPTUploader
+        from src.watchdog import MemoryWatchdog
+
+        uploader = TPTUploader(browser, self.settings)
+        watchdog = MemoryWatchdog(browser, self.settings)
+        # Replaces this worker's page if it crashes, instead of failing every later job
+        supervisor = BrowserSupervisor(browser, self.settings)
+        delay = self.settings.get('upload', {}).get('delay_between_uploads', 5)
+        uploaded_any = False
+
+        with log_context(worker=name):
+            while not self.stopping.is_set():
+                job = self.queue.claim(name)
+                if not job:
+                    self.wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self.wakeup.wait(), IDLE_POLL_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                if uploaded_any:
+                    await asyncio.sleep(delay)
+
+                logger.info(f"[{name}] Job {job['id']}: uploading {job['filename']}")
+                nbytes = product_bytes(job['product'], uploader.products_folder)
+                try:
+                    # Wait while other pages are already using the observed bandwidth
+                    async with self.throttle.reserve(nbytes):
+                        result = await supervisor.upload(uploader, job['product'])
+                    self.throttle.meter.observe_result(nbytes, result)
+                    await watchdog.after_product()
+                except Exception as e:
+                    logger.error(f"[{name}] Job {job['id']} crashed: {e}")
+                    result = {'success': False, 'filename': job['filename'], 'message': str(e)}
+
+                self.queue.complete(job['id'], result)
+                uploaded_any = True
+                logger.info(f"[{name}] Job {job['id']} {'done' if result['success'] else 'failed'}: {result['message']}")
+
+                if not browser.is_alive():
+                    # The supervisor could not recover this page: every further
+                    # job would fail, so leave them to the other workers
+                    logger.error(f"[{name}] Browser page could not be recovered - worker stopping")
+                    break
+
+        self.live_workers -= 1
+        if not self.live_workers and not self.stopping.is_set():
+            logger.error("No worker has a working browser - stopping the daemon")
+            self.stopping.set()
+
+    async def run(self) -> bool:
+        """
+        Start the browser, log in, and serve jobs until shut down.
+
+        Returns:
+            False if the browser could not be started or logged in
+        """
+        import asyncio
+        from src.browser import TPTBrowser
+        from src.scheduler import BandwidthThrottle, Scheduler
+
+        self.wakeup = asyncio.Event()
+        self.stopping = asyncio.Event()
+        # The throttle feeds the scheduler's meter, so submits are ranked by the observed rate
+        self.scheduler = Scheduler(self.settings)
+        self.throttle = BandwidthThrottle(self.settings, meter=self.scheduler.meter)
+        self.queue.requeue_running()
+
+        self.browser = TPTBrowser(self.settings)
+        if not await self.browser.start():
+            return False
+
+        email = self.settings.get('tpt', {}).get('email')
+        password = self.settings.get('tpt', {}).get('password')
+        if not email or not password or not await self.browser.login(email, password):
+            logger.error("Daemon could not log in to TPT")
+            await self.browser.close()
+            return False
+
+        pages = [self.browser] + [await self.browser.fork() for _ in range(self.worker_count - 1)]
+
+        kind, address = daemon_address(self.settings)
+        if kind == 'unix':
+            Path(address).parent.mkdir(parents=True, exist_ok=True)
+            Path(address).unlink(missing_ok=True)
+            server = await asyncio.start_unix_server(self._handle_client, path=address)
+        else:
+            server = await asyncio.start_server(self._handle_client, *address)
+
+        logger.info(f"Upload daemon ready on {address} with {self.worker_count} workers")
+        self.wakeup.set()  # Pick up anything already queued
+
+        self.live_workers = len(pages)
+        workers = [
+            asyncio.create_task(self._worker(f"worker-{i + 1}", page))
+            for i, page in enumerate(pages)
+        ]
+
+        try:
+            await self.stopping.wait()
+            # Let in-flight uploads finish before tearing the browser down
+            await asyncio.gather(*workers, return_exceptions=True)
+        finally:
+            server.close()
+            for task in workers:
+                task.cancel()
+            if kind == 'unix':
+                Path(address).unlink(missing_ok=True)
+            for page in pages[1:]:
+                await page.close()
+            await self.browser.close()
+            self.queue.close()
+            logger.info("Upload daemon stopped")
+
+        return True
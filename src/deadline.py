@@ -0,0 +1,148 @@
+"""
+Time budgets for upload steps.
+
+Every product, and every step within it, runs under a Deadline held in a
+context variable. Browser helpers ask budget_ms() for their timeout
+instead of using the full browser.timeout, so waits get shorter as the
+budget runs out, and a stuck step cannot chain several full-length waits
+across fallback selectors. Running out of time raises StepTimeout, which
+names the step and whether the step's own or the product's budget ran
+out.
+
+    with deadline('product', 300_000):
+        with deadline('title', 10_000):
+            await element.wait_for(timeout=budget_ms(browser.timeout))
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+_current: ContextVar[Optional['Deadline']] = ContextVar('deadline', default=None)
+
+# Playwright treats a timeout of 0 as "wait forever", so never hand it less
+MIN_TIMEOUT_MS = 1
+
+
+class StepTimeout(TimeoutError):
+    """
+    Raised when a step or product runs out of its time budget.
+
+    Attributes:
+        step: Innermost step running when time ran out
+        scope: Name of the budget that ran out ('product' or the step name)
+        budget_ms: Size of that budget
+    """
+
+    def __init__(self, step: str, scope: str, budget_ms: float):
+        self.step = step
+        self.scope = scope
+        self.budget_ms = budget_ms
+        if scope == step:
+            message = f"Step '{step}' ran out of its {budget_ms / 1000:g}s budget"
+        else:
+            message = f"Step '{step}' stopped: {scope} budget of {budget_ms / 1000:g}s used up"
+        super().__init__(message)
+
+    def to_dict(self) -> dict:
+        """Return the timeout's classification for result dictionaries."""
+        return {'step': self.step, 'scope': self.scope, 'budget_ms': self.budget_ms}
+
+
+class Deadline:
+    """
+    A named time budget, nested inside the enclosing one.
+
+    The effective expiry is the earlier of this budget's and its parent's,
+    so a step never outlives its product.
+    """
+
+    def __init__(self, name: str, budget_ms: float, parent: Optional['Deadline'] = None):
+        self.name = name
+        self.budget_ms = budget_ms
+        self.parent = parent
+        self.expires_at = time.monotonic() + budget_ms / 1000
+
+    def _binding(self) -> 'Deadline':
+        """Return the deadline (this one or an ancestor) that expires first."""
+        binding = self
+        parent = self.parent
+        while parent is not None:
+            if parent.expires_at < binding.expires_at:
+                binding = parent
+            parent = parent.parent
+        return binding
+
+    def remaining_ms(self) -> float:
+        """Milliseconds left before this deadline (or an enclosing one) expires."""
+        return max(0.0, (self._binding().expires_at - time.monotonic()) * 1000)
+
+    def expired(self) -> bool:
+        return self.remaining_ms() <= 0
+
+    def timeout(self) -> StepTimeout:
+        """Build the StepTimeout describing this deadline running out."""
+        binding = self._binding()
+        return StepTimeout(self.name, binding.name, binding.budget_ms)
+
+
+@contextmanager
+def deadline(name: str, budget_ms: Optional[float]) -> Iterator[Optional[Deadline]]:
+    """
+    Run a block under a time budget.
+
+    Args:
+        name: Step (or 'product') name, used in StepTimeout
+        budget_ms: Budget in milliseconds; None keeps only the enclosing budget
+
+    Yields:
+        The Deadline now in effect (None if there is none at all)
+    """
+    parent = _current.get()
+    if budget_ms is None:
+        yield parent
+        return
+
+    current = Deadline(name, budget_ms, parent)
+    token = _current.set(current)
+    try:
+        yield current
+    finally:
+        _current.reset(token)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Return the innermost Deadline in effect, if any."""
+    return _current.get()
+
+
+def budget_ms(default_ms: float) -> float:
+    """
+    Return the timeout a browser call should use.
+
+    Args:
+        default_ms: Timeout to use when no deadline is in effect (and the
+            upper limit when one is)
+
+    Returns:
+        The smaller of default_ms and the time left
+
+    Raises:
+        StepTimeout: If the budget has already run out
+    """
+    current = _current.get()
+    if current is None:
+        return default_ms
+
+    remaining = current.remaining_ms()
+    if remaining <= 0:
+        raise current.timeout()
+    return max(MIN_TIMEOUT_MS, min(default_ms, remaining))
+
+
+def check_deadline():
+    """Raise StepTimeout if the current budget has run out."""
+    current = _current.get()
+    if current is not None and current.expired():
+        raise current.timeout()
@@ -0,0 +1,253 @@
+"""
+Persistent run history.
+
+Every (non dry-run) batch is recorded in a small SQLite store as it runs:
+one row per run, one per product result and one per form step timing. A
+crash mid-batch loses nothing already uploaded. `tpt_agent.py stats`
+reads it back to show whether uploads are getting faster: products/hour
+per run and per day, the slowest steps, the most common failure causes,
+and an ETA for the products still pending.
+"""
+
+import logging
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_PATH = "./logs/history.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    total INTEGER,
+    successful INTEGER,
+    failed INTEGER,
+    skipped INTEGER,
+    crashes INTEGER,
+    pauses INTEGER,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    filename TEXT NOT NULL,
+    success INTEGER NOT NULL,
+    duration_ms REAL,
+    retries INTEGER NOT NULL DEFAULT 0,
+    cause TEXT,
+    message TEXT,
+    listing_id TEXT,
+    finished_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_run ON results(run_id);
+CREATE INDEX IF NOT EXISTS idx_results_finished ON results(finished_at);
+CREATE TABLE IF NOT EXISTS step_timings (
+    result_id INTEGER NOT NULL REFERENCES results(id),
+    step TEXT NOT NULL,
+    elapsed_ms REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_step_timings_result ON step_timings(result_id);
+"""
+
+# File names, numbers and IDs make otherwise identical messages look different
+_VARIABLE_PARTS = re.compile(r"[\w.-]+\.(?:pdf|png|jpe?g|zip)\b|\d+(?:\.\d+)?", re.IGNORECASE)
+
+
+def failure_cause(result: dict) -> Optional[str]:
+    """
+    Reduce a failed result to a cause that can be counted across runs.
+
+    Returns:
+        E.g. 'timeout: tags', 'browser crash', 'HTTP 503 on save' or the
+        message with file names and numbers removed; None for successes
+    """
+    if result.get('success'):
+        return None
+    if result.get('timeout'):
+        return f"timeout: {result['timeout'].get('step')}"
+    if result.get('unconfirmed'):
+        return 'browser crash after save'
+    if result.get('crash') and not result['crash'].get('recovered'):
+        return 'browser crash'
+    if result.get('error_page'):
+        return f"error page (HTTP {result['error_page']})"
+    if result.get('save_status') and result['save_status'] >= 400:
+        return f"HTTP {result['save_status']} on save"
+
+    message = (result.get('message') or 'unknown').split(':')[0]
+    return ' '.join(_VARIABLE_PARTS.sub('#', message).split())
+
+
+class RunHistory:
+    """
+    Batch runs, product results and step timings, stored in SQLite.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_HISTORY_PATH):
+        """
+        Open (and create if needed) the history database.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
+
+    def start_run(self) -> int:
+        """Record the start of a batch and return its run ID."""
+        with self.conn:
+            cursor = self.conn.execute("INSERT INTO runs (started_at) VALUES (?)", (time.time(),))
+        return cursor.lastrowid
+
+    def add_result(self, run_id: int, result: dict):
+        """
+        Record one product's upload result and its step timings.
+
+        Args:
+            run_id: ID from start_run
+            result: Result dictionary from TPTUploader.upload_product (or
+                BrowserSupervisor.upload)
+        """
+        retries = 1 if (result.get('crash') or {}).get('retried') else 0
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO results (run_id, filename, success, duration_ms, retries, cause, message, "
+                "listing_id, finished_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, result.get('filename'), int(bool(result.get('success'))), result.get('duration_ms'),
+                 retries, failure_cause(result), result.get('message'), result.get('listing_id'), time.time())
+            )
+            self.conn.executemany(
+                "INSERT INTO step_timings (result_id, step, elapsed_ms) VALUES (?, ?, ?)",
+                [(cursor.lastrowid, step, elapsed) for step, elapsed in (result.get('step_ms') or {}).items()]
+            )
+
+    def finish_run(self, run_id: int, summary: dict):
+        """Record a batch's totals from its run_batch_upload summary."""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE runs SET finished_at = ?, total = ?, successful = ?, failed = ?, skipped = ?, "
+                "crashes = ?, pauses = ?, error = ? WHERE id = ?",
+                (time.time(), summary.get('total'), summary.get('successful'), summary.get('failed'),
+                 summary.get('skipped'), len(summary.get('crashes', [])),
+                 len(summary.get('circuit_breaker', [])), summary.get('error'), run_id)
+            )
+
+    def recent_runs(self, limit: int = 10) -> list[dict]:
+        """
+        Return the latest runs with their throughput.
+
+        Returns:
+            Runs, newest first, each with 'products_per_hour' (successful
+            uploads over the run's wall time; None while it is too short)
+        """
+        rows = self.conn.execute(
+            "SELECT runs.*, COUNT(results.id) AS processed, MAX(results.finished_at) AS last_result "
+            "FROM runs LEFT JOIN results ON results.run_id = runs.id "
+            "GROUP BY runs.id ORDER BY runs.id DESC LIMIT ?",
+            (limit,)
+        ).fetchall()
+
+        runs = []
+        for row in rows:
+            run = dict(row)
+            successful = self.conn.execute(
+                "SELECT COUNT(*) FROM results WHERE run_id = ? AND success = 1", (run['id'],)
+            ).fetchone()[0]
+            end = run['finished_at'] or run['last_result']
+            hours = (end - run['started_at']) / 3600 if end else 0
+            run['successful'] = successful
+            run['products_per_hour'] = successful / hours if hours > 0 and successful else None
+            runs.append(run)
+        return runs
+
+    def daily_throughput(self, days: int = 30) -> list[dict]:
+        """
+        Return products/hour per day, from the time spent on each product.
+
+        Returns:
+            {'day', 'uploaded', 'failed', 'products_per_hour'} dictionaries, oldest first
+        """
+        rows = self.conn.execute(
+            "SELECT date(finished_at, 'unixepoch', 'localtime') AS day, SUM(success) AS uploaded, "
+            "SUM(1 - success) AS failed, SUM(duration_ms) AS busy_ms "
+            "FROM results WHERE finished_at >= ? GROUP BY day ORDER BY day",
+            (time.time() - days * 86400,)
+        ).fetchall()
+        return [{
+            'day': row['day'],
+            'uploaded': row['uploaded'],
+            'failed': row['failed'],
+            'products_per_hour': row['uploaded'] * 3_600_000 / row['busy_ms'] if row['busy_ms'] else None,
+        } for row in rows]
+
+    def slowest_steps(self, days: int = 30, limit: int = 5) -> list[dict]:
+        """
+        Return the form steps that take longest on average.
+
+        Returns:
+            {'step', 'samples', 'avg_ms', 'max_ms'} dictionaries, slowest first
+        """
+        rows = self.conn.execute(
+            "SELECT step, COUNT(*) AS samples, AVG(elapsed_ms) AS avg_ms, MAX(elapsed_ms) AS max_ms "
+            "FROM step_timings JOIN results ON results.id = step_timings.result_id "
+            "WHERE results.finished_at >= ? GROUP BY step ORDER BY avg_ms DESC LIMIT ?",
+            (time.time() - days * 86400, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def failure_causes(self, days: int = 30, limit: int = 5) -> list[dict]:
+        """
+        Return the most common failure causes.
+
+        Returns:
+            {'cause', 'count', 'last_message'} dictionaries, most common first
+        """
+        rows = self.conn.execute(
+            "SELECT cause, COUNT(*) AS count, "
+            "(SELECT message FROM results AS latest WHERE latest.cause = results.cause "
+            " ORDER BY latest.id DESC LIMIT 1) AS last_message "
+            "FROM results WHERE success = 0 AND finished_at >= ? "
+            "GROUP BY cause ORDER BY count DESC LIMIT ?",
+            (time.time() - days * 86400, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def seconds_per_product(self, runs: int = 5) -> Optional[float]:
+        """
+        Return the wall time per processed product over the latest finished runs.
+
+        Wall time includes delays between uploads, retries and pauses, so
+        it is what an ETA should be based on.
+
+        Returns:
+            Seconds, or None if no finished run processed anything
+        """
+        row = self.conn.execute(
+            "SELECT SUM(finished_at - started_at) AS seconds, SUM(total - skipped) AS processed FROM "
+            "(SELECT * FROM runs WHERE finished_at IS NOT NULL AND total - skipped > 0 "
+            " ORDER BY id DESC LIMIT ?)",
+            (runs,)
+        ).fetchone()
+        if not row or not row['processed']:
+            return None
+        return row['seconds'] / row['processed']
+
+
+def open_run_history(settings: dict) -> RunHistory:
+    """Open the run history store configured in settings."""
+    return RunHistory(settings.get('paths', {}).get('history_db', DEFAULT_HISTORY_PATH))
@@ -0,0 +1,262 @@
+"""
+Persistent upload job queue backed by SQLite.
+
+Used by the upload daemon (src/daemon.py): clients submit jobs, workers
+claim them one at a time, and results are stored alongside the job. Jobs
+that were running when the daemon stopped are returned to the queue the
+next time it starts.
+
+Job statuses: queued -> running -> done | failed
+
+The coordinator (src/coordinator.py) hands jobs to remote workers with a
+lease instead: a leased job that is not completed or renewed by a
+heartbeat before its lease expires goes back to the queue for another
+worker.
+"""
+
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_PATH = "./logs/jobs.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    filename TEXT NOT NULL,
+    product TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, id);
+CREATE INDEX IF NOT EXISTS idx_jobs_filename ON jobs(filename);
+"""
+
+# Columns added after the first release, created on open if missing
+MIGRATIONS = {
+    'lease_expires': "ALTER TABLE jobs ADD COLUMN lease_expires REAL",
+    'priority': "ALTER TABLE jobs ADD COLUMN priority REAL NOT NULL DEFAULT 0",
+    'cost': "ALTER TABLE jobs ADD COLUMN cost REAL NOT NULL DEFAULT 0",
+}
+
+# Claim order: highest priority, then longest expected upload, then oldest
+CLAIM_ORDER = "priority DESC, cost DESC, id"
+CLAIM_INDEX = "CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(status, priority DESC, cost DESC, id)"
+
+
+class JobQueue:
+    """
+    Priority queue of upload jobs that survives restarts.
+
+    Jobs are claimed by priority, then expected cost (longest first, see
+    src/scheduler.py), then submission order.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_QUEUE_PATH):
+        """
+        Open (and create if needed) the queue database.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # The coordinator serves requests from several threads (under its own lock)
+        self.conn = sqlite3.connect(str(self.db_path), isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+        columns = {row['name'] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+        for column, statement in MIGRATIONS.items():
+            if column not in columns:
+                self.conn.execute(statement)
+        self.conn.execute(CLAIM_INDEX)
+
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> dict:
+        job = dict(row)
+        job['product'] = json.loads(job['product'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def submit(self, product: dict, priority: float = 0, cost: float = 0) -> int:
+        """
+        Add a product to the queue.
+
+        Args:
+            product: Product dictionary to upload
+            priority: Higher is claimed first
+            cost: Expected upload seconds; among equal priorities the
+                longest job is claimed first
+
+        Returns:
+            The new job's ID
+        """
+        now = time.time()
+        cursor = self.conn.execute(
+            "INSERT INTO jobs (filename, product, priority, cost, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (product.get('filename', ''), json.dumps(product, ensure_ascii=False), priority, cost, now, now)
+        )
+        return cursor.lastrowid
+
+    def claim(self, worker: str) -> Optional[dict]:
+        """
+        Take the next queued job (see CLAIM_ORDER) and mark it running.
+
+        Args:
+            worker: Name of the claiming worker
+
+        Returns:
+            The claimed job, or None if the queue is empty
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute(
+                f"SELECT * FROM jobs WHERE status = 'queued' ORDER BY {CLAIM_ORDER} LIMIT 1"
+            ).fetchone()
+            if not row:
+                self.conn.execute("COMMIT")
+                return None
+
+            self.conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, updated_at = ? "
+                "WHERE id = ?",
+                (worker, time.time(), row['id'])
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        return self.get(row['id'])
+
+    def lease(self, worker: str, lease_seconds: float) -> Optional[dict]:
+        """
+        Claim the next queued job for a limited time.
+
+        Expired leases are returned to the queue first, so a job whose
+        worker died is picked up by the next worker that asks.
+
+        Args:
+            worker: Name of the claiming worker
+            lease_seconds: How long the worker holds the job without a heartbeat
+
+        Returns:
+            The leased job, or None if the queue is empty
+        """
+        self.expire_leases()
+        job = self.claim(worker)
+        if job:
+            self.conn.execute("UPDATE jobs SET lease_expires = ? WHERE id = ?",
+                              (time.time() + lease_seconds, job['id']))
+            job['lease_expires'] = time.time() + lease_seconds
+        return job
+
+    def heartbeat(self, job_id: int, worker: str, lease_seconds: float) -> bool:
+        """
+        Extend a worker's lease on a running job.
+
+        Returns:
+            False if the worker no longer holds the job (its lease expired
+            and the job was handed to someone else)
+        """
+        cursor = self.conn.execute(
+            "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+            (time.time() + lease_seconds, time.time(), job_id, worker)
+        )
+        return cursor.rowcount == 1
+
+    def expire_leases(self) -> int:
+        """
+        Return running jobs whose lease ran out to the queue.
+
+        Returns:
+            Number of jobs requeued
+        """
+        cursor = self.conn.execute(
+            "UPDATE jobs SET status = 'queued', worker = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE status = 'running' AND lease_expires IS NOT NULL AND lease_expires < ?",
+            (time.time(), time.time())
+        )
+        if cursor.rowcount:
+            logger.warning(f"Requeued {cursor.rowcount} jobs whose lease expired")
+        return cursor.rowcount
+
+    def complete(self, job_id: int, result: dict, worker: Optional[str] = None) -> bool:
+        """
+        Store a job's result and mark it done or failed.
+
+        Args:
+            job_id: Job to update
+            result: Result dictionary from TPTUploader.upload_product
+            worker: If given, only complete the job if this worker still
+                holds it (a late result after an expired lease is refused)
+
+        Returns:
+            True if the job was updated
+        """
+        status = 'done' if result.get('success') else 'failed'
+        query = "UPDATE jobs SET status = ?, result = ?, lease_expires = NULL, updated_at = ? WHERE id = ?"
+        params = [status, json.dumps(result, ensure_ascii=False, default=str), time.time(), job_id]
+        if worker is not None:
+            query += " AND worker = ? AND status = 'running'"
+            params.append(worker)
+        return self.conn.execute(query, params).rowcount == 1
+
+    def requeue_running(self) -> int:
+        """
+        Return jobs left 'running' by a previous process to the queue.
+
+        Returns:
+            Number of jobs requeued
+        """
+        cursor = self.conn.execute(
+            "UPDATE jobs SET status = 'queued', worker = NULL, updated_at = ? WHERE status = 'running'",
+            (time.time(),)
+        )
+        if cursor.rowcount:
+            logger.info(f"Requeued {cursor.rowcount} interrupted jobs")
+        return cursor.rowcount
+
+    def get(self, job_id: int) -> Optional[dict]:
+        """Look up a job by ID."""
+        row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row else None
+
+    def list(self, status: str = None, limit: int = 50) -> list[dict]:
+        """
+        List the most recent jobs.
+
+        Args:
+            status: Only jobs with this status
+            limit: Maximum number of jobs to return
+        """
+        if status:
+            rows = self.conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY id DESC LIMIT ?", (status, limit)
+            )
+        else:
+            rows = self.conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,))
+        return [self._to_job(row) for row in rows]
+
+    def counts(self) -> dict:
+        """Return the number of jobs in each status."""
+        return {
+            row['status']: row['n']
+            for row in self.conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")
+        }
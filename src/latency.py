@@ -0,0 +1,187 @@
+"""
+Adaptive timeouts learned from observed latency.
+
+Fixed timeouts are too long when TPT is fast (a failing wait burns the
+full 30 s) and too short when it is slow. AdaptiveTimeouts records how
+long each wait actually took, keyed by action and page (for example
+"form_ready@/Product/Create"), in a small SQLite store. It sets the timeout
+from the rolling p99 of recent successful waits plus a safety margin.
+
+- Cold start: until a key has `min_samples` observations, the configured
+  default is used.
+- Slow periods: p99 follows the slowdown (up to `max_factor` times the
+  default), and right after a wait times out the default is used again,
+  so one fast history does not turn a slow day into false failures.
+"""
+
+import logging
+import math
+import sqlite3
+import time
+from collections import deque
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LATENCY_PATH = "./logs/latency.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS latency (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    elapsed_ms REAL NOT NULL,
+    ok INTEGER NOT NULL,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_latency_key ON latency(key, id);
+"""
+
+# Samples written per flush; a crash loses at most this many observations
+FLUSH_EVERY = 50
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+class AdaptiveTimeouts:
+    """
+    Per-key latency history and the timeouts derived from it.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_LATENCY_PATH, window: int = 200, min_samples: int = 20,
+                 margin: float = 1.5, min_ms: float = 500, max_factor: float = 3.0):
+        """
+        Open (and create if needed) the latency store.
+
+        Args:
+            db_path: Path to the SQLite database file
+            window: Recent successful samples per key the p99 is taken over
+            min_samples: Samples needed before a key's timeout adapts
+            margin: Multiplier applied to the p99
+            min_ms: Lowest timeout ever returned
+            max_factor: Highest timeout returned, as a multiple of the default
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.window = window
+        self.min_samples = min_samples
+        self.margin = margin
+        self.min_ms = min_ms
+        self.max_factor = max_factor
+
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.executescript(SCHEMA)
+
+        self._samples: dict[str, deque] = {}
+        self._p99: dict[str, Optional[float]] = {}
+        self._timed_out: set[str] = set()
+        self._pending: list[tuple] = []
+
+    def _history(self, key: str) -> deque:
+        """Return a key's recent successful samples, loading them on first use."""
+        samples = self._samples.get(key)
+        if samples is None:
+            rows = self.conn.execute(
+                "SELECT elapsed_ms FROM latency WHERE key = ? AND ok = 1 ORDER BY id DESC LIMIT ?",
+                (key, self.window)
+            ).fetchall()
+            samples = deque((row[0] for row in reversed(rows)), maxlen=self.window)
+            self._samples[key] = samples
+        return samples
+
+    def timeout(self, key: str, default_ms: float) -> float:
+        """
+        Return the timeout to use for a wait.
+
+        Args:
+            key: Action and page, e.g. "visible@/Product/Create"
+            default_ms: Configured timeout, used until enough samples exist
+
+        Returns:
+            Timeout in milliseconds
+        """
+        samples = self._history(key)
+        if len(samples) < self.min_samples:
+            return default_ms
+
+        if key not in self._p99:
+            self._p99[key] = percentile(list(samples), 0.99)
+        adaptive = min(max(self.min_ms, self._p99[key] * self.margin), default_ms * self.max_factor)
+
+        # The last wait timed out: don't trust the history until one succeeds
+        if key in self._timed_out:
+            return max(adaptive, default_ms)
+        return adaptive
+
+    def record(self, key: str, elapsed_ms: float, ok: bool = True):
+        """
+        Record how long a wait took.
+
+        Args:
+            key: Same key passed to timeout()
+            elapsed_ms: Observed duration
+            ok: False if the wait failed or timed out (kept for reporting,
+                but not used for the p99)
+        """
+        if ok:
+            self._history(key).append(elapsed_ms)
+            self._p99.pop(key, None)
+            self._timed_out.discard(key)
+        else:
+            self._timed_out.add(key)
+
+        self._pending.append((key, elapsed_ms, int(ok), time.time()))
+        if len(self._pending) >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        """Write pending samples and trim each key's history to the window."""
+        if not self._pending:
+            return
+        keys = {sample[0] for sample in self._pending}
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO latency (key, elapsed_ms, ok, recorded_at) VALUES (?, ?, ?, ?)",
+                self._pending
+            )
+            for key in keys:
+                # Keep a few windows' worth so failures stay visible in reports
+                self.conn.execute(
+                    "DELETE FROM latency WHERE key = ? AND id <= "
+                    "(SELECT id FROM latency WHERE key = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (key, key, self.window * 3)
+                )
+        self._pending = []
+
+    def close(self):
+        """Flush pending samples and close the database."""
+        try:
+            self.flush()
+        finally:
+            self.conn.close()
+
+
+def open_adaptive_timeouts(settings: dict) -> Optional[AdaptiveTimeouts]:
+    """
+    Open the latency store configured in settings.
+
+    Returns:
+        An AdaptiveTimeouts, or None if timeouts.adaptive is false
+    """
+    timeout_settings = settings.get('timeouts', {}) or {}
+    if not timeout_settings.get('adaptive', True):
+        return None
+
+    return AdaptiveTimeouts(
+        timeout_settings.get('db_path', DEFAULT_LATENCY_PATH),
+        window=timeout_settings.get('window', 200),
+        min_samples=timeout_settings.get('min_samples', 20),
+        margin=timeout_settings.get('margin', 1.5),
+        min_ms=timeout_settings.get('min_ms', 500),
+        max_factor=timeout_settings.get('max_factor', 3.0),
+    )
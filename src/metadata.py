@@ -4,13 +4,45 @@ Loads and parses product information from CSV/spreadsheet files.
 """
 
 import csv
+import hashlib
 import logging
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 logger = logging.getLogger(__name__)
 
 
+# Columns every products CSV must provide
+REQUIRED_COLUMNS = {'filename', 'title', 'price', 'grades'}
+
+
+class MissingColumnsError(ValueError):
+    """Raised when a products CSV lacks one of the required columns."""
+
+
+def read_csv_rows(path: Path) -> Iterator[dict]:
+    """
+    Yield cleaned product rows from an open-able CSV path.
+
+    Parsing errors are raised to the caller so each public loader can decide
+    how to report them.
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+
+        # Validate required columns
+        if reader.fieldnames:
+            missing = REQUIRED_COLUMNS - set(reader.fieldnames)
+            if missing:
+                raise MissingColumnsError(f"CSV missing required columns: {missing}")
+
+        for row_num, row in enumerate(reader, start=2):  # Start at 2 (header is row 1)
+            # Clean up whitespace in all fields
+            cleaned_row = {k: v.strip() if isinstance(v, str) else v for k, v in row.items()}
+            cleaned_row['_row_number'] = row_num  # Track for error reporting
+            yield cleaned_row
+
+
 def load_products_csv(csv_path: str) -> list[dict]:
     """
     Load products from a CSV file.
@@ -27,29 +59,15 @@ def load_products_csv(csv_path: str) -> list[dict]:
         logger.error(f"CSV file not found: {csv_path}")
         return []
 
-    products = []
-
     try:
-        with open(path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-
-            # Validate required columns
-            required_columns = {'filename', 'title', 'price', 'grades'}
-            if reader.fieldnames:
-                missing = required_columns - set(reader.fieldnames)
-                if missing:
-                    logger.error(f"CSV missing required columns: {missing}")
-                    return []
-
-            for row_num, row in enumerate(reader, start=2):  # Start at 2 (header is row 1)
-                # Clean up whitespace in all fields
-                cleaned_row = {k: v.strip() if isinstance(v, str) else v for k, v in row.items()}
-                cleaned_row['_row_number'] = row_num  # Track for error reporting
-                products.append(cleaned_row)
+        products = list(read_csv_rows(path))
 
         logger.info(f"Loaded {len(products)} products from {csv_path}")
         return products
 
+    except MissingColumnsError as e:
+        logger.error(str(e))
+        return []
     except csv.Error as e:
         logger.error(f"CSV parsing error in {csv_path}: {e}")
         return []
@@ -62,19 +80,86 @@ def load_products_csv(csv_path: str) -> list[dict]:
         return []
 
 
-def validate_product(product: dict) -> list[str]:
+def iter_products_csv(csv_path: str) -> Iterator[dict]:
+    """
+    Stream products from a CSV file as they are parsed.
+
+    Unlike load_products_csv, rows are yielded one at a time so memory stays
+    bounded by the largest row and callers can start working on the first
+    product while the rest of the file is still being read. A parse error
+    part-way through is logged and ends the stream; rows already yielded
+    are not retracted.
+
+    Args:
+        csv_path: Path to the products CSV file
+
+    Yields:
+        Product dictionaries in file order
+    """
+    path = Path(csv_path)
+
+    if not path.exists():
+        logger.error(f"CSV file not found: {csv_path}")
+        return
+
+    count = 0
+
+    try:
+        for product in read_csv_rows(path):
+            count += 1
+            yield product
+
+        logger.info(f"Streamed {count} products from {csv_path}")
+
+    except MissingColumnsError as e:
+        logger.error(str(e))
+    except csv.Error as e:
+        logger.error(f"CSV parsing error in {csv_path} after {count} rows: {e}")
+    except UnicodeDecodeError as e:
+        logger.error(f"Encoding error reading {csv_path} after {count} rows: {e}")
+        logger.info("Try saving the CSV as UTF-8 encoded")
+    except Exception as e:
+        logger.error(f"Error reading {csv_path}: {e}")
+
+
+def product_row_hash(product: dict) -> str:
+    """
+    Compute a stable content hash for a product row.
+
+    Bookkeeping keys (those starting with an underscore, such as
+    ``_row_number``) are ignored, so moving a row within the CSV does not
+    change its hash.
+
+    Args:
+        product: Product dictionary from CSV
+
+    Returns:
+        Hex digest identifying the row's content
+    """
+    content = '\x1e'.join(
+        f"{key}\x1f{product[key]}"
+        for key in sorted(k for k in product if k and k[0] != '_')
+    )
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+def validate_product(product: dict, cache=None) -> list[str]:
     """
     Validate a single product's data.
 
     Args:
         product: Product dictionary from CSV
+        cache: Optional ValidationCache; unchanged rows reuse their stored result
 
     Returns:
         List of error messages (empty if valid)
     """
     from src.validators import validate_product_complete
 
-    result = validate_product_complete(product)
+    if cache is not None:
+        result = cache.validate(product)
+    else:
+        result = validate_product_complete(product)
 
     # Log warnings (but don't treat as errors)
     for warning in result.get('warnings', []):
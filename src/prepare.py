@@ -0,0 +1,177 @@
+"""
+Local asset preparation for uploads.
+
+Everything an upload needs that does not involve the browser - hashing the
+product file, checking that a PDF is intact, shrinking oversized cover and
+thumbnail images, and cleaning up the description - is done here.
+run_batch_upload runs prepare_product in a process pool a few products
+ahead of the browser, so this CPU and disk work overlaps with uploads
+instead of delaying them. Dry runs only check the files (validate_only):
+nothing is written under the prepared folder.
+
+prepare_product must stay a top-level, picklable function: it runs in
+worker processes.
+"""
+
+import hashlib
+import html
+import logging
+import os
+import re
+from typing import Optional
+
+from src.metadata import parse_tags
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREPARED_FOLDER = "./logs/prepared"
+
+# Longest side allowed for cover and thumbnail images before they are
+# scaled down (TPT recommends covers of at most a few thousand pixels)
+DEFAULT_MAX_IMAGE_SIZE = 2000
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# A PDF ends with %%EOF, possibly followed by a little whitespace/padding
+PDF_TAIL_BYTES = 1024
+
+
+def file_sha256(path: str) -> str:
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def check_pdf(path: str) -> tuple[list[str], list[str]]:
+    """
+    Cheap structural checks on a PDF without parsing it.
+
+    Returns:
+        (errors, warnings): errors if the file is not a complete PDF,
+        warnings for things worth a look that do not stop the upload
+        (an encrypted PDF is often just permission-restricted, which is
+        common for TPT products and opens fine)
+    """
+    errors, warnings = [], []
+    size = os.path.getsize(path)
+
+    with open(path, 'rb') as f:
+        if f.read(5) != b'%PDF-':
+            errors.append("not a PDF (missing %PDF- header)")
+            return errors, warnings
+
+        f.seek(max(0, size - PDF_TAIL_BYTES))
+        tail = f.read()
+
+    if b'%%EOF' not in tail:
+        errors.append("PDF looks truncated (no %%EOF marker)")
+    if b'/Encrypt' in tail:
+        warnings.append("PDF is encrypted - check that buyers can open it without a password")
+
+    return errors, warnings
+
+
+def convert_description(description: str) -> str:
+    """
+    Normalise a CSV description for TPT's description editor.
+
+    HTML entities are decoded, line endings normalised, trailing spaces
+    stripped and runs of blank lines collapsed to one.
+    """
+    text = html.unescape(description or '')
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    text = '\n'.join(line.rstrip() for line in text.split('\n'))
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    return text.strip()
+
+
+def resize_image(path: str, output_folder: str, max_size: int) -> Optional[str]:
+    """
+    Scale an image down so its longest side is at most max_size.
+
+    Requires Pillow; without it images are uploaded as they are.
+
+    Returns:
+        Path of the resized copy, or None if the image was small enough
+        (or could not be resized)
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+
+    try:
+        with Image.open(path) as image:
+            if max(image.size) <= max_size:
+                return None
+
+            image.thumbnail((max_size, max_size))
+            os.makedirs(output_folder, exist_ok=True)
+            output = os.path.join(output_folder, os.path.basename(path))
+            image.save(output)
+            return output
+    except OSError as e:
+        logger.warning(f"Could not resize {path}: {e}")
+        return None
+
+
+def prepare_product(product: dict, products_folder: str, prepared_folder: str = DEFAULT_PREPARED_FOLDER,
+                    max_image_size: int = DEFAULT_MAX_IMAGE_SIZE, validate_only: bool = False) -> dict:
+    """
+    Do the local work for one product ahead of its upload.
+
+    Args:
+        product: Product dictionary
+        products_folder: Folder containing product files
+        prepared_folder: Where resized images are written
+        max_image_size: Longest side allowed for cover/thumbnail images
+        validate_only: Only check the files (dry runs): no resized copies
+            are written and the description is left as it is
+
+    Returns:
+        Dictionary with 'errors', 'warnings', 'file_sha256', 'description'
+        and, for images that were resized, 'cover_image' / 'thumbnails'
+        pointing at the resized copies
+    """
+    prepared = {'errors': [], 'warnings': [], 'file_sha256': None}
+    file_path = os.path.join(products_folder, product.get('filename', ''))
+
+    try:
+        prepared['file_sha256'] = file_sha256(file_path)
+        if file_path.lower().endswith('.pdf'):
+            errors, warnings = check_pdf(file_path)
+            prepared['errors'].extend(f"{product['filename']}: {p}" for p in errors)
+            prepared['warnings'].extend(f"{product['filename']}: {p}" for p in warnings)
+    except OSError as e:
+        prepared['errors'].append(f"Could not read {file_path}: {e}")
+
+    if product.get('description') and not validate_only:
+        prepared['description'] = convert_description(product['description'])
+
+    # Resized copies go in a folder per product file so names never clash
+    output_folder = os.path.join(prepared_folder, os.path.splitext(product.get('filename', ''))[0])
+
+    if product.get('cover_image'):
+        cover_path = os.path.join(products_folder, product['cover_image'])
+        if not os.path.isfile(cover_path):
+            prepared['warnings'].append(f"Cover image not found: {cover_path}")
+        elif not validate_only:
+            resized = resize_image(cover_path, output_folder, max_image_size)
+            if resized:
+                prepared['cover_image'] = os.path.abspath(resized)
+
+    if product.get('thumbnails') and not validate_only:
+        thumbnails = []
+        changed = False
+        for thumb in parse_tags(product['thumbnails']):
+            thumb_path = os.path.join(products_folder, thumb)
+            resized = resize_image(thumb_path, output_folder, max_image_size) if os.path.isfile(thumb_path) else None
+            thumbnails.append(os.path.abspath(resized) if resized else thumb)
+            changed = changed or bool(resized)
+        if changed:
+            prepared['thumbnails'] = ';'.join(thumbnails)
+
+    return prepared
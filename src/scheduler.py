@@ -0,0 +1,241 @@
+"""
+Upload ordering by priority and expected cost.
+
+Uploading strictly in CSV order lets a few large files end up last, with
+one worker still busy on them after the others have gone idle. The
+scheduler orders work instead:
+
+1. User priority: the `scheduler.priority_column` value of the product
+   row (a number, higher first; empty means 0).
+2. New titles first (`scheduler.new_first`): products with no listing in
+   the upload state get a half-step boost, which ranks them ahead of
+   uploaded ones at the same priority but never above a higher priority.
+3. Longest job first: the expected cost of each product, from its file
+   sizes over the upload bandwidth plus the average time of the other
+   form steps in the run history (30 days). Starting the long uploads
+   first lets the short ones fill the gaps at the end, which keeps the
+   batch makespan close to the ideal across concurrent workers (daemon
+   pages, coordinator workers).
+
+The bandwidth starts at `scheduler.bandwidth_mbps`. The daemon and the
+coordinator keep one Scheduler for their lifetime and feed its meter with
+every finished upload (the daemon through BandwidthThrottle, which shares
+the meter), so later submits are ranked by the observed rate; each
+submit re-reads the run history and upload state (refresh). A one-off
+batch upload is ordered before anything has been observed, so for it the
+cost is in effect file size plus a constant.
+
+BandwidthThrottle keeps concurrent workers from oversubscribing the
+uplink: it limits the bytes being uploaded at once to what the observed
+rate moves in `scheduler.transfer_window` seconds.
+"""
+
+import logging
+import time
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Form steps whose duration scales with the size of the files they send
+TRANSFER_STEPS = ('file_upload', 'cover_image', 'thumbnails', 'preview')
+
+# Used until an upload has been observed
+DEFAULT_BANDWIDTH_MBPS = 10
+# Time of the non-transfer form steps until the run history has some
+DEFAULT_FIXED_SECONDS = 30
+DEFAULT_TRANSFER_WINDOW = 30
+
+NEW_TITLE_BOOST = 0.5
+
+
+def product_bytes(product: dict, products_folder: str) -> int:
+    """Total size of the files an upload sends (missing files count as 0)."""
+    from src.metadata import parse_tags
+
+    names = [product.get('filename'), product.get('cover_image'), product.get('preview_file'),
+             *parse_tags(product.get('thumbnails') or '')]
+    total = 0
+    for name in names:
+        if not name:
+            continue
+        try:
+            total += (Path(products_folder) / name).stat().st_size
+        except OSError:
+            continue
+    return total
+
+
+def user_priority(product: dict, column: str) -> float:
+    """The product's priority column as a number (0 if empty or not a number)."""
+    try:
+        return float(product.get(column) or 0)
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring non-numeric {column} '{product.get(column)}' for {product.get('filename')}")
+        return 0
+
+
+class BandwidthMeter:
+    """
+    Exponentially weighted average of the observed upload rate.
+    """
+
+    def __init__(self, initial_bps: float, weight: float = 0.3):
+        self.bps = initial_bps
+        self.weight = weight
+        self.samples = 0
+
+    def observe(self, nbytes: int, seconds: float):
+        """Record an upload of nbytes that took seconds."""
+        if nbytes <= 0 or seconds <= 0:
+            return
+        rate = nbytes / seconds
+        self.bps = rate if not self.samples else self.weight * rate + (1 - self.weight) * self.bps
+        self.samples += 1
+
+    def observe_result(self, nbytes: int, result: dict):
+        """Record an upload from its result's transfer step timings."""
+        transfer_ms = sum((result.get('step_ms') or {}).get(step, 0) for step in TRANSFER_STEPS)
+        if result.get('success'):
+            self.observe(nbytes, transfer_ms / 1000)
+
+
+class Scheduler:
+    """
+    Ranks products by priority, then by expected upload time (longest first).
+    """
+
+    def __init__(self, settings: dict, meter: Optional[BandwidthMeter] = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            settings: Configuration dictionary (the 'scheduler' section;
+                the run history and upload state are read when available)
+            meter: Bandwidth meter to estimate transfer times with (shared
+                with a BandwidthThrottle); a new one at
+                `scheduler.bandwidth_mbps` if not given
+        """
+        scheduler_settings = settings.get('scheduler', {}) or {}
+        self.settings = settings
+        self.enabled = scheduler_settings.get('enabled', True)
+        self.priority_column = scheduler_settings.get('priority_column', 'priority')
+        self.new_first = scheduler_settings.get('new_first', True)
+        self.products_folder = settings.get('paths', {}).get('products_folder', './products')
+        self.meter = meter or BandwidthMeter(scheduler_settings.get('bandwidth_mbps', DEFAULT_BANDWIDTH_MBPS) * 125_000)
+
+        self.fixed_seconds = DEFAULT_FIXED_SECONDS
+        self.uploaded: set[str] = set()
+        self.refresh()
+
+    def refresh(self):
+        """Re-read average step times and already-uploaded products, if recorded."""
+        from src.history import open_run_history
+        from src.state import open_upload_state
+
+        try:
+            history = open_run_history(self.settings)
+            try:
+                steps = history.slowest_steps(days=30, limit=100)
+            finally:
+                history.close()
+            fixed = [step['avg_ms'] for step in steps if step['step'] not in TRANSFER_STEPS]
+            if fixed:
+                self.fixed_seconds = sum(fixed) / 1000
+                logger.debug(f"Non-transfer steps average {self.fixed_seconds:.0f}s per product")
+        except Exception as e:
+            logger.debug(f"No step timings for cost estimates: {e}")
+
+        if self.new_first:
+            try:
+                state = open_upload_state(self.settings)
+                try:
+                    self.uploaded = {name for name, record in state.all().items() if record.get('listing_id')}
+                finally:
+                    state.close()
+            except Exception as e:
+                logger.debug(f"No upload state for new-title priority: {e}")
+
+    def priority(self, product: dict) -> float:
+        """User priority, plus NEW_TITLE_BOOST for never-uploaded products."""
+        priority = user_priority(product, self.priority_column)
+        if self.new_first and product.get('filename') not in self.uploaded:
+            priority += NEW_TITLE_BOOST
+        return priority
+
+    def cost(self, product: dict) -> float:
+        """Expected upload time in seconds."""
+        return self.fixed_seconds + product_bytes(product, self.products_folder) / self.meter.bps
+
+    def rank(self, product: dict) -> tuple[float, float]:
+        """(priority, cost) to queue a job with; (0, 0) if the scheduler is disabled."""
+        if not self.enabled:
+            return 0, 0
+        return self.priority(product), round(self.cost(product), 1)
+
+    def order(self, products: list[dict]) -> list[dict]:
+        """
+        Return products in upload order (unchanged if the scheduler is disabled).
+
+        Ties keep their CSV order.
+        """
+        if not self.enabled or len(products) < 2:
+            return list(products)
+        keys = [(-self.priority(p), -self.cost(p)) for p in products]
+        ranked = [products[i] for i in sorted(range(len(products)), key=keys.__getitem__)]
+        total = -sum(cost for _, cost in keys)
+        logger.info(f"Scheduled {len(ranked)} products, longest first "
+                    f"(estimated {total / 60:.0f} min of upload time)")
+        return ranked
+
+
+class BandwidthThrottle:
+    """
+    Limits the bytes being uploaded at once by concurrent workers.
+
+        async with throttle.reserve(nbytes):
+            result = await uploader.upload_product(product)
+        throttle.meter.observe_result(nbytes, result)
+
+    The limit is what the observed rate moves in `transfer_window` seconds.
+    When the uplink saturates each upload slows down, the observed rate
+    drops and fewer uploads start together. One upload always runs, however
+    large.
+    """
+
+    def __init__(self, settings: dict, meter: Optional[BandwidthMeter] = None):
+        import asyncio
+
+        scheduler_settings = settings.get('scheduler', {}) or {}
+        self.window = scheduler_settings.get('transfer_window', DEFAULT_TRANSFER_WINDOW)
+        self.meter = meter or BandwidthMeter(scheduler_settings.get('bandwidth_mbps', DEFAULT_BANDWIDTH_MBPS) * 125_000)
+        self.in_flight = 0
+        self.changed = asyncio.Condition()
+
+    def limit(self) -> float:
+        """Bytes allowed in flight at once (0 disables the throttle)."""
+        return self.meter.bps * self.window if self.window else 0
+
+    def reserve(self, nbytes: int):
+        """Async context manager holding nbytes of the in-flight budget."""
+        from contextlib import asynccontextmanager
+
+        @asynccontextmanager
+        async def reservation():
+            async with self.changed:
+                waited = time.perf_counter()
+                await self.changed.wait_for(
+                    lambda: not self.limit() or not self.in_flight or self.in_flight + nbytes <= self.limit()
+                )
+                waited = time.perf_counter() - waited
+                if waited > 1:
+                    logger.info(f"Waited {waited:.1f}s for upload bandwidth")
+                self.in_flight += nbytes
+            try:
+                yield
+            finally:
+                async with self.changed:
+                    self.in_flight -= nbytes
+                    self.changed.notify_all()
+
+        return reservation()
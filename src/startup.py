@@ -0,0 +1,116 @@
+"""
+Startup-time diagnostics for the CLI.
+
+Backs `tpt_agent.py --import-time <command>`: the command is re-run in a
+child interpreter with Python's `-X importtime` tracing, and the slowest
+imports are summarised once it finishes.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+# Modules that only browser commands should ever import
+HEAVY_MODULES = ('playwright', 'asyncio', 'src.browser', 'src.uploader', 'pandas', 'pydantic', 'rich')
+
+AGENT_SCRIPT = Path(__file__).resolve().parent.parent / 'tpt_agent.py'
+
+
+def parse_import_times(stderr: str) -> tuple[list[dict], list[str]]:
+    """
+    Split `-X importtime` output from the rest of a process's stderr.
+
+    Args:
+        stderr: Captured stderr of a process run with `-X importtime`
+
+    Returns:
+        Tuple of (import records, other stderr lines). Each record has
+        'module', 'self_us', 'cumulative_us' and 'depth' keys.
+    """
+    records = []
+    other = []
+
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            other.append(line)
+            continue
+
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+            records.append({
+                'module': name.strip(),
+                'self_us': int(self_us),
+                'cumulative_us': int(cumulative_us),
+                'depth': (len(name) - len(name.lstrip())) // 2,
+            })
+        except ValueError:
+            continue  # Header line ("self [us] | cumulative | imported package")
+
+    return records, other
+
+
+def format_import_report(records: list[dict], limit: int = 15) -> str:
+    """
+    Render a short report of the slowest imports.
+
+    Args:
+        records: Output of parse_import_times
+        limit: Number of modules to list
+
+    Returns:
+        Multi-line report text
+    """
+    top_level = [r for r in records if r['depth'] == 0]
+    total_ms = sum(r['cumulative_us'] for r in top_level) / 1000
+    slowest = sorted(top_level, key=lambda r: r['cumulative_us'], reverse=True)[:limit]
+    heavy = sorted({
+        r['module'] for r in records
+        if any(r['module'] == h or r['module'].startswith(h + '.') for h in HEAVY_MODULES)
+    })
+
+    lines = [
+        "",
+        "=== Import Time Report ===",
+        f"Modules imported: {len(records)}",
+        f"Total import time: {total_ms:.1f} ms",
+        "",
+        "Slowest top-level imports:",
+    ]
+    for record in slowest:
+        lines.append(f"  {record['cumulative_us'] / 1000:8.1f} ms  {record['module']}")
+
+    if heavy:
+        lines.append("")
+        lines.append("Heavy modules loaded by this command:")
+        for module in heavy:
+            lines.append(f"  - {module}")
+
+    lines.append("=" * 26)
+    return "\n".join(lines)
+
+
+def run_with_import_time(args: list[str]) -> int:
+    """
+    Run tpt_agent.py with the given arguments under `-X importtime`.
+
+    The command's own output is passed through unchanged, followed by the
+    import report.
+
+    Args:
+        args: Command-line arguments for tpt_agent.py (without --import-time)
+
+    Returns:
+        The command's exit code
+    """
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', str(AGENT_SCRIPT), *args],
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+
+    records, other = parse_import_times(completed.stderr)
+    if other:
+        print("\n".join(other), file=sys.stderr)
+    print(format_import_report(records))
+
+    return completed.returncode
@@ -0,0 +1,94 @@
+"""
+Persistent upload state.
+
+Records what happened to each product on the store - its listing ID and
+URL as reported by TPT when the product was saved - so later runs (sync,
+retries, reports) do not have to look it up again.
+"""
+
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_PATH = "./logs/upload_state.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    filename TEXT PRIMARY KEY,
+    listing_id TEXT,
+    url TEXT,
+    status TEXT,
+    http_status INTEGER,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_listings_listing_id ON listings(listing_id);
+"""
+
+# Columns record() may set
+STATE_FIELDS = ('listing_id', 'url', 'status', 'http_status')
+
+
+class UploadState:
+    """
+    Per-product upload outcomes keyed by filename, stored in SQLite.
+
+    Safe to share between several pages/workers in one process and between
+    processes on one machine (SQLite handles the locking).
+    """
+
+    def __init__(self, db_path: str = DEFAULT_STATE_PATH):
+        """
+        Open (and create if needed) the state database.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.conn = sqlite3.connect(str(self.db_path), isolation_level=None,
+                                    check_same_thread=False, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
+
+    def get(self, filename: str) -> Optional[dict]:
+        """Return the recorded state of a product, or None."""
+        row = self.conn.execute("SELECT * FROM listings WHERE filename = ?", (filename,)).fetchone()
+        return dict(row) if row else None
+
+    def all(self) -> dict[str, dict]:
+        """Return the recorded state of every product, keyed by filename."""
+        return {row['filename']: dict(row) for row in self.conn.execute("SELECT * FROM listings")}
+
+    def record(self, filename: str, **fields):
+        """
+        Update a product's state. Fields not given keep their current value.
+
+        Args:
+            filename: Product filename
+            **fields: Any of STATE_FIELDS
+        """
+        fields = {k: v for k, v in fields.items() if k in STATE_FIELDS}
+        columns = ['filename', 'updated_at', *fields]
+        values = [filename, time.time(), *fields.values()]
+        updates = ', '.join(f"{column} = excluded.{column}" for column in columns[1:])
+
+        self.conn.execute(
+            f"INSERT INTO listings ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT(filename) DO UPDATE SET {updates}",
+            values
+        )
+
+
+def open_upload_state(settings: dict) -> UploadState:
+    """Open the upload state store configured in settings."""
+    return UploadState(settings.get('paths', {}).get('state_db', DEFAULT_STATE_PATH))
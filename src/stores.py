@@ -0,0 +1,198 @@
+"""
+Multi-store runner.
+
+Uploads to several TPT seller accounts at the same time. Each store in the
+`stores:` settings section has its own credentials, products CSV/folder,
+login session file and upload state, and its own pacing between uploads
+(`delay_between_uploads`, the per-account rate limit). All stores share
+one Chromium process, each in an isolated browser context
+(TPTBrowser.open_session), and their batches run concurrently, so a run
+over N stores takes about as long as the slowest store instead of the sum
+of all of them.
+
+    stores:
+      - name: "main"
+        email: "main@example.com"
+        products_csv: "./products/products.csv"
+      - name: "science"
+        email: "science@example.com"   # password from TPT_PASSWORD_SCIENCE
+        products_csv: "./stores/science/products.csv"
+        delay_between_uploads: 10
+"""
+
+import copy
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORES_FOLDER = "./logs/stores"
+
+
+def store_key(name: str) -> str:
+    """Turn a store name into a safe folder / environment variable suffix."""
+    return re.sub(r'[^A-Za-z0-9]+', '_', name).strip('_').upper() or 'STORE'
+
+
+def load_stores(settings: dict) -> list[dict]:
+    """
+    Read the configured stores.
+
+    Without a `stores:` section the single account in `tpt:` and `paths:`
+    is returned as a store named 'default'.
+
+    Returns:
+        Store dictionaries with at least 'name', 'email', 'password',
+        'products_csv' and 'products_folder'
+    """
+    paths = settings.get('paths', {}) or {}
+    configured = settings.get('stores') or []
+
+    if not configured:
+        return [{
+            'name': 'default',
+            'email': settings.get('tpt', {}).get('email'),
+            'password': settings.get('tpt', {}).get('password'),
+            'products_csv': paths.get('products_csv', './products/products.csv'),
+            'products_folder': paths.get('products_folder', './products'),
+            # The single account keeps using the usual files
+            'state_db': paths.get('state_db', './logs/upload_state.db'),
+            'session_file': settings.get('browser', {}).get('session_file', './logs/session.json'),
+        }]
+
+    stores = []
+    for entry in configured:
+        store = dict(entry)
+        key = store_key(store.get('name', ''))
+        store.setdefault('name', key.lower())
+        # Credentials can stay out of the settings file: TPT_EMAIL_<NAME>, TPT_PASSWORD_<NAME>
+        store['email'] = os.getenv(f"TPT_EMAIL_{key}") or store.get('email')
+        store['password'] = os.getenv(f"TPT_PASSWORD_{key}") or store.get('password')
+        store.setdefault('products_csv', paths.get('products_csv', './products/products.csv'))
+        store.setdefault('products_folder', str(Path(store['products_csv']).parent))
+        stores.append(store)
+    return stores
+
+
+def store_settings(settings: dict, store: dict) -> dict:
+    """
+    Build the settings one store's batch runs with.
+
+    Account, products and everything tied to the account (session file,
+    upload state) are the store's own; shared caches such as latency and
+    validation stay shared.
+
+    Args:
+        settings: Full configuration dictionary
+        store: One entry of load_stores()
+
+    Returns:
+        A copy of settings for this store
+    """
+    result = copy.deepcopy(settings)
+    stores_folder = settings.get('paths', {}).get('stores_folder', DEFAULT_STORES_FOLDER)
+    folder = Path(stores_folder) / store_key(store['name']).lower()
+
+    result.setdefault('tpt', {}).update(email=store.get('email'), password=store.get('password'))
+    result.setdefault('paths', {}).update(
+        products_csv=store['products_csv'],
+        products_folder=store['products_folder'],
+        state_db=store.get('state_db', str(folder / 'upload_state.db')),
+    )
+    result.setdefault('browser', {})['session_file'] = store.get('session_file', str(folder / 'session.json'))
+    if store.get('delay_between_uploads') is not None:
+        result.setdefault('upload', {})['delay_between_uploads'] = store['delay_between_uploads']
+    return result
+
+
+def _failed_summary(name: str, error: str) -> dict:
+    """Summary for a store whose batch could not run at all."""
+    return {'store': name, 'total': 0, 'successful': 0, 'failed': 0, 'skipped': 0, 'results': [], 'error': error}
+
+
+async def run_store(browser, settings: dict, store: dict, dry_run: bool = False) -> dict:
+    """
+    Log one store in (in its own browser context) and upload its catalog.
+
+    Args:
+        browser: The shared, started TPTBrowser (None for a dry run)
+        settings: Full configuration dictionary
+        store: One entry of load_stores()
+        dry_run: Validate only
+
+    Returns:
+        run_batch_upload's summary, with 'store' set to the store's name
+    """
+    from src.metadata import iter_products_csv
+    from src.structured_logging import log_context
+    from src.uploader import run_batch_upload
+
+    settings = store_settings(settings, store)
+    csv_path = store['products_csv']
+    session = None
+
+    with log_context(worker=store['name']):
+        try:
+            if not Path(csv_path).exists():
+                return _failed_summary(store['name'], f"products CSV not found: {csv_path}")
+
+            if not dry_run:
+                if not store.get('email') or not store.get('password'):
+                    return _failed_summary(store['name'], 'TPT credentials not configured')
+                session = await browser.open_session(settings)
+                if not await session.login(store['email'], store['password']):
+                    return _failed_summary(store['name'], 'Failed to login to TPT')
+
+            logger.info(f"Store '{store['name']}': uploading {csv_path}")
+            summary = await run_batch_upload(iter_products_csv(csv_path), settings, dry_run=dry_run,
+                                             browser=session)
+        except Exception as e:
+            logger.error(f"Store '{store['name']}' failed: {e}")
+            summary = _failed_summary(store['name'], str(e))
+        finally:
+            if session:
+                await session.close()
+
+    summary['store'] = store['name']
+    return summary
+
+
+async def run_stores(settings: dict, names: Optional[list[str]] = None, dry_run: bool = False) -> list[dict]:
+    """
+    Upload every store's catalog concurrently in one Chromium.
+
+    Args:
+        settings: Configuration dictionary
+        names: Only run these stores (default: all)
+        dry_run: Validate only (no browser is started)
+
+    Returns:
+        One run_batch_upload summary per store, each with 'store'
+    """
+    import asyncio
+    from src.browser import TPTBrowser
+
+    stores = load_stores(settings)
+    if names:
+        unknown = set(names) - {store['name'] for store in stores}
+        if unknown:
+            logger.error(f"Unknown stores: {', '.join(sorted(unknown))}")
+        stores = [store for store in stores if store['name'] in names]
+    if not stores:
+        return []
+
+    browser = None
+    try:
+        if not dry_run:
+            browser = TPTBrowser(settings)
+            if not await browser.start():
+                return [_failed_summary(store['name'], 'Failed to start browser') for store in stores]
+
+        logger.info(f"Running {len(stores)} stores at once: {', '.join(store['name'] for store in stores)}")
+        return list(await asyncio.gather(*(run_store(browser, settings, store, dry_run) for store in stores)))
+    finally:
+        if browser:
+            await browser.close()
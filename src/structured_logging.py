@@ -0,0 +1,228 @@
+"""
+Structured, non-blocking logging.
+
+Log calls only put the record on an in-memory queue (QueueHandler). A
+background QueueListener thread does the formatting and disk writes, so a
+`logger.info` in the upload loop never waits for the disk, however many
+workers are logging.
+
+The log file is JSON lines. Every record carries the product, worker and
+step that were current where it was logged (see log_context), so one
+product's run can be pulled out of a concurrent log with a filter like
+`jq 'select(.product == "x.pdf")'`. Files are rotated when they reach
+`max_bytes` or get older than `max_age_hours`. Rotated files are
+gzip-compressed, and files older than `retention_days` are deleted.
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional
+
+# Fields log_context may set, in the order they appear in each JSON line
+CONTEXT_FIELDS = ('worker', 'product', 'step')
+
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_MAX_AGE_HOURS = 24
+DEFAULT_RETENTION_DAYS = 14
+
+_context: ContextVar[dict] = ContextVar('log_context', default={})
+
+
+@contextmanager
+def log_context(**fields) -> Iterator[None]:
+    """
+    Tag every record logged inside the block (and in tasks it starts).
+
+        with log_context(product='book.pdf'):
+            with log_context(step='title'):
+                logger.info("...")  # carries product and step
+
+    Args:
+        **fields: Any of CONTEXT_FIELDS
+    """
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copies the current log_context onto each record as it is logged."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Runs in the logging task, before the record crosses to the listener thread
+        record.context = _context.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        context = getattr(record, 'context', {})
+        for field in CONTEXT_FIELDS:
+            if context.get(field) is not None:
+                entry[field] = context[field]
+        # Tracebacks are already part of the message (QueueHandler.prepare)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ContextTextFormatter(logging.Formatter):
+    """Text format for the console; %(tags)s is the log context in brackets."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        context = getattr(record, 'context', {})
+        tags = [str(context[field]) for field in CONTEXT_FIELDS if context.get(field) is not None]
+        record.tags = f"[{' '.join(tags)}] " if tags else ''
+        return super().format(record)
+
+
+class CompressingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Rotates by size or age, gzips rotated files and deletes old ones.
+
+    Rotated files are named after the active file with a timestamp, e.g.
+    tpt_agent_20260101_120000.20260102_120000.jsonl.gz.
+    """
+
+    def __init__(self, filename: str, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_age_hours: float = DEFAULT_MAX_AGE_HOURS,
+                 retention_days: float = DEFAULT_RETENTION_DAYS):
+        super().__init__(filename, maxBytes=max_bytes, encoding='utf-8', delay=True)
+        self.max_age = max_age_hours * 3600
+        self.retention = retention_days * 86400
+        self.opened_at = time.time()
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.max_age and time.time() - self.opened_at >= self.max_age:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self):
+        import gzip
+        import shutil
+
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        source = Path(self.baseFilename)
+        if source.exists() and source.stat().st_size > 0:
+            stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            target = source.with_name(f"{source.stem}.{stamp}{source.suffix}.gz")
+            with open(source, 'rb') as f_in, gzip.open(target, 'wb') as f_out:
+                shutil.copyfileobj(f_in, f_out)
+            source.unlink()
+
+        self.opened_at = time.time()
+        delete_old_logs(source.parent, self.retention)
+        self.stream = self._open()
+
+
+def delete_old_logs(logs_dir: Path, retention_seconds: float):
+    """Delete tpt_agent log files (plain or compressed) last written before the retention period."""
+    if not retention_seconds:
+        return
+    cutoff = time.time() - retention_seconds
+    for path in logs_dir.glob('tpt_agent_*'):
+        try:
+            if path.is_file() and path.stat().st_mtime < cutoff:
+                path.unlink()
+        except OSError:
+            continue
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def start_logging(level: int, log_file: Path, log_settings: dict) -> logging.handlers.QueueListener:
+    """
+    Route the root logger through a queue to a file and console writer thread.
+
+    Args:
+        level: Logging level for the root logger
+        log_file: Active JSON-lines file
+        log_settings: The 'logging' section of the settings (max_bytes,
+            max_age_hours, retention_days)
+
+    Returns:
+        The running QueueListener (stopped at exit, or by stop_logging)
+    """
+    import atexit
+
+    global _listener
+    stop_logging()
+
+    retention_days = log_settings.get('retention_days', DEFAULT_RETENTION_DAYS)
+    delete_old_logs(log_file.parent, retention_days * 86400)
+
+    file_handler = CompressingRotatingFileHandler(
+        str(log_file),
+        max_bytes=log_settings.get('max_bytes', DEFAULT_MAX_BYTES),
+        max_age_hours=log_settings.get('max_age_hours', DEFAULT_MAX_AGE_HOURS),
+        retention_days=retention_days,
+    )
+    file_handler.setFormatter(JsonFormatter())
+
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(ContextTextFormatter(
+        "%(asctime)s - %(name)s - %(levelname)s - %(tags)s%(message)s"
+    ))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread (safe to call twice)."""
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+def log_settings_from_file(config_path: str) -> dict:
+    """
+    Read just the 'logging' section of the settings file.
+
+    Logging is configured before a command loads its settings, so problems
+    here are ignored (defaults are used) rather than logged.
+    """
+    if not os.path.exists(config_path):
+        return {}
+    try:
+        import yaml
+        with open(config_path, 'r') as f:
+            return (yaml.safe_load(f) or {}).get('logging', {}) or {}
+    except Exception:
+        return {}
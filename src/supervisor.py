@@ -0,0 +1,110 @@
+"""
+Crash recovery for uploads.
+
+A Chromium crash or a closed page used to end a batch: the exception
+escaped to run_batch_upload and every remaining product was skipped.
+BrowserSupervisor wraps each upload. When the browser or page turns out
+to be dead afterwards, it relaunches it (restoring the saved login
+session, see TPTBrowser.relaunch), records the step the product died on
+and uploads that product again before the batch carries on.
+
+A product whose save step already ran is not re-uploaded - it may exist
+on TPT - and is reported as failed (with 'unconfirmed': True) and the
+crash details instead.
+"""
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_RESTARTS = 3
+
+
+class BrowserSupervisor:
+    """
+    Runs uploads and recovers the browser when it crashes mid-product.
+    """
+
+    def __init__(self, browser, settings: dict):
+        """
+        Initialize the supervisor.
+
+        Args:
+            browser: The TPTBrowser doing the uploads
+            settings: Configuration dictionary (browser.max_restarts)
+        """
+        self.browser = browser
+        self.max_restarts = (settings.get('browser', {}) or {}).get('max_restarts', DEFAULT_MAX_RESTARTS)
+        self.crashes = []
+
+    async def upload(self, uploader, product: dict, **kwargs) -> dict:
+        """
+        Upload a product, relaunching the browser and retrying once if it dies.
+
+        Args:
+            uploader: TPTUploader driving self.browser
+            product: Product dictionary
+            **kwargs: Passed on to TPTUploader.upload_product
+
+        Returns:
+            The upload result; a retried product's result has a 'crash'
+            entry, and one whose browser died after the save step is failed
+            with 'unconfirmed': True
+        """
+        result = await self._attempt(uploader, product, **kwargs)
+        if self.browser.is_alive():
+            return result
+
+        steps = result.get('steps_completed', [])
+        crash = {
+            'filename': result.get('filename'),
+            'step': steps[-1] if steps else None,
+            'error': result.get('message'),
+            'recovered': False,
+            'retried': False,
+        }
+        self.crashes.append(crash)
+        logger.error(f"Browser died during {crash['filename']} after step '{crash['step']}'")
+
+        if len(self.crashes) > self.max_restarts:
+            logger.error(f"Giving up after {self.max_restarts} browser restarts")
+            result['crash'] = crash
+            return result
+
+        start = time.perf_counter()
+        crash['recovered'] = await self.browser.relaunch()
+        crash['recovery_ms'] = round((time.perf_counter() - start) * 1000)
+        if not crash['recovered']:
+            logger.error("Could not recover the browser")
+            result['crash'] = crash
+            return result
+        logger.info(f"Browser recovered in {crash['recovery_ms']} ms")
+
+        if 'save' in steps:
+            result['crash'] = crash
+            result['success'] = False
+            result['unconfirmed'] = True
+            result['message'] = "Browser crashed after saving - check the listing on TPT"
+            return result
+
+        # The half-filled form died with the page, so the product starts over
+        logger.info(f"Retrying {crash['filename']}...")
+        crash['retried'] = True
+        result = await self._attempt(uploader, product, **kwargs)
+        result['crash'] = crash
+        return result
+
+    async def _attempt(self, uploader, product: dict, **kwargs) -> dict:
+        """Run one upload, turning an exception into a failed result."""
+        try:
+            return await uploader.upload_product(product, **kwargs)
+        except Exception as e:
+            logger.error(f"Upload of {product.get('filename')} raised: {e}")
+            result = dict(uploader.current_result or {'filename': product.get('filename'), 'steps_completed': []})
+            result.update(success=False, message=str(e))
+            return result
+
+    def summary(self) -> list[dict]:
+        """Return the crashes seen so far, for the batch summary."""
+        return self.crashes
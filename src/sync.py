@@ -0,0 +1,423 @@
+"""
+Catalog-to-store sync.
+
+Reruns of a batch used to create duplicate listings because nothing
+checked what was already on the store. The sync engine:
+
+1. Scrapes the seller's My-Products listing once, fetching its pages
+   concurrently over the browser's authenticated request context (no page
+   rendering), and saves a local index of existing listings by title and ID.
+2. Diffs the catalog against that index and produces a plan with one
+   action per product: create, update or skip.
+3. Executes only the plan - new products are uploaded, changed listings
+   are edited in place (src/bulk_edit.py), and the rest are left alone.
+
+NOTE: Listing markup is based on research of TPT's My-Products page and
+may need adjusting if TPT changes it (see LISTING_HREF_PATTERN).
+"""
+
+import html
+import json
+import logging
+import re
+import time
+from datetime import datetime
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Iterable, Optional
+from urllib.parse import urlparse
+
+from src.browser import TPT_BASE_URL, TPT_DASHBOARD_URL
+from src.uploader import MAX_TITLE_LENGTH
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = "./logs/remote_listings.json"
+
+# Product links on My-Products, e.g. /Product/The-Octopus-That-Escaped-12345678
+LISTING_HREF_PATTERN = re.compile(r'/Product/(?P<slug>[^/?#"]+?)-(?P<id>\d+)(?:[/?#]|$)')
+
+# Pagination links, e.g. /My-Products?page=7
+PAGE_LINK_PATTERN = re.compile(r'[?&]page=(\d+)')
+
+# Hard limit on My-Products pages indexed, in case paging never runs dry
+MAX_INDEX_PAGES = 1000
+
+PRICE_PATTERN = re.compile(r'\$\s*(\d+(?:\.\d{2})?)')
+
+
+class ListingFetchError(RuntimeError):
+    """Raised when a My-Products page cannot be read (HTTP error, or redirected away e.g. to Login)."""
+
+
+class _ListingParser(HTMLParser):
+    """Collects product links (and the text inside them) from a listing page."""
+
+    def __init__(self):
+        super().__init__()
+        self.listings = []
+        self.max_page = 1
+        self._current = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag != 'a':
+            return
+        href = dict(attrs).get('href') or ''
+
+        page_match = PAGE_LINK_PATTERN.search(href)
+        if page_match:
+            self.max_page = max(self.max_page, int(page_match.group(1)))
+
+        match = LISTING_HREF_PATTERN.search(href)
+        if match:
+            self._current = {'listing_id': match.group('id'), 'href': href, 'text': []}
+
+    def handle_data(self, data):
+        if self._current is not None:
+            self._current['text'].append(data)
+            return
+
+        # The first price shown after a listing's link belongs to that listing
+        if self.listings and 'price' not in self.listings[-1]:
+            price_match = PRICE_PATTERN.search(data)
+            if price_match:
+                self.listings[-1]['price'] = price_match.group(1)
+
+    def handle_endtag(self, tag):
+        if tag == 'a' and self._current is not None:
+            title = ' '.join(''.join(self._current['text']).split())
+            if title:
+                self.listings.append({
+                    'listing_id': self._current['listing_id'],
+                    'title': html.unescape(title),
+                    'url': self._current['href'] if self._current['href'].startswith('http')
+                    else f"{TPT_BASE_URL}{self._current['href']}",
+                })
+            self._current = None
+
+
+def parse_listing_page(page_html: str) -> tuple[list[dict], int]:
+    """
+    Extract listings from one My-Products page.
+
+    Args:
+        page_html: HTML of the page
+
+    Returns:
+        Tuple of (listings, highest page number linked from this page)
+    """
+    parser = _ListingParser()
+    parser.feed(page_html)
+    return parser.listings, parser.max_page
+
+
+def normalize_title(title: str) -> str:
+    """
+    Reduce a title to a comparable key.
+
+    Titles are truncated to TPT's limit first (the uploader does the same),
+    then lower-cased with punctuation and repeated whitespace removed.
+    """
+    title = (title or '')[:MAX_TITLE_LENGTH].lower()
+    title = re.sub(r'[^\w\s]', ' ', title)
+    return ' '.join(title.split())
+
+
+async def fetch_listing_page(browser, page_number: int) -> tuple[list[dict], int]:
+    """
+    Fetch and parse one My-Products page over the browser's request context.
+
+    Args:
+        browser: A started, logged-in TPTBrowser
+        page_number: Page to fetch (1-based)
+
+    Returns:
+        Tuple of (listings, highest page number linked from the page)
+
+    Raises:
+        ListingFetchError: The page returned an error, or the request ended
+            somewhere other than My-Products (an expired session is
+            redirected to the login page, which would look like an empty store)
+    """
+    url = TPT_DASHBOARD_URL if page_number == 1 else f"{TPT_DASHBOARD_URL}?page={page_number}"
+    response = await browser.context.request.get(url, timeout=browser.timeout)
+    if not response.ok:
+        raise ListingFetchError(f"Listing page {page_number} returned HTTP {response.status}")
+    if urlparse(response.url).path.rstrip('/').lower() != urlparse(TPT_DASHBOARD_URL).path.lower():
+        raise ListingFetchError(f"Listing page {page_number} redirected to {response.url} (session expired?)")
+    return parse_listing_page(await response.text())
+
+
+async def fetch_listing_index(browser, concurrency: int = 4) -> list[dict]:
+    """
+    Scrape every page of My-Products into a list of listings.
+
+    Page 1 is fetched first to learn the page count; the remaining pages
+    are fetched concurrently through the browser context's request API,
+    which shares the logged-in cookies but renders nothing. Pagination may
+    only link a window of pages, so fetching continues past the highest
+    known page until a page adds no listing not seen before (empty, or an
+    out-of-range page number answered with the last page again), up to
+    MAX_INDEX_PAGES.
+
+    Args:
+        browser: A started, logged-in TPTBrowser
+        concurrency: Maximum simultaneous page requests
+
+    Returns:
+        List of listings with 'listing_id', 'title' and 'url'
+
+    Raises:
+        ListingFetchError: Any page could not be read, or the store ran past
+            MAX_INDEX_PAGES. A partial index is never returned, since every
+            listing missing from it would be planned as a new upload.
+    """
+    import asyncio
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch(page_number: int) -> tuple[list[dict], int]:
+        async with semaphore:
+            return await fetch_listing_page(browser, page_number)
+
+    start = time.perf_counter()
+    page_listings, max_page = await fetch(1)
+    # The same listing can be linked more than once per page (image + title)
+    unique = {}
+    for listing in page_listings:
+        unique.setdefault(listing['listing_id'], listing)
+    fetched = 1
+    last_added = bool(unique)
+
+    while last_added:
+        if fetched >= MAX_INDEX_PAGES:
+            raise ListingFetchError(f"My-Products still had new listings after {MAX_INDEX_PAGES} pages")
+
+        # Everything linked so far, or the next page to see whether the window ends here
+        numbers = list(range(fetched + 1, min(max(max_page, fetched + 1), MAX_INDEX_PAGES) + 1))
+        pages = await asyncio.gather(*(fetch(n) for n in numbers))
+        for page_listings, page_max in pages:
+            before = len(unique)
+            for listing in page_listings:
+                unique.setdefault(listing['listing_id'], listing)
+            last_added = len(unique) > before
+            max_page = max(max_page, page_max)
+        fetched = numbers[-1]
+
+    logger.info(
+        f"Indexed {len(unique)} existing listings from {fetched} pages "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+    return list(unique.values())
+
+
+async def find_listings_by_title(browser, title: str, pages: int = 2) -> Optional[list[dict]]:
+    """
+    Look up listings (drafts included) with a given title.
+
+    Only the first pages of My-Products are fetched - the newest listings
+    are shown first, so this is enough to find one created moments ago
+    without indexing the whole store.
+
+    Args:
+        browser: A started, logged-in TPTBrowser
+        title: Product title to look for (compared with normalize_title)
+        pages: My-Products pages to search
+
+    Returns:
+        Matching listings (possibly none), or None if the store could not be read
+    """
+    wanted = normalize_title(title)
+    matches = {}
+
+    try:
+        for page_number in range(1, max(1, pages) + 1):
+            listings, max_page = await fetch_listing_page(browser, page_number)
+            for listing in listings:
+                if normalize_title(listing['title']) == wanted:
+                    matches.setdefault(listing['listing_id'], listing)
+            if page_number >= max_page:
+                break
+    except Exception as e:
+        logger.error(f"Could not look up listings titled '{title}': {e}")
+        return None
+
+    return list(matches.values())
+
+
+def save_listing_index(listings: list[dict], index_path: str = DEFAULT_INDEX_PATH):
+    """Write the listing index to disk."""
+    path = Path(index_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'fetched_at': datetime.now().isoformat(), 'listings': listings}, f, indent=2)
+
+
+def load_listing_index(index_path: str = DEFAULT_INDEX_PATH) -> Optional[list[dict]]:
+    """
+    Read a previously saved listing index.
+
+    Returns:
+        The listings, or None if no index has been saved
+    """
+    path = Path(index_path)
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('listings', [])
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not read listing index {index_path}: {e}")
+        return None
+
+
+def build_sync_plan(products: Iterable[dict], listings: list[dict]) -> list[dict]:
+    """
+    Decide what to do with each catalog product.
+
+    A product matches a listing by its 'listing_id' (from the CSV, or
+    recorded in the upload state when it was created) if it has one,
+    otherwise by normalized title. Matched products are updated if their
+    title (when matched by ID) or price differs from the listing, and
+    skipped otherwise; unmatched products are created.
+
+    Args:
+        products: Catalog products
+        listings: Output of fetch_listing_index / load_listing_index
+
+    Returns:
+        List of {'action', 'product', 'listing', 'reason'} dictionaries
+    """
+    by_id = {str(listing['listing_id']): listing for listing in listings}
+    by_title = {}
+    for listing in listings:
+        by_title.setdefault(normalize_title(listing['title']), listing)
+
+    plan = []
+    for product in products:
+        listing = None
+        if product.get('listing_id'):
+            listing = by_id.get(str(product['listing_id']))
+        if listing is None:
+            listing = by_title.get(normalize_title(product.get('title', '')))
+
+        if listing is None:
+            plan.append({'action': 'create', 'product': product, 'listing': None,
+                         'reason': 'not on store'})
+            continue
+
+        changes = {}
+        if normalize_title(listing['title']) != normalize_title(product.get('title', '')):
+            changes['title'] = product.get('title', '')
+        if listing.get('price') and product.get('price'):
+            try:
+                if abs(float(listing['price']) - float(product['price'])) >= 0.005:
+                    changes['price'] = product['price']
+            except ValueError:
+                pass
+
+        if changes:
+            plan.append({'action': 'update', 'product': product, 'listing': listing,
+                         'changes': changes, 'reason': f"changed: {', '.join(changes)}"})
+        else:
+            plan.append({'action': 'skip', 'product': product, 'listing': listing,
+                         'reason': f"exists as {listing['listing_id']}"})
+
+    return plan
+
+
+async def run_sync(products: Iterable[dict], settings: dict, dry_run: bool = False,
+                   use_cached_index: bool = False) -> dict:
+    """
+    Index the store, diff the catalog against it, and execute the plan.
+
+    Args:
+        products: Catalog products
+        settings: Configuration dictionary
+        dry_run: Build and return the plan without uploading anything
+        use_cached_index: Use the saved index instead of scraping the store
+
+    Returns:
+        Summary dictionary with 'plan' counts and, unless dry_run, the
+        'batch' summary from run_batch_upload and 'edits' summary from
+        run_bulk_edit
+    """
+    from src.browser import TPTBrowser
+    from src.bulk_edit import run_bulk_edit
+    from src.state import open_upload_state
+    from src.uploader import run_batch_upload
+
+    sync_settings = settings.get('sync', {}) or {}
+    index_path = sync_settings.get('index_path', DEFAULT_INDEX_PATH)
+    summary = {'plan': {'create': 0, 'update': 0, 'skip': 0}, 'actions': []}
+
+    listings = load_listing_index(index_path) if use_cached_index else None
+    browser = None
+
+    try:
+        if listings is None or not dry_run:
+            browser = TPTBrowser(settings)
+            if not await browser.start():
+                summary['error'] = 'Failed to start browser'
+                return summary
+
+            email = settings.get('tpt', {}).get('email')
+            password = settings.get('tpt', {}).get('password')
+            if not email or not password or not await browser.login(email, password):
+                summary['error'] = 'Failed to login to TPT'
+                return summary
+
+        if listings is None:
+            try:
+                listings = await fetch_listing_index(browser, sync_settings.get('concurrency', 4))
+            except ListingFetchError as e:
+                # Planning against a partial index would re-create every missing listing
+                logger.error(f"Sync aborted, store index incomplete: {e}")
+                summary['error'] = f"Could not index the store: {e}"
+                return summary
+            save_listing_index(listings, index_path)
+
+        # Listings created by earlier uploads are known by ID from their save response
+        state = open_upload_state(settings)
+        known = state.all()
+        state.close()
+        products = [
+            {**product, 'listing_id': known[product.get('filename')]['listing_id']}
+            if not product.get('listing_id') and (known.get(product.get('filename')) or {}).get('listing_id')
+            else product
+            for product in products
+        ]
+
+        plan = build_sync_plan(products, listings)
+        for item in plan:
+            summary['plan'][item['action']] += 1
+            summary['actions'].append({
+                'action': item['action'],
+                'filename': item['product'].get('filename'),
+                'reason': item['reason'],
+            })
+
+        logger.info(
+            f"Sync plan: {summary['plan']['create']} to create, "
+            f"{summary['plan']['update']} to update, {summary['plan']['skip']} already on store"
+        )
+
+        if dry_run:
+            return summary
+
+        creates = [item['product'] for item in plan if item['action'] == 'create']
+        if creates:
+            summary['batch'] = await run_batch_upload(creates, settings, browser=browser)
+
+        updates = [
+            {'listing_id': item['listing']['listing_id'], 'changes': item['changes']}
+            for item in plan if item['action'] == 'update'
+        ]
+        if updates:
+            summary['edits'] = await run_bulk_edit(updates, settings, browser=browser)
+
+        return summary
+
+    finally:
+        if browser:
+            await browser.close()
@@ -24,13 +24,24 @@ TPT Upload Form Requirements (from research):
 - Make Listing Active: checkbox to publish
 """
 
+import asyncio
 import logging
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterable, Optional
 
 from src.browser import TPTBrowser
+from src.deadline import StepTimeout, budget_ms, check_deadline, deadline
 from src.validators import validate_product_complete
+from src.validation_cache import ValidationCache, open_validation_cache
 from src.metadata import parse_tags, parse_grades, format_price
+from src.state import UploadState, open_upload_state
+from src.structured_logging import log_context
+from src.breaker import CircuitBreaker, is_site_error
+from src.history import open_run_history
+from src.scheduler import Scheduler
+from src.supervisor import BrowserSupervisor
+from src.watchdog import MemoryWatchdog
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +51,83 @@ MAX_SUBJECT_AREAS = 3
 MAX_RESOURCE_TYPES = 3
 RECOMMENDED_GRADE_COUNT = 4
 
+# Form field selectors, tried in order (shared by the create and edit flows)
+TITLE_SELECTORS = [
+    'input[name="title"]',
+    'input[name*="title"]',
+    '#title',
+    'input[placeholder*="title" i]'
+]
+
+DESCRIPTION_SELECTORS = [
+    'textarea[name="description"]',
+    'textarea[name*="description"]',
+    '#description',
+    'textarea[placeholder*="description" i]',
+    '[contenteditable="true"]'  # Some sites use rich text editors
+]
+
+PRICE_SELECTORS = [
+    'input[name="price"]',
+    'input[name*="price"]',
+    '#price',
+    'input[type="number"][name*="price"]'
+]
+
+LISTING_ACTIVE_SELECTORS = [
+    'label:has-text("Make Listing Active") input[type="checkbox"]',
+    'input[name*="active"]',
+    'input[type="checkbox"][name*="publish"]'
+]
+
+# The list of tags already on a listing (edit form); each child is one tag
+# with a button that removes it
+TAG_LIST_SELECTORS = [
+    '[data-testid*="tag-list" i]',
+    'ul[aria-label*="tag" i]',
+    '[class*="tagList" i]',
+    '[class*="tags-list" i]'
+]
+TAG_ITEM_SELECTOR = ':scope > *'
+TAG_REMOVE_SELECTOR = 'button'
+
+# Time budgets for one product and for each form step, in milliseconds.
+# The file upload has no step budget: its wait already scales with file size.
+DEFAULT_PRODUCT_BUDGET_MS = 600_000
+DEFAULT_STEP_BUDGETS_MS = {
+    'navigation': 45_000,
+    'title': 10_000,
+    'description': 10_000,
+    'price': 10_000,
+    'grades': 20_000,
+    'subjects': 15_000,
+    'resource_type': 15_000,
+    'tags': 30_000,
+    'cover_image': 60_000,
+    'thumbnails': 60_000,
+    'preview': 60_000,
+    'copyright': 10_000,
+    'save': 45_000,
+}
+
+# Starting wait for a tag input to clear after Enter (learned afterwards)
+TAG_COMMIT_TIMEOUT_MS = 300
+
+# Extra time asyncio allows a step beyond its budget before cancelling it
+STEP_GRACE_SECONDS = 0.5
+
+# Product fields src.prepare.prepare_product may replace with prepared values
+PREPARED_FIELDS = ('description', 'cover_image', 'thumbnails')
+
+# Fields a bulk edit may change
+EDITABLE_FIELDS = ('title', 'description', 'price', 'tags', 'status')
+
+# Fields brought in line when an earlier, unconfirmed save is adopted
+ADOPTED_FIELDS = ('title', 'description', 'price')
+
+# My-Products pages searched for a listing an unconfirmed save may have created
+DEFAULT_LOOKUP_PAGES = 2
+
 
 class TPTUploader:
     """
@@ -73,18 +161,47 @@ class TPTUploader:
         self.settings = settings
         self.products_folder = settings.get('paths', {}).get('products_folder', './products')
         self.default_mode = settings.get('upload', {}).get('default_mode', 'draft')
-
-    async def upload_product(self, product: dict, dry_run: bool = False) -> dict:
+        self.state = None  # UploadState, opened on first use (_state)
+        self.current_result = None  # Result of the upload in progress (or last one)
+        # Load the next product's form in a second tab while this one is filled
+        self.prewarm_next_form = settings.get('upload', {}).get('prewarm_next_form', True)
+        self.lookup_pages = settings.get('upload', {}).get('lookup_pages', DEFAULT_LOOKUP_PAGES)
+        # Time budgets (src/deadline.py); a step without a budget is only
+        # limited by the product's
+        self.product_budget_ms = settings.get('upload', {}).get('product_budget_ms', DEFAULT_PRODUCT_BUDGET_MS)
+        self.step_budgets_ms = {**DEFAULT_STEP_BUDGETS_MS, **(settings.get('upload', {}).get('step_budgets_ms') or {})}
+
+    async def upload_product(self, product: dict, dry_run: bool = False,
+                             validation: Optional[dict] = None,
+                             prepared: Optional[dict] = None) -> dict:
         """
         Upload a single product to TPT.
 
         Args:
             product: Product data dictionary
             dry_run: If True, validate and preview only
+            validation: Result of validate_product_complete if the caller
+                already ran it (e.g. in a read-ahead pipeline)
+            prepared: Result of src.prepare.prepare_product if the caller
+                already ran it; resized images and the converted description
+                are used in place of the CSV values
 
         Returns:
-            Result dictionary with 'success', 'message', and optionally 'url'
+            Result dictionary with 'success', 'message', 'duration_ms',
+            'step_ms' (time per form step), and once the product is saved
+            'listing_id', 'url' and 'save_status' ('adopted' instead of
+            'save_status' when an earlier unconfirmed save had created it)
         """
+        # Everything logged for this product (steps included) is tagged with it
+        start = time.perf_counter()
+        with log_context(product=product.get('filename', 'unknown')):
+            result = await self._upload_product(product, dry_run, validation, prepared)
+        result['duration_ms'] = round((time.perf_counter() - start) * 1000)
+        return result
+
+    async def _upload_product(self, product: dict, dry_run: bool, validation: Optional[dict],
+                              prepared: Optional[dict]) -> dict:
+        """Body of upload_product, run inside the product's log context."""
         result = {
             'success': False,
             'message': '',
@@ -92,19 +209,30 @@ class TPTUploader:
             'warnings': [],
             'steps_completed': []
         }
+        # Kept so a crash supervisor can see how far the upload got
+        self.current_result = result
 
         # Step 1: Validate product data
         logger.info(f"=== Starting upload for: {product.get('filename')} ===")
         logger.info("Step 1: Validating product data...")
 
-        validation = validate_product_complete(product, self.products_folder)
+        if validation is None:
+            validation = validate_product_complete(product, self.products_folder)
 
         if not validation['valid']:
             result['message'] = f"Validation failed: {', '.join(validation['errors'])}"
             logger.error(result['message'])
             return result
 
-        result['warnings'] = validation.get('warnings', [])
+        if prepared:
+            if prepared['errors']:
+                result['message'] = f"Preparation failed: {', '.join(prepared['errors'])}"
+                logger.error(result['message'])
+                return result
+            result['file_sha256'] = prepared['file_sha256']
+            product = {**product, **{key: prepared[key] for key in PREPARED_FIELDS if key in prepared}}
+
+        result['warnings'] = validation.get('warnings', []) + (prepared or {}).get('warnings', [])
         for warning in result['warnings']:
             logger.warning(f"Warning: {warning}")
 
@@ -117,26 +245,49 @@ class TPTUploader:
             logger.info(result['message'])
             return result
 
+        try:
+            with deadline('product', self.product_budget_ms):
+                return await self._fill_and_save(product, result)
+        except StepTimeout as e:
+            result['message'] = str(e)
+            result['timeout'] = e.to_dict()
+            logger.error(result['message'])
+            return result
+
+    async def _fill_and_save(self, product: dict, result: dict) -> dict:
+        """Fill in the product form and save it (upload_product after validation)."""
+        # A retry must not create a second listing if the first save got through
+        adopted = await self._resume_unconfirmed_save(product, result)
+        if adopted is not None:
+            return adopted
+
         # Step 3: Navigate to upload page
         logger.info("Step 2: Navigating to product creation page...")
-        if not await self.browser.navigate_to_new_product():
+        if not await self._step('navigation', self.browser.navigate_to_new_product()):
             result['message'] = "Failed to navigate to product creation page"
+            if self.browser.error_page:
+                result['error_page'] = self.browser.error_page
+                result['message'] += f" (TPT error page, HTTP {self.browser.error_page})"
             logger.error(result['message'])
             return result
         result['steps_completed'].append('navigation')
 
+        if self.prewarm_next_form:
+            self.browser.prewarm_new_product()
+
         # Step 4: Upload main product file
         logger.info("Step 3: Uploading main product file...")
-        file_uploaded = await self._upload_product_file(product['filename'])
-        if not file_uploaded:
+        file_info = await self._step('file_upload', self._upload_product_file(product['filename']))
+        if not file_info:
             result['message'] = f"Failed to upload file: {product['filename']}"
             logger.error(result['message'])
             return result
+        result['uploaded_file'] = file_info
         result['steps_completed'].append('file_upload')
 
         # Step 5: Fill in title
         logger.info("Step 4: Setting product title...")
-        title_set = await self._set_title(product['title'])
+        title_set = await self._step('title', self._set_title(product['title']))
         if not title_set:
             result['message'] = "Failed to set product title"
             logger.error(result['message'])
@@ -146,14 +297,14 @@ class TPTUploader:
         # Step 6: Fill in description
         logger.info("Step 5: Setting product description...")
         if product.get('description'):
-            desc_set = await self._set_description(product['description'])
+            desc_set = await self._step('description', self._set_description(product['description']))
             if not desc_set:
                 logger.warning("Could not set description, continuing...")
         result['steps_completed'].append('description')
 
         # Step 7: Set price
         logger.info("Step 6: Setting price...")
-        price_set = await self._set_price(product['price'])
+        price_set = await self._step('price', self._set_price(product['price']))
         if not price_set:
             result['message'] = "Failed to set price"
             logger.error(result['message'])
@@ -162,7 +313,7 @@ class TPTUploader:
 
         # Step 8: Select grade levels
         logger.info("Step 7: Selecting grade levels...")
-        grades_set = await self._select_grades(product['grades'])
+        grades_set = await self._step('grades', self._select_grades(product['grades']))
         if not grades_set:
             logger.warning("Could not select grades, continuing...")
         result['steps_completed'].append('grades')
@@ -170,13 +321,13 @@ class TPTUploader:
         # Step 9: Select subject areas (if provided)
         if product.get('subjects'):
             logger.info("Step 8: Selecting subject areas...")
-            await self._select_subjects(product['subjects'])
+            await self._step('subjects', self._select_subjects(product['subjects']))
         result['steps_completed'].append('subjects')
 
         # Step 10: Select resource type (if provided)
         if product.get('resource_type'):
             logger.info("Step 9: Selecting resource type...")
-            await self._select_resource_type(product['resource_type'])
+            await self._step('resource_type', self._select_resource_type(product['resource_type']))
         result['steps_completed'].append('resource_type')
 
         # Step 11: Add tags
@@ -187,43 +338,55 @@ class TPTUploader:
                 all_tags.extend(parse_tags(product['reading_tags']))
             if product.get('themes'):
                 all_tags.extend(parse_tags(product['themes']))
-            await self._add_tags(all_tags)
+            await self._step('tags', self._add_tags(all_tags))
         result['steps_completed'].append('tags')
 
         # Step 12: Upload cover image (if provided)
         if product.get('cover_image'):
             logger.info("Step 11: Uploading cover image...")
-            await self._upload_cover_image(product['cover_image'])
+            await self._step('cover_image', self._upload_cover_image(product['cover_image']))
         result['steps_completed'].append('cover_image')
 
         # Step 13: Upload thumbnails (if provided)
         if product.get('thumbnails'):
             logger.info("Step 12: Uploading thumbnails...")
-            await self._upload_thumbnails(product['thumbnails'])
+            await self._step('thumbnails', self._upload_thumbnails(product['thumbnails']))
         result['steps_completed'].append('thumbnails')
 
         # Step 14: Upload preview file (if provided)
         if product.get('preview_file'):
             logger.info("Step 13: Uploading preview file...")
-            await self._upload_preview(product['preview_file'])
+            await self._step('preview', self._upload_preview(product['preview_file']))
         result['steps_completed'].append('preview')
 
         # Step 15: Copyright attestation
         logger.info("Step 14: Checking copyright attestation...")
-        await self._check_copyright_attestation()
+        await self._step('copyright', self._check_copyright_attestation())
         result['steps_completed'].append('copyright')
 
         # Step 16: Save as draft (default) or publish
         logger.info(f"Step 15: Saving product as {self.default_mode}...")
-        saved = await self._save_product(as_draft=(self.default_mode == 'draft'))
-        if not saved:
-            result['message'] = "Failed to save product"
+        self._record_submit(result['filename'])
+        save_info = await self._step('save', self._save_product(as_draft=(self.default_mode == 'draft')))
+        if not save_info:
+            # No save response seen: the listing may or may not exist, so the
+            # state stays 'submitting' and the next attempt looks it up first
+            result['message'] = "Save not confirmed (no save response from TPT)"
             logger.error(result['message'])
             return result
-        result['steps_completed'].append('save')
 
-        # Step 17: Verify and take final screenshot
-        await self.browser.take_screenshot(f"upload_complete_{Path(product['filename']).stem}")
+        # Step 17: Verify from the save response
+        result['save_status'] = save_info['status']
+        result['listing_id'] = save_info['listing_id']
+        result['url'] = save_info['url']
+        self._record_state(result['filename'], save_info)
+
+        if not save_info['ok']:
+            result['message'] = f"TPT rejected the product (HTTP {save_info['status']})"
+            logger.error(result['message'])
+            await self.browser.take_screenshot(f"save_failed_{Path(product['filename']).stem}")
+            return result
+        result['steps_completed'].append('save')
 
         result['success'] = True
         result['message'] = f"Product uploaded successfully as {self.default_mode}"
@@ -231,14 +394,67 @@ class TPTUploader:
 
         return result
 
-    async def _upload_product_file(self, filename: str) -> bool:
-        """Upload the main product file."""
+    async def _step(self, name: str, coro):
+        """
+        Run one form step under its time budget (see src/deadline.py).
+
+        The page's default timeout is lowered to the time left, so implicit
+        Playwright waits inside the step draw from the same budget as the
+        explicit ones in TPTBrowser's helpers.
+
+        Raises:
+            StepTimeout: If the step's or the product's budget runs out
+        """
+        step_budget = self.step_budgets_ms.get(name)
+        timeouts = getattr(self.browser, 'timeouts', None)
+        if step_budget is not None and timeouts:
+            step_budget = timeouts.timeout(f"step:{name}", step_budget)
+        start = time.perf_counter()
+
+        with deadline(name, step_budget) as current, log_context(step=name):
+            page = self.browser.page
+            try:
+                page.set_default_timeout(budget_ms(self.browser.timeout))
+            except StepTimeout:
+                coro.close()
+                raise
+
+            try:
+                if current is None:
+                    return await coro
+                # Safety net for code that ignores the page timeout; the
+                # grace period lets Playwright's own timeouts fire first
+                return await asyncio.wait_for(coro, current.remaining_ms() / 1000 + STEP_GRACE_SECONDS)
+            except StepTimeout:
+                raise
+            except asyncio.TimeoutError:
+                raise current.timeout()
+            finally:
+                if not page.is_closed():
+                    page.set_default_timeout(self.browser.timeout)
+                # Helpers turn timeouts into False/None; report them as timeouts
+                expired = current is not None and current.expired()
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                if timeouts:
+                    timeouts.record(f"step:{name}", elapsed_ms, ok=not expired)
+                if self.current_result is not None:
+                    self.current_result.setdefault('step_ms', {})[name] = round(elapsed_ms)
+                check_deadline()
+
+    async def _upload_product_file(self, filename: str) -> Optional[dict]:
+        """
+        Upload the main product file.
+
+        Returns:
+            The server's upload acknowledgement (see TPTBrowser.set_files_and_wait),
+            or None if the upload failed
+        """
         try:
             filepath = Path(self.products_folder) / filename
 
             if not filepath.exists():
                 logger.error(f"File not found: {filepath}")
-                return False
+                return None
 
             # Find file upload input - try multiple selectors
             file_input_selectors = [
@@ -252,25 +468,26 @@ class TPTUploader:
                 try:
                     file_input = self.browser.page.locator(selector).first
                     if await file_input.count() > 0:
-                        await file_input.set_input_files(str(filepath))
                         logger.info(f"File upload initiated: {filename}")
 
-                        # Wait for upload to process
-                        await self.browser.page.wait_for_timeout(3000)
+                        # Returns when the server acknowledges the upload
+                        info = await self.browser.set_files_and_wait(file_input, filepath)
+                        if not info:
+                            return None
 
                         # Take screenshot to verify
                         await self.browser.take_screenshot("after_file_upload")
-                        return True
+                        return info
                 except Exception as e:
                     logger.debug(f"Selector {selector} failed: {e}")
                     continue
 
             logger.error("Could not find file upload input")
-            return False
+            return None
 
         except Exception as e:
             logger.error(f"File upload failed: {e}")
-            return False
+            return None
 
     async def _set_title(self, title: str) -> bool:
         """Set the product title."""
@@ -279,14 +496,7 @@ class TPTUploader:
             logger.warning(f"Title too long ({len(title)} chars), truncating to {MAX_TITLE_LENGTH}")
             title = title[:MAX_TITLE_LENGTH]
 
-        title_selectors = [
-            'input[name="title"]',
-            'input[name*="title"]',
-            '#title',
-            'input[placeholder*="title" i]'
-        ]
-
-        for selector in title_selectors:
+        for selector in TITLE_SELECTORS:
             try:
                 element = self.browser.page.locator(selector).first
                 if await element.count() > 0:
@@ -301,15 +511,7 @@ class TPTUploader:
 
     async def _set_description(self, description: str) -> bool:
         """Set the product description."""
-        desc_selectors = [
-            'textarea[name="description"]',
-            'textarea[name*="description"]',
-            '#description',
-            'textarea[placeholder*="description" i]',
-            '[contenteditable="true"]'  # Some sites use rich text editors
-        ]
-
-        for selector in desc_selectors:
+        for selector in DESCRIPTION_SELECTORS:
             try:
                 element = self.browser.page.locator(selector).first
                 if await element.count() > 0:
@@ -326,14 +528,7 @@ class TPTUploader:
         """Set the product price."""
         price_str = format_price(price)
 
-        price_selectors = [
-            'input[name="price"]',
-            'input[name*="price"]',
-            '#price',
-            'input[type="number"][name*="price"]'
-        ]
-
-        for selector in price_selectors:
+        for selector in PRICE_SELECTORS:
             try:
                 element = self.browser.page.locator(selector).first
                 if await element.count() > 0:
@@ -426,16 +621,53 @@ class TPTUploader:
                 element = self.browser.page.locator(selector).first
                 if await element.count() > 0:
                     # Enter tags separated by commas or press Enter after each
+                    handle = await element.element_handle()
                     for tag in tags:
                         await element.fill(tag)
                         await element.press('Enter')
-                        await self.browser.page.wait_for_timeout(300)
+                        # Tag inputs clear themselves once the tag is added
+                        try:
+                            await self.browser.timed_wait(
+                                'tag_commit',
+                                lambda t: self.browser.page.wait_for_function('el => !el.value', arg=handle, timeout=t),
+                                TAG_COMMIT_TIMEOUT_MS
+                            )
+                        except Exception:
+                            pass  # Input kept its text - carry on as before
                     logger.info(f"Added {len(tags)} tags")
                     return True
             except:
                 continue
 
-        return True
+        logger.warning("Could not find the tags input")
+        return False
+
+    async def _read_tags(self) -> Optional[list]:
+        """Return the tags already on the open edit form, or None if its tag list is not found."""
+        tag_list = await self._find_first(TAG_LIST_SELECTORS)
+        if tag_list is None:
+            return None
+        texts = await tag_list.locator(TAG_ITEM_SELECTOR).all_inner_texts()
+        # Drop the remove button's "×" from each tag's text
+        return [text.strip().rstrip('×✕').strip() for text in texts if text.strip()]
+
+    async def _clear_tags(self) -> bool:
+        """Remove every tag from the open edit form. Returns False if any is left."""
+        tag_list = await self._find_first(TAG_LIST_SELECTORS)
+        if tag_list is None:
+            return False
+
+        items = tag_list.locator(TAG_ITEM_SELECTOR)
+        try:
+            for _ in range(await items.count()):
+                remove = items.first.locator(TAG_REMOVE_SELECTOR)
+                if await remove.count() == 0:
+                    break
+                await remove.first.click()
+            return await items.count() == 0
+        except Exception as e:
+            logger.error(f"Could not remove tags: {e}")
+            return False
 
     async def _upload_cover_image(self, cover_path: str) -> bool:
         """Upload cover image."""
@@ -456,9 +688,9 @@ class TPTUploader:
             try:
                 element = self.browser.page.locator(selector).first
                 if await element.count() > 0:
-                    await element.set_input_files(str(filepath))
+                    if not await self.browser.set_files_and_wait(element, filepath):
+                        return False
                     logger.info(f"Cover image uploaded: {cover_path}")
-                    await self.browser.page.wait_for_timeout(2000)
                     return True
             except:
                 continue
@@ -519,86 +751,437 @@ class TPTUploader:
         logger.warning("Could not find copyright checkbox")
         return True
 
-    async def _save_product(self, as_draft: bool = True) -> bool:
-        """Save the product (as draft or published)."""
+    async def update_listing(self, listing_id: str, changes: dict, dry_run: bool = False) -> dict:
+        """
+        Edit an existing listing, changing only fields that differ.
+
+        The listing's edit form is opened and each requested field is
+        compared with its current value; only differing fields are set,
+        using the same setters as the create flow.
+
+        Args:
+            listing_id: TPT product ID
+            changes: Desired values for any of EDITABLE_FIELDS. 'tags' is a
+                semicolon-separated list; 'status' is 'active' or 'draft'.
+            dry_run: Report what would change without saving
+
+        Returns:
+            Result dictionary with 'success', 'message' and 'changed' (field names)
+        """
+        result = {
+            'success': False,
+            'listing_id': listing_id,
+            'message': '',
+            'changed': []
+        }
+
+        if not await self.browser.navigate_to_edit_product(listing_id):
+            result['message'] = "Could not open edit form"
+            return result
+
+        if changes.get('title'):
+            title = changes['title'][:MAX_TITLE_LENGTH]
+            if await self._read_field(TITLE_SELECTORS) != title:
+                result['changed'].append('title')
+                if not dry_run and not await self._set_title(title):
+                    result['message'] = "Failed to set title"
+                    return result
+
+        if changes.get('description'):
+            current = await self._read_field(DESCRIPTION_SELECTORS)
+            if (current or '').strip() != changes['description'].strip():
+                result['changed'].append('description')
+                if not dry_run and not await self._set_description(changes['description']):
+                    result['message'] = "Failed to set description"
+                    return result
+
+        if changes.get('price'):
+            current = await self._read_field(PRICE_SELECTORS)
+            if current is None or format_price(current) != format_price(changes['price']):
+                result['changed'].append('price')
+                if not dry_run and not await self._set_price(changes['price']):
+                    result['message'] = "Failed to set price"
+                    return result
+
+        if changes.get('tags'):
+            # Tags are added, never replaced, by the input: the old ones are
+            # removed first, and the edit is refused if they cannot be read
+            tags = parse_tags(changes['tags'])
+            current = await self._read_tags()
+            if current is None:
+                result['message'] = "Could not read the listing's current tags - tags not changed"
+                return result
+            if [tag.lower() for tag in current] != [tag.lower() for tag in tags]:
+                result['changed'].append('tags')
+                if not dry_run:
+                    if not await self._clear_tags():
+                        result['message'] = "Could not remove the listing's current tags"
+                        return result
+                    if not await self._add_tags(tags):
+                        result['message'] = "Failed to add tags"
+                        return result
+
+        if changes.get('status'):
+            want_active = changes['status'].strip().lower() in ('active', 'published', 'publish')
+            checkbox = await self._find_first(LISTING_ACTIVE_SELECTORS)
+            if checkbox is None:
+                result['message'] = "Could not find listing status control"
+                return result
+            if await checkbox.is_checked() != want_active:
+                result['changed'].append('status')
+                if not dry_run:
+                    await (checkbox.check() if want_active else checkbox.uncheck())
+
+        if not result['changed']:
+            result['success'] = True
+            result['message'] = "Already up to date"
+            return result
+
+        if dry_run:
+            result['success'] = True
+            result['message'] = f"Would change: {', '.join(result['changed'])}"
+            return result
+
+        save_info = await self._save_changes()
+        if not save_info:
+            result['message'] = "Changes not saved (no save confirmation from TPT)"
+            return result
+        if not save_info['ok']:
+            result['message'] = f"TPT rejected the changes (HTTP {save_info['status']})"
+            logger.error(f"Listing {listing_id}: {result['message']}")
+            return result
+
+        result['success'] = True
+        result['message'] = f"Updated: {', '.join(result['changed'])}"
+        logger.info(f"Listing {listing_id} {result['message']}")
+        return result
+
+    async def _resume_unconfirmed_save(self, product: dict, result: dict) -> Optional[dict]:
+        """
+        Adopt the listing an earlier, unconfirmed save of this product created.
+
+        If the upload state shows that a save request went out without a
+        confirmed outcome (see is_unconfirmed_save), TPT may have created the
+        listing anyway. The first pages of My-Products are searched for it
+        by title. If it is there, it is opened in the edit form and any of
+        ADOPTED_FIELDS that did not make it are set, instead of a second
+        listing being created.
+
+        Returns:
+            The finished result if the listing was adopted, or if the store
+            could not be checked (creating blindly could duplicate it); None
+            if a new listing should be created
+        """
+        from src.sync import find_listings_by_title
+
+        try:
+            record = self._state().get(result['filename'])
+        except Exception as e:
+            logger.warning(f"Could not read upload state for {result['filename']}: {e}")
+            record = None
+        if not is_unconfirmed_save(record):
+            return None
+
+        logger.info("An earlier save of this product was not confirmed - checking the store for it...")
+        listings = await find_listings_by_title(self.browser, product.get('title', ''), self.lookup_pages)
+        if listings is None:
+            result['message'] = "Could not check the store for a listing from an earlier save"
+            logger.error(result['message'])
+            return result
+
+        if not listings:
+            logger.info("No listing from the earlier save - creating it")
+            return None
+        if len(listings) > 1:
+            logger.warning(f"{len(listings)} listings share this title - adopting the newest")
+
+        listing = listings[0]
+        result['adopted'] = True
+        result['listing_id'] = listing['listing_id']
+        result['url'] = listing['url']
+
+        update = await self.update_listing(
+            listing['listing_id'], {field: product.get(field) for field in ADOPTED_FIELDS}
+        )
+        if not update['success']:
+            result['message'] = (
+                f"Found listing {listing['listing_id']} from an earlier save but could not update it: "
+                f"{update['message']}"
+            )
+            logger.error(result['message'])
+            return result
+
+        try:
+            self._state().record(result['filename'], listing_id=listing['listing_id'], url=listing['url'],
+                                 status='adopted', http_status=None)
+        except Exception as e:
+            logger.warning(f"Could not record upload state for {result['filename']}: {e}")
+
+        result['steps_completed'].append('save')
+        result['success'] = True
+        result['message'] = f"Adopted listing {listing['listing_id']} from an earlier save ({update['message']})"
+        logger.info(result['message'])
+        return result
+
+    async def _find_first(self, selectors: list):
+        """Return the first locator that matches any selector, or None."""
+        for selector in selectors:
+            try:
+                element = self.browser.page.locator(selector).first
+                if await element.count() > 0:
+                    return element
+            except:
+                continue
+        return None
+
+    async def _read_field(self, selectors: list) -> Optional[str]:
+        """Read the current value of the first matching form field."""
+        element = await self._find_first(selectors)
+        if element is None:
+            return None
+        try:
+            if await element.get_attribute('contenteditable') == 'true':
+                return await element.inner_text()
+            return await element.input_value()
+        except Exception as e:
+            logger.debug(f"Could not read field: {e}")
+            return None
+
+    async def _save_changes(self) -> Optional[dict]:
+        """
+        Click the save button on an edit form and wait for TPT to confirm it.
+
+        Returns:
+            Output of TPTBrowser.click_and_wait_for_save; None if no save
+            button was found or the server never answered
+        """
+        save_selectors = [
+            'button:has-text("Save Changes")',
+            'button:has-text("Update")',
+            'button:has-text("Save")',
+            'button:has-text("Submit")',
+            'button[type="submit"]'
+        ]
+
+        button = await self._find_first(save_selectors)
+        if button is None:
+            logger.error("Could not find save button on edit form")
+            return None
+
+        try:
+            return await self.browser.click_and_wait_for_save(button)
+        except Exception as e:
+            logger.error(f"Failed to save changes: {e}")
+            return None
+
+    async def _save_product(self, as_draft: bool = True) -> Optional[dict]:
+        """
+        Save the product (as draft or published).
+
+        Returns:
+            Output of TPTBrowser.click_and_wait_for_save ('ok', 'status',
+            'listing_id', 'url'); None if no save button was found or the
+            server never answered
+        """
         try:
             if as_draft:
                 # Look for Save Draft button
-                draft_selectors = [
+                selectors = [
                     'button:has-text("Save Draft")',
                     'button:has-text("Save as Draft")',
                     'input[value*="Draft"]',
                     'button[name*="draft"]'
                 ]
-
-                for selector in draft_selectors:
-                    try:
-                        button = self.browser.page.locator(selector).first
-                        if await button.count() > 0:
-                            logger.info("Clicking Save Draft...")
-                            await button.click()
-                            await self.browser.page.wait_for_load_state('networkidle')
-                            logger.info("Product saved as draft")
-                            return True
-                    except:
-                        continue
+                label = "Save Draft"
 
             else:
                 # Look for Publish button
-                publish_selectors = [
+                selectors = [
                     'button:has-text("Publish")',
                     'button:has-text("Submit")',
                     'input[value*="Publish"]',
                     'button[type="submit"]'
                 ]
+                label = "Publish"
 
                 # IMPORTANT: Publishing requires extra confirmation
                 logger.warning("PUBLISHING product (not draft)!")
 
-                for selector in publish_selectors:
-                    try:
-                        button = self.browser.page.locator(selector).first
-                        if await button.count() > 0:
-                            logger.info("Clicking Publish...")
-                            await button.click()
-                            await self.browser.page.wait_for_load_state('networkidle')
-                            logger.info("Product published")
-                            return True
-                    except:
-                        continue
+            button = await self._find_first(selectors)
 
             # If we couldn't find specific buttons, try generic submit
-            logger.warning("Could not find specific save button, trying generic submit")
-            try:
-                submit = self.browser.page.locator('button[type="submit"]').first
-                if await submit.count() > 0:
-                    await submit.click()
-                    await self.browser.page.wait_for_load_state('networkidle')
-                    return True
-            except:
-                pass
+            if button is None:
+                logger.warning("Could not find specific save button, trying generic submit")
+                button = await self._find_first(['button[type="submit"]'])
+                label = "submit"
 
-            logger.error("Could not find any save/submit button")
-            return False
+            if button is None:
+                logger.error("Could not find any save/submit button")
+                return None
+
+            logger.info(f"Clicking {label}...")
+            return await self.browser.click_and_wait_for_save(button)
 
         except Exception as e:
             logger.error(f"Failed to save product: {e}")
-            return False
+            return None
+
+    def _state(self) -> UploadState:
+        """Return the upload state store, opening it on first use."""
+        if self.state is None:
+            self.state = open_upload_state(self.settings)
+        return self.state
+
+    def _record_submit(self, filename: str):
+        """Note that a save request is about to go out, before its outcome is known."""
+        try:
+            self._state().record(filename, status='submitting', http_status=None)
+        except Exception as e:
+            logger.warning(f"Could not record upload state for {filename}: {e}")
+
+    def _record_state(self, filename: str, save_info: dict):
+        """Store the listing ID and URL the save response reported."""
+        try:
+            self._state().record(
+                filename,
+                listing_id=save_info.get('listing_id'),
+                url=save_info.get('url'),
+                status=self.default_mode if save_info.get('ok') else 'save_failed',
+                http_status=save_info.get('status'),
+            )
+        except Exception as e:
+            logger.warning(f"Could not record upload state for {filename}: {e}")
+
+
+def is_unconfirmed_save(record: Optional[dict]) -> bool:
+    """
+    Return True if an upload state record shows a save that may have created a listing.
+
+    That is a save request that never got an answer (timeout, crash), or
+    one that got a server error; a 4xx answer means TPT rejected it.
+    """
+    if not record:
+        return False
+    if record.get('status') == 'submitting':
+        return True
+    return record.get('status') == 'save_failed' and (record.get('http_status') or 500) >= 500
+
+
+def confirmed_listing_id(record: Optional[dict]) -> Optional[str]:
+    """Return the listing ID of an upload state record whose save TPT confirmed, else None."""
+    if not record or not record.get('listing_id'):
+        return None
+    if record.get('status') in ('submitting', 'save_failed'):
+        return None
+    return record['listing_id']
+
+
+# Sentinel placed on the pipeline queue once the product stream is exhausted
+_END_OF_STREAM = None
 
 
-async def run_batch_upload(products: list, settings: dict, dry_run: bool = False) -> dict:
+async def _produce_validated(products: Iterable[dict], queue: asyncio.Queue,
+                             products_folder: str, state: dict,
+                             cache: Optional[ValidationCache] = None,
+                             prepare: Optional[Callable] = None) -> None:
+    """
+    Read products from an iterable and queue each one with its validation.
+
+    Reading and validation run in a worker thread so a slow CSV read or
+    file-system check never stalls the browser. Once ``state['stop']`` is
+    set the remaining rows are only counted, so the summary can report how
+    many products were skipped.
+
+    If ``prepare`` is given it is called with each valid product and must
+    return an awaitable (a process pool future); it is queued unawaited, so
+    up to queue-depth products are prepared while the browser uploads.
+    """
+    iterator = iter(products)
+    validate = cache.validate if cache else validate_product_complete
+
+    try:
+        while True:
+            product = await asyncio.to_thread(next, iterator, _END_OF_STREAM)
+            if product is _END_OF_STREAM:
+                break
+
+            state['read'] += 1
+
+            if state['stop']:
+                continue
+
+            validation = await asyncio.to_thread(validate, product, products_folder)
+            preparation = prepare(product) if prepare and validation['valid'] else None
+            # Blocks while the queue is full - backpressure keeps memory flat
+            # and bounds how far preparation runs ahead
+            await queue.put((product, validation, preparation))
+    finally:
+        await queue.put(_END_OF_STREAM)
+
+
+def _start_preparation(settings: dict, products_folder: str, dry_run: bool = False) -> tuple:
+    """
+    Start the process pool that prepares products ahead of the browser.
+
+    In a dry run the pool only checks the files (prepare_product's
+    validate_only), so nothing is written under upload.prepared_folder.
+
+    Returns:
+        (pool, prepare) where prepare(product) returns a future for
+        src.prepare.prepare_product; (None, None) if upload.prepare_workers is 0
+    """
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+    from functools import partial
+    from src.prepare import prepare_product, DEFAULT_PREPARED_FOLDER, DEFAULT_MAX_IMAGE_SIZE
+
+    upload_settings = settings.get('upload', {}) or {}
+    workers = upload_settings.get('prepare_workers', min(2, os.cpu_count() or 1))
+    if not workers:
+        return None, None
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    task = partial(
+        prepare_product,
+        products_folder=products_folder,
+        prepared_folder=upload_settings.get('prepared_folder', DEFAULT_PREPARED_FOLDER),
+        max_image_size=upload_settings.get('max_image_size', DEFAULT_MAX_IMAGE_SIZE),
+        validate_only=dry_run,
+    )
+    loop = asyncio.get_running_loop()
+
+    def prepare(product: dict):
+        return loop.run_in_executor(pool, task, product)
+
+    return pool, prepare
+
+
+async def run_batch_upload(products: Iterable[dict], settings: dict, dry_run: bool = False,
+                           browser: Optional[TPTBrowser] = None) -> dict:
     """
     Run batch upload for multiple products.
 
+    Products are consumed as a stream: validation of the next rows and the
+    browser start-up/login run while the source (for example
+    ``iter_products_csv``) is still being read, so the first upload can
+    begin before the whole catalog has been parsed.
+
     Args:
-        products: List of product dictionaries
+        products: Iterable of product dictionaries. A list is uploaded in
+            scheduler order (src/scheduler.py: priority, new titles, longest
+            first); a generator is streamed in its own order.
         dry_run: If True, validate only
+        browser: An already started and logged-in TPTBrowser to reuse. It is
+            left open afterwards; otherwise a browser is started and closed here.
 
     Returns:
-        Summary dictionary with results
+        Summary dictionary with results and, when uploading, 'memory'
+        (peak browser memory and recycle events), 'crashes' (browser
+        crashes recovered from, if any) and 'circuit_breaker' (pauses
+        during site-wide failures, if any)
     """
     summary = {
-        'total': len(products),
+        'total': 0,
         'successful': 0,
         'failed': 0,
         'skipped': 0,
@@ -606,74 +1189,174 @@ async def run_batch_upload(products: list, settings: dict, dry_run: bool = False
     }
 
     mode = "[DRY RUN] " if dry_run else ""
-    logger.info(f"{mode}Starting batch upload of {len(products)} products...")
+    logger.info(f"{mode}Starting batch upload...")
+
+    if isinstance(products, list) and not dry_run:
+        products = Scheduler(settings).order(products)
+
+    products_folder = settings.get('paths', {}).get('products_folder', './products')
+    depth = max(1, settings.get('upload', {}).get('pipeline_depth', 4))
 
-    browser = None
+    queue = asyncio.Queue(maxsize=depth)
+    state = {'read': 0, 'stop': False}
+    cache = open_validation_cache(settings)
+    pool, prepare = _start_preparation(settings, products_folder, dry_run=dry_run)
+    producer = asyncio.create_task(_produce_validated(products, queue, products_folder, state, cache, prepare))
+
+    owns_browser = browser is None and not dry_run
+    processed = 0
+    exhausted = False
+    watchdog = None
+    supervisor = None
+    breaker = None
+    history = None
+    run_id = None
 
     try:
-        if not dry_run:
-            # Start browser and login
+        if owns_browser:
+            # Start browser and login while the producer reads ahead
             browser = TPTBrowser(settings)
 
             if not await browser.start():
-                return {'error': 'Failed to start browser', **summary}
+                state['stop'] = True
+                summary['error'] = 'Failed to start browser'
+                return summary
 
             email = settings.get('tpt', {}).get('email')
             password = settings.get('tpt', {}).get('password')
 
             if not email or not password:
-                return {'error': 'TPT credentials not configured', **summary}
+                state['stop'] = True
+                summary['error'] = 'TPT credentials not configured'
+                return summary
 
             if not await browser.login(email, password):
-                return {'error': 'Failed to login to TPT', **summary}
+                state['stop'] = True
+                summary['error'] = 'Failed to login to TPT'
+                return summary
+
+        uploader = TPTUploader(browser, settings) if browser and not dry_run else None
+        watchdog = MemoryWatchdog(browser, settings) if uploader else None
+        supervisor = BrowserSupervisor(browser, settings) if uploader else None
+        breaker = CircuitBreaker(settings) if uploader else None
+        if uploader:
+            try:
+                history = open_run_history(settings)
+                run_id = history.start_run()
+            except Exception as e:
+                logger.warning(f"Could not open run history: {e}")
+                history = None
+
+        while True:
+            item = await queue.get()
+            if item is _END_OF_STREAM:
+                exhausted = True
+                break
+            if state['stop']:
+                continue  # Drain queued items after a stop
+
+            product, validation, preparation = item
+            processed += 1
 
-        uploader = TPTUploader(browser, settings) if browser else None
+            # Delay between uploads (not needed for dry run)
+            if not dry_run and processed > 1:
+                delay = settings.get('upload', {}).get('delay_between_uploads', 5)
+                logger.info(f"Waiting {delay} seconds before next upload...")
+                await browser.page.wait_for_timeout(delay * 1000)
 
-        for i, product in enumerate(products, 1):
             logger.info(f"\n{'='*50}")
-            logger.info(f"Processing product {i}/{len(products)}: {product.get('filename')}")
+            logger.info(f"Processing product {processed}: {product.get('filename')}")
             logger.info(f"{'='*50}")
 
+            prepared = None
+            if preparation is not None:
+                waited = time.perf_counter()
+                try:
+                    prepared = await preparation
+                except Exception as e:
+                    prepared = {'errors': [f"Preparation crashed: {e}"], 'warnings': [], 'file_sha256': None}
+                waited = time.perf_counter() - waited
+                if waited > 0.1:
+                    logger.info(f"Waited {waited:.1f}s for local preparation (consider more upload.prepare_workers)")
+
             if dry_run:
                 # Just validate
-                validation = validate_product_complete(
-                    product,
-                    settings.get('paths', {}).get('products_folder', './products')
-                )
+                errors = validation['errors'] + (prepared or {}).get('errors', [])
                 result = {
-                    'success': validation['valid'],
+                    'success': not errors,
                     'filename': product.get('filename'),
-                    'message': 'Validation passed' if validation['valid'] else f"Errors: {validation['errors']}",
-                    'warnings': validation.get('warnings', [])
+                    'message': 'Validation passed' if not errors else f"Errors: {errors}",
+                    'warnings': validation.get('warnings', []) + (prepared or {}).get('warnings', [])
                 }
             else:
-                result = await uploader.upload_product(product, dry_run=False)
+                result = await supervisor.upload(uploader, product, dry_run=False, validation=validation,
+                                                 prepared=prepared)
+                await watchdog.after_product()
 
             summary['results'].append(result)
+            if history:
+                try:
+                    history.add_result(run_id, result)
+                except Exception as e:
+                    logger.warning(f"Could not record {result.get('filename')} in run history: {e}")
 
             if result['success']:
                 summary['successful'] += 1
             else:
                 summary['failed'] += 1
 
-                # Stop on error if configured
-                if settings.get('upload', {}).get('stop_on_error', True) and not dry_run:
-                    logger.error("Stopping batch due to error (stop_on_error=true)")
-                    summary['skipped'] = len(products) - i
-                    break
+            if breaker and breaker.record(result):
+                # The site is failing as a whole: wait for it instead of
+                # pushing the rest of the queue through doomed uploads
+                if not await breaker.wait_until_healthy(browser.health_check):
+                    summary['error'] = 'TPT unavailable (circuit breaker gave up)'
+                    state['stop'] = True
+                continue
 
-            # Delay between uploads (not needed for dry run)
-            if not dry_run and i < len(products):
-                delay = settings.get('upload', {}).get('delay_between_uploads', 5)
-                logger.info(f"Waiting {delay} seconds before next upload...")
-                await browser.page.wait_for_timeout(delay * 1000)
+            if not result['success']:
+                # Stop on error if configured (site errors are left to the breaker)
+                if settings.get('upload', {}).get('stop_on_error', True) and not dry_run \
+                        and not (breaker and breaker.enabled and is_site_error(result)):
+                    logger.error("Stopping batch due to error (stop_on_error=true)")
+                    state['stop'] = True
 
     except Exception as e:
         logger.error(f"Batch upload error: {e}")
         summary['error'] = str(e)
+        state['stop'] = True
 
     finally:
-        if browser:
+        # Let the producer finish counting the remaining rows, draining the
+        # queue so it is never left blocked on a full put().
+        if not exhausted:
+            while await queue.get() is not _END_OF_STREAM:
+                pass
+        try:
+            await producer
+        except Exception as e:
+            logger.error(f"Error reading products: {e}")
+            summary.setdefault('error', str(e))
+        summary['total'] = state['read']
+        summary['skipped'] = summary['total'] - processed
+        if watchdog:
+            summary['memory'] = watchdog.summary()
+        if supervisor and supervisor.crashes:
+            summary['crashes'] = supervisor.summary()
+        if breaker and breaker.events:
+            summary['circuit_breaker'] = breaker.summary()
+        if history:
+            try:
+                history.finish_run(run_id, summary)
+            except Exception as e:
+                logger.warning(f"Could not record run in history: {e}")
+            history.close()
+
+        if cache:
+            cache.close()
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        if owns_browser and browser:
             await browser.close()
 
     logger.info(f"\n{'='*50}")
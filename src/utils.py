@@ -7,39 +7,37 @@ import os
 from pathlib import Path
 from datetime import datetime
 
-import yaml
-from dotenv import load_dotenv
+# yaml and dotenv are imported inside the functions that need them so that
+# importing this module stays cheap (see benchmarks/startup_benchmark.py).
 
 
-def setup_logging(level: int = logging.INFO) -> logging.Logger:
+def setup_logging(level: int = logging.INFO, config_path: str = "config/settings.yaml") -> logging.Logger:
     """
     Configure logging for the application.
 
+    Records go through a queue to a background writer thread (see
+    src/structured_logging.py): JSON lines in logs/, rotated and compressed
+    by size and age, plus the usual text on the console.
+
     Args:
         level: Logging level (e.g., logging.DEBUG, logging.INFO)
+        config_path: Settings file whose 'logging' section sets rotation
+            (max_bytes, max_age_hours, retention_days)
 
     Returns:
         Configured logger instance
     """
+    from src.structured_logging import log_settings_from_file, start_logging
+
     # Create logs directory if it doesn't exist
     logs_dir = Path("logs")
     logs_dir.mkdir(exist_ok=True)
 
     # Create log filename with timestamp
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file = logs_dir / f"tpt_agent_{timestamp}.log"
-
-    # Configure logging format
-    log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    log_file = logs_dir / f"tpt_agent_{timestamp}.jsonl"
 
-    logging.basicConfig(
-        level=level,
-        format=log_format,
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler()
-        ]
-    )
+    start_logging(level, log_file, log_settings_from_file(config_path))
 
     logger = logging.getLogger("tpt_agent")
     logger.info(f"Logging initialized. Log file: {log_file}")
@@ -57,6 +55,9 @@ def load_settings(config_path: str = "config/settings.yaml") -> dict | None:
     Returns:
         Dictionary of settings, or None if file not found
     """
+    import yaml
+    from dotenv import load_dotenv
+
     # Load environment variables from .env file if present
     load_dotenv()
 
@@ -97,6 +98,8 @@ def load_tags(tags_path: str = "config/tags.yaml") -> dict | None:
     Returns:
         Dictionary of tag mappings, or None if file not found
     """
+    import yaml
+
     tags_file = Path(tags_path)
 
     if not tags_file.exists():
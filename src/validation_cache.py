@@ -0,0 +1,155 @@
+"""
+Incremental validation cache.
+
+Re-running validate_product_complete on every row of a large catalog is
+wasteful when only a few rows changed. This cache stores each row's errors
+and warnings under a key built from:
+- the row's content hash
+- the size and modification time of the referenced product file
+- the products folder it was checked against
+- validators.RULES_VERSION
+
+Only rows whose key changed are validated again.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+from pathlib import Path
+
+from src.metadata import product_row_hash
+from src.validators import RULES_VERSION, validate_product_complete
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = "./logs/validation_cache.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS validations (
+    filename TEXT PRIMARY KEY,
+    input_key TEXT NOT NULL,
+    result TEXT NOT NULL
+);
+"""
+
+
+def validation_input_key(product: dict, products_folder: str) -> str:
+    """
+    Build the cache key for one product row.
+
+    Args:
+        product: Product dictionary from CSV
+        products_folder: Folder the product file is resolved against
+
+    Returns:
+        Hex digest that changes whenever validation could give a new answer
+    """
+    file_state = ''
+    filename = product.get('filename')
+    if filename:
+        try:
+            stat = os.stat(os.path.join(products_folder, filename))
+            file_state = f"{stat.st_size}:{stat.st_mtime_ns}:{stat.st_mode}"
+        except OSError:
+            file_state = 'missing'
+
+    key = f"{product_row_hash(product)}|{file_state}|{products_folder}|{RULES_VERSION}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+class ValidationCache:
+    """
+    Persistent cache of validate_product_complete results.
+
+    All entries are loaded on open and new results are written back in a
+    single transaction by flush(), so a revalidation of an unchanged catalog
+    costs one stat() and one hash per row.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH):
+        """
+        Open (and create if needed) the cache database.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Batch uploads validate from a worker thread
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+
+        self.entries = {
+            filename: (input_key, result)
+            for filename, input_key, result in self.conn.execute(
+                "SELECT filename, input_key, result FROM validations"
+            )
+        }
+        self.pending = {}
+        self.hits = 0
+        self.misses = 0
+
+    def validate(self, product: dict, products_folder: str = "./products") -> dict:
+        """
+        Validate a product, reusing the cached result if its inputs are unchanged.
+
+        Args:
+            product: Product dictionary from CSV
+            products_folder: Folder the product file is resolved against
+
+        Returns:
+            Dictionary with 'valid', 'errors', and 'warnings' keys
+        """
+        filename = product.get('filename') or f"row {product.get('_row_number', '?')}"
+        input_key = validation_input_key(product, products_folder)
+
+        cached = self.entries.get(filename)
+        if cached and cached[0] == input_key:
+            self.hits += 1
+            return json.loads(cached[1])
+
+        self.misses += 1
+        result = validate_product_complete(product, products_folder)
+
+        encoded = json.dumps(result)
+        self.entries[filename] = (input_key, encoded)
+        self.pending[filename] = (input_key, encoded)
+        return result
+
+    def flush(self):
+        """Write newly computed results to disk."""
+        if not self.pending:
+            return
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO validations (filename, input_key, result) VALUES (?, ?, ?) "
+                "ON CONFLICT(filename) DO UPDATE SET input_key = excluded.input_key, result = excluded.result",
+                [(filename, key, result) for filename, (key, result) in self.pending.items()]
+            )
+        logger.debug(f"Validation cache: stored {len(self.pending)} results")
+        self.pending = {}
+
+    def close(self):
+        """Flush pending results and close the database."""
+        self.flush()
+        self.conn.close()
+
+
+def open_validation_cache(settings: dict) -> ValidationCache | None:
+    """
+    Open the validation cache unless disabled in settings.
+
+    Args:
+        settings: Configuration dictionary
+
+    Returns:
+        A ValidationCache, or None if validation.cache is false
+    """
+    validation_settings = settings.get('validation', {}) or {}
+    if not validation_settings.get('cache', True):
+        return None
+    return ValidationCache(validation_settings.get('cache_path', DEFAULT_CACHE_PATH))
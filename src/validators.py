@@ -19,6 +19,10 @@ MAX_PRICE = 100.00  # Sanity check - warn above this
 LOW_PRICE_WARNING = 1.00  # Warn if price seems too low
 HIGH_PRICE_WARNING = 25.00  # Warn if price seems high
 
+# Bump whenever any rule below changes, so cached validation results
+# (see src/validation_cache.py) are discarded and rows are rechecked.
+RULES_VERSION = 1
+
 
 def validate_required_field(value: any, field_name: str) -> Optional[str]:
     """
@@ -0,0 +1,103 @@
+"""
+Memory watchdog for long upload runs.
+
+Chromium's memory grows over hundreds of SPA navigations, uploads and
+screenshots on one page. After every product the watchdog samples the
+browser's memory (src/browser.py memory_usage) and recycles the page
+every `browser.recycle_after` products, or the whole context as soon as
+memory crosses `browser.memory_limit_mb`. The session is kept either way,
+so recycling never needs a new login.
+"""
+
+import logging
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RECYCLE_AFTER = 50
+DEFAULT_MEMORY_LIMIT_MB = 1500
+
+
+class MemoryWatchdog:
+    """
+    Tracks a TPTBrowser's memory across products and recycles it when needed.
+    """
+
+    def __init__(self, browser, settings: dict):
+        """
+        Initialize the watchdog.
+
+        Args:
+            browser: The TPTBrowser doing the uploads
+            settings: Configuration dictionary (browser.recycle_after,
+                browser.memory_limit_mb; 0 disables either)
+        """
+        browser_settings = settings.get('browser', {}) or {}
+        self.browser = browser
+        self.recycle_after = browser_settings.get('recycle_after', DEFAULT_RECYCLE_AFTER)
+        self.memory_limit_mb = browser_settings.get('memory_limit_mb', DEFAULT_MEMORY_LIMIT_MB)
+
+        self.products_since_recycle = 0
+        self.products = 0
+        self.peak_rss_mb = None
+        self.peak_js_heap_mb = None
+        self.recycles = []
+
+    async def after_product(self) -> Optional[dict]:
+        """
+        Sample memory after a product and recycle the browser if due.
+
+        Returns:
+            The recycle event if one happened, else None
+        """
+        self.products += 1
+        self.products_since_recycle += 1
+
+        usage = await self.browser.memory_usage()
+        if usage['rss_mb'] is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb or 0, usage['rss_mb'])
+        if usage['js_heap_mb'] is not None:
+            self.peak_js_heap_mb = max(self.peak_js_heap_mb or 0, usage['js_heap_mb'])
+
+        # RSS covers every Chromium process; the page's JS heap is the fallback
+        memory_mb = usage['rss_mb'] if usage['rss_mb'] is not None else usage['js_heap_mb']
+        logger.debug(f"Browser memory after product {self.products}: {usage}")
+
+        if self.memory_limit_mb and memory_mb is not None and memory_mb >= self.memory_limit_mb:
+            reason = f"memory {memory_mb:.0f} MB >= {self.memory_limit_mb} MB"
+            full = True
+        elif self.recycle_after and self.products_since_recycle >= self.recycle_after:
+            reason = f"{self.products_since_recycle} products since last recycle"
+            full = False
+        else:
+            return None
+
+        start = time.perf_counter()
+        try:
+            kind = await self.browser.recycle(full=full)
+        except Exception as e:
+            logger.error(f"Browser recycle failed: {e}")
+            return None
+
+        after = await self.browser.memory_usage()
+        event = {
+            'after_product': self.products,
+            'kind': kind,
+            'reason': reason,
+            'memory_before_mb': memory_mb,
+            'memory_after_mb': after['rss_mb'] if after['rss_mb'] is not None else after['js_heap_mb'],
+            'elapsed_ms': round((time.perf_counter() - start) * 1000),
+        }
+        self.recycles.append(event)
+        self.products_since_recycle = 0
+        logger.info(f"Recycled browser {kind} after product {self.products} ({reason})")
+        return event
+
+    def summary(self) -> dict:
+        """Return peak memory and recycle events for the batch summary."""
+        return {
+            'peak_rss_mb': self.peak_rss_mb,
+            'peak_js_heap_mb': self.peak_js_heap_mb,
+            'recycles': self.recycles,
+        }
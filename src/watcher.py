@@ -0,0 +1,354 @@
+"""
+Watch mode: upload new and changed products as they appear.
+
+The products folder and products.csv are polled. Each poll compares:
+- a scandir snapshot of the folder (name -> size and mtime)
+- per-row content hashes of the CSV (only re-read when its size or mtime changes)
+
+Products whose CSV row or file changed are pushed onto an upload queue that
+is served by a single browser session started and logged in once, so new
+content goes live without a cold start. A product that already has a
+listing (upload state) is not uploaded again: its listing's metadata is
+updated to match the row instead.
+
+A file - the CSV included - is only acted on once its size and mtime have
+held steady for `settle_polls` polls, so half-copied PDFs are not uploaded
+and a half-saved CSV is not read. A CSV that does not parse cleanly is
+ignored until it is saved again.
+"""
+
+import asyncio
+import csv
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+from src.metadata import MissingColumnsError, product_row_hash, read_csv_rows
+from src.validation_cache import open_validation_cache
+from src.validators import validate_product_complete
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 5  # seconds
+
+# Fields of an already-listed product brought in line with its edited row
+# (files of an existing listing are not replaced)
+UPDATED_FIELDS = ('title', 'description', 'price', 'tags')
+
+
+def snapshot_folder(folder: str) -> dict[str, tuple[int, int]]:
+    """
+    Take a cheap snapshot of the files in a folder.
+
+    Args:
+        folder: Folder to scan (not recursive)
+
+    Returns:
+        Mapping of file name to (size, mtime in nanoseconds)
+    """
+    snapshot = {}
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns)
+    except FileNotFoundError:
+        logger.warning(f"Products folder not found: {folder}")
+    return snapshot
+
+
+class ProductWatcher:
+    """
+    Detects new and changed products between polls.
+
+    poll() returns the products that should be (re)uploaded since the
+    previous call. It never performs any browser work itself.
+    """
+
+    def __init__(self, csv_path: str, products_folder: str, settle_polls: int = 1):
+        """
+        Initialize the watcher.
+
+        Args:
+            csv_path: Path to products.csv
+            products_folder: Folder containing the product files
+            settle_polls: Polls a file must stay unchanged before it is queued
+        """
+        self.csv_path = csv_path
+        self.products_folder = products_folder
+        self.settle_polls = max(0, settle_polls)
+
+        self.csv_stat = None  # (size, mtime) of the CSV as last read
+        self.csv_unsettled = None  # [stat, polls unchanged] while the CSV is changing
+        self.rows = {}  # filename -> product dict
+        self.row_hashes = {}  # filename -> hash of the row last handed out
+        self.files = {}  # file name -> (size, mtime) last handed out
+        self.unsettled = {}  # file name -> [stat, polls unchanged]
+
+    def _csv_stat(self) -> Optional[tuple[int, int]]:
+        """(size, mtime) of the CSV, or None if it does not exist."""
+        try:
+            stat = os.stat(self.csv_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _load_csv(self, stat: tuple[int, int]):
+        """
+        Read every row of the CSV, replacing self.rows only if all of it parsed.
+
+        Raises:
+            MissingColumnsError, csv.Error, UnicodeDecodeError: The CSV is
+                malformed or was read part-way through a save (a row with
+                missing or extra fields)
+        """
+        rows = {}
+        for product in read_csv_rows(Path(self.csv_path)):
+            if None in product or None in product.values():
+                raise csv.Error(f"row {product['_row_number']} has the wrong number of fields")
+            if product.get('filename'):
+                rows[product['filename']] = product
+        self.rows = rows
+        self.csv_stat = stat
+
+    def _read_csv(self) -> bool:
+        """
+        Re-read the CSV once a change to it has settled.
+
+        Returns:
+            True if it was re-read
+        """
+        stat = self._csv_stat()
+        if stat is None or stat == self.csv_stat:
+            self.csv_unsettled = None
+            return False
+
+        if self.csv_unsettled and self.csv_unsettled[0] == stat:
+            self.csv_unsettled[1] += 1
+        else:
+            self.csv_unsettled = [stat, 0]
+        if self.csv_unsettled[1] < self.settle_polls:
+            return False  # Still being written
+        self.csv_unsettled = None
+
+        try:
+            self._load_csv(stat)
+        except (MissingColumnsError, csv.Error, UnicodeDecodeError) as e:
+            logger.error(f"Could not read {self.csv_path}: {e} - ignoring this version until it is saved again")
+            self.csv_stat = stat  # Do not re-read the same broken file every poll
+            return False
+        return True
+
+    def baseline(self, include_existing: bool = False) -> list[dict]:
+        """
+        Record the current state as already handled.
+
+        Args:
+            include_existing: Return every current product instead of ignoring them
+
+        Returns:
+            Products to upload right away (empty unless include_existing)
+
+        Raises:
+            MissingColumnsError, csv.Error, UnicodeDecodeError: The CSV could
+                not be read completely (run_watch retries)
+        """
+        stat = self._csv_stat()
+        if stat is not None:
+            self._load_csv(stat)
+        self.files = snapshot_folder(self.products_folder)
+
+        self.row_hashes = {name: product_row_hash(p) for name, p in self.rows.items()}
+        return list(self.rows.values()) if include_existing else []
+
+    def poll(self) -> list[dict]:
+        """
+        Compare the folder and CSV against the last poll.
+
+        Returns:
+            Products whose row or file is new or changed, in CSV order
+        """
+        self._read_csv()
+        current = snapshot_folder(self.products_folder)
+
+        # Files that are new or changed since they were last handed out,
+        # and have stopped changing
+        settled_files = set()
+        for name, stat in current.items():
+            if self.files.get(name) == stat:
+                self.unsettled.pop(name, None)
+                continue
+
+            entry = self.unsettled.get(name)
+            if entry and entry[0] == stat:
+                entry[1] += 1
+            else:
+                entry = self.unsettled[name] = [stat, 0]
+
+            if entry[1] >= self.settle_polls:
+                settled_files.add(name)
+
+        for name in list(self.unsettled):
+            if name not in current:
+                del self.unsettled[name]
+
+        changed = []
+        for filename, product in self.rows.items():
+            if filename in self.unsettled and filename not in settled_files:
+                continue  # Still being written
+
+            row_hash = product_row_hash(product)
+            if row_hash != self.row_hashes.get(filename) or filename in settled_files:
+                if filename not in current:
+                    continue  # Row added before its file arrived - wait for it
+
+                changed.append(product)
+                self.row_hashes[filename] = row_hash
+                self.files[filename] = current[filename]
+                self.unsettled.pop(filename, None)
+
+        for name in settled_files:
+            if name not in self.rows and name != Path(self.csv_path).name:
+                logger.info(f"New file {name} has no row in {self.csv_path} yet - waiting for metadata")
+                # Reported once; the row's arrival (a new row hash) queues it
+                self.files[name] = current[name]
+
+        return changed
+
+
+async def run_watch(settings: dict, csv_path: str, include_existing: bool = False,
+                    dry_run: bool = False) -> Optional[dict]:
+    """
+    Watch the products folder and CSV, uploading changes until cancelled.
+
+    Args:
+        settings: Configuration dictionary
+        csv_path: Path to products.csv
+        include_existing: Also queue every product present at start-up
+        dry_run: Validate queued products instead of uploading them
+
+    Returns:
+        Summary dictionary with an 'error' key if the browser could not be
+        started or logged in. Otherwise this runs until cancelled and logs
+        the totals on the way out.
+    """
+    from src.browser import TPTBrowser
+    from src.state import open_upload_state
+    from src.uploader import TPTUploader, confirmed_listing_id
+    from src.supervisor import BrowserSupervisor
+    from src.watchdog import MemoryWatchdog
+
+    watch_settings = settings.get('watch', {}) or {}
+    interval = watch_settings.get('interval', DEFAULT_POLL_INTERVAL)
+    products_folder = settings.get('paths', {}).get('products_folder', './products')
+
+    summary = {'successful': 0, 'failed': 0, 'results': []}
+    watcher = ProductWatcher(csv_path, products_folder, watch_settings.get('settle_polls', 1))
+    queue = asyncio.Queue()
+    queued = {}  # filename -> latest product data waiting in the queue
+
+    def enqueue(products: list[dict]):
+        for product in products:
+            if product['filename'] not in queued:
+                queue.put_nowait(product['filename'])
+            queued[product['filename']] = product  # Newest version wins
+
+    browser = None
+    uploader = None
+
+    if not dry_run:
+        # Warm the browser once; every queued product reuses this session
+        browser = TPTBrowser(settings)
+        if not await browser.start():
+            summary['error'] = 'Failed to start browser'
+            return summary
+
+        email = settings.get('tpt', {}).get('email')
+        password = settings.get('tpt', {}).get('password')
+        if not email or not password or not await browser.login(email, password):
+            summary['error'] = 'Failed to login to TPT'
+            await browser.close()
+            return summary
+
+        uploader = TPTUploader(browser, settings)
+        watchdog = MemoryWatchdog(browser, settings)
+        supervisor = BrowserSupervisor(browser, settings)
+
+    async def poll_loop():
+        # A failed poll (CSV mid-write, permissions) is logged and retried on
+        # the next interval, so the watcher never dies silently
+        while True:
+            try:
+                enqueue(await asyncio.to_thread(watcher.baseline, include_existing))
+                break
+            except Exception as e:
+                logger.error(f"Could not read {products_folder} / {csv_path}: {e} - retrying in {interval}s")
+                await asyncio.sleep(interval)
+
+        logger.info(f"Watching {products_folder} and {csv_path} every {interval}s...")
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                changed = await asyncio.to_thread(watcher.poll)
+            except Exception as e:
+                logger.error(f"Watch poll failed: {e} - retrying in {interval}s")
+                continue
+            if changed:
+                logger.info(f"Detected {len(changed)} new or changed products")
+                enqueue(changed)
+
+    poller = asyncio.create_task(poll_loop())
+    cache = open_validation_cache(settings)
+    state = open_upload_state(settings) if not dry_run else None
+
+    try:
+        while True:
+            filename = await queue.get()
+            product = queued.pop(filename)
+
+            validation = (cache.validate if cache else validate_product_complete)(product, products_folder)
+            if cache:
+                cache.flush()
+
+            listing_id = confirmed_listing_id(state.get(filename)) if state else None
+            if dry_run or not validation['valid']:
+                result = {
+                    'success': validation['valid'],
+                    'filename': filename,
+                    'message': 'Validation passed' if validation['valid'] else f"Errors: {validation['errors']}",
+                    'warnings': validation.get('warnings', [])
+                }
+            elif listing_id:
+                # Already on TPT: a second upload would duplicate the listing
+                logger.info(f"{filename} is listing {listing_id} - updating it (files are not re-uploaded)")
+                update = await uploader.update_listing(listing_id, {field: product.get(field)
+                                                                    for field in UPDATED_FIELDS})
+                result = {
+                    'success': update['success'],
+                    'filename': filename,
+                    'listing_id': listing_id,
+                    'message': f"Listing {listing_id}: {update['message']}",
+                }
+                await watchdog.after_product()
+            else:
+                result = await supervisor.upload(uploader, product, validation=validation)
+                await watchdog.after_product()
+
+            summary['results'].append(result)
+            summary['successful' if result['success'] else 'failed'] += 1
+            logger.info(f"{'✓' if result['success'] else '✗'} {filename}: {result['message']}")
+
+    finally:
+        poller.cancel()
+        logger.info(f"Watch stopped: {summary['successful']} successful, {summary['failed']} failed")
+        if browser:
+            memory = watchdog.summary()
+            logger.info(f"Peak browser memory: {memory['peak_rss_mb']} MB, {len(memory['recycles'])} recycles")
+        if cache:
+            cache.close()
+        if state:
+            state.close()
+        if browser:
+            await browser.close()
@@ -0,0 +1,20 @@
+"""Shared pytest fixtures. Tests import the app as `src.*` from the repository root."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+CSV_HEADER = "filename,title,description,price,grades,subjects,resource_type,reading_tags\n"
+
+
+@pytest.fixture
+def write_csv(tmp_path):
+    """Write products.csv rows (after the standard header) and return its path."""
+    def write(*rows: str, name: str = "products.csv") -> Path:
+        path = tmp_path / name
+        path.write_text(CSV_HEADER + "".join(row + "\n" for row in rows), encoding="utf-8")
+        return path
+    return write
@@ -0,0 +1,49 @@
+from src.breaker import CircuitBreaker, is_site_error, reached_site
+
+UPLOADED = ['validation', 'navigation']
+
+
+def failed(**fields):
+    return {'success': False, 'steps_completed': UPLOADED, **fields}
+
+
+def test_opens_when_failure_rate_reached():
+    breaker = CircuitBreaker({'circuit_breaker': {'min_results': 4, 'failure_rate': 0.5}})
+
+    outcomes = [breaker.record(result) for result in (
+        {'success': True, 'steps_completed': UPLOADED},
+        failed(),
+        {'success': True, 'steps_completed': UPLOADED},
+        failed(),
+    )]
+
+    assert outcomes == [False, False, False, True]
+
+
+def test_local_failures_do_not_count():
+    breaker = CircuitBreaker({'circuit_breaker': {'min_results': 2}})
+
+    for _ in range(10):
+        assert not breaker.record({'success': False, 'steps_completed': [], 'message': 'Validation failed'})
+    assert len(breaker.recent) == 0
+
+
+def test_consecutive_site_errors_open_the_breaker():
+    breaker = CircuitBreaker({'circuit_breaker': {'error_pages': 2, 'min_results': 100}})
+
+    assert not breaker.record(failed(error_page=503))
+    assert breaker.record(failed(save_status=502))
+
+
+def test_disabled_breaker_never_opens():
+    breaker = CircuitBreaker({'circuit_breaker': {'enabled': False, 'min_results': 1}})
+    assert not breaker.record(failed(error_page=500))
+
+
+def test_is_site_error_and_reached_site():
+    assert is_site_error(failed(timeout={'step': 'tags'}))
+    assert is_site_error(failed(save_status=500))
+    assert not is_site_error(failed(save_status=422))
+    assert not is_site_error({'success': True, 'error_page': 500})
+    assert reached_site(failed())
+    assert not reached_site({'success': False})
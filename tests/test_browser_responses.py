@@ -0,0 +1,74 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.browser import is_product_save_response, is_upload_response, parse_product_save_response
+
+TPT = "https://www.teacherspayteachers.com"
+
+
+def response(url, method='POST', content_type='application/json', body=None, post_data=None,
+             status=200, headers=None):
+    request = SimpleNamespace(url=url, method=method, headers={'content-type': content_type},
+                              post_data_json=post_data)
+
+    async def json():
+        if body is None:
+            raise ValueError("not JSON")
+        return body
+
+    return SimpleNamespace(request=request, url=url, ok=status < 400, status=status, json=json,
+                           headers=headers or {})
+
+
+def parse(resp):
+    return asyncio.run(parse_product_save_response(resp))
+
+
+def test_upload_requests():
+    assert is_upload_response(response(f"{TPT}/api/uploads", content_type='multipart/form-data; boundary=x'))
+    assert is_upload_response(response("https://storage.example.com/files/abc.pdf", method='PUT',
+                                       content_type='application/pdf'))
+    assert not is_upload_response(response(f"{TPT}/api/uploads"))  # Not multipart
+    assert not is_upload_response(response(f"{TPT}/track?event=upload", content_type='multipart/form-data'))
+    assert not is_upload_response(response(f"{TPT}/api/uploads", method='GET'))
+
+
+def test_save_requests():
+    assert is_product_save_response(response(f"{TPT}/Product/Create"))
+    assert is_product_save_response(response(f"{TPT}/Product/Edit/123", method='PATCH'))
+    assert is_product_save_response(response(f"{TPT}/graphql", post_data={'operationName': 'CreateProduct'}))
+    assert is_product_save_response(response(f"{TPT}/graphql",
+                                             post_data={'query': 'mutation updateProduct($id: ID!) {}'}))
+    assert not is_product_save_response(response(f"{TPT}/graphql", post_data={'operationName': 'TrackEvent'}))
+    assert not is_product_save_response(response(f"{TPT}/api/product-analytics"))
+    assert not is_product_save_response(response("https://elsewhere.example.com/Product/Create"))
+    assert not is_product_save_response(response(f"{TPT}/Product/Create", method='GET'))
+
+
+def test_listing_id_from_known_fields_only():
+    info = parse(response(f"{TPT}/Product/Create", body={
+        'product': {'id': 4567, 'url': '/Product/Alpha-4567'},
+        'seller': {'id': 99},
+        'tags': [{'id': 1}],
+    }))
+    assert info == {'ok': True, 'status': 200, 'listing_id': '4567', 'url': f"{TPT}/Product/Alpha-4567"}
+
+    info = parse(response(f"{TPT}/graphql", body={'data': {'createProduct': {'product': {'id': '777'}}}}))
+    assert info['listing_id'] == '777'
+    assert info['url'] == f"{TPT}/Product/777"
+
+    # Nested IDs of other objects are never taken for the listing
+    assert parse(response(f"{TPT}/Product/Create", body={'seller': {'profile': {'id': 5}}}))['listing_id'] is None
+
+
+def test_disagreeing_id_and_url_are_not_trusted():
+    info = parse(response(f"{TPT}/Product/Create", body={'id': 1, 'url': '/Product/Alpha-2'}))
+    assert info['listing_id'] is None and info['url'] is None
+
+
+def test_errors_and_redirects():
+    info = parse(response(f"{TPT}/graphql", body={'errors': [{'message': 'bad'}]}))
+    assert info['ok'] is False
+
+    info = parse(response(f"{TPT}/Product/Create", headers={'location': '/Product/Alpha-31'}))
+    assert info['listing_id'] == '31'
@@ -0,0 +1,82 @@
+import os
+
+from src.catalog import ProductCatalog, catalog_path
+
+ROW_A = "001_a.pdf,Alpha,desc,3.00,4-5,Math,Worksheets,fractions;decimals"
+ROW_B = "002_b.pdf,Beta,desc,2.00,6,ELA,Worksheets,poetry"
+
+
+def bump_mtime(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_import_is_incremental(tmp_path, write_csv):
+    csv_path = write_csv(ROW_A, ROW_B)
+    catalog = ProductCatalog(str(tmp_path / "catalog.db"))
+
+    assert catalog.import_csv(str(csv_path)) == {'added': 2, 'updated': 0, 'removed': 0, 'unchanged': 0,
+                                                 'skipped': False}
+    assert catalog.import_csv(str(csv_path))['skipped']
+
+    catalog.set_status('001_a.pdf', 'uploaded')
+    write_csv(ROW_A, ROW_B.replace('Beta', 'Beta 2'))
+    bump_mtime(csv_path)
+    counts = catalog.import_csv(str(csv_path))
+
+    assert (counts['updated'], counts['unchanged']) == (1, 1)
+    assert catalog.get('002_b.pdf')['title'] == 'Beta 2'
+    assert catalog.get('001_a.pdf')['_status'] == 'uploaded'
+    catalog.close()
+
+
+def test_rows_missing_from_the_csv_are_removed(tmp_path, write_csv):
+    csv_path = write_csv(ROW_A, ROW_B)
+    catalog = ProductCatalog(str(tmp_path / "catalog.db"))
+    catalog.import_csv(str(csv_path))
+
+    write_csv(ROW_B)
+    bump_mtime(csv_path)
+    counts = catalog.import_csv(str(csv_path))
+
+    assert counts['removed'] == 1
+    assert catalog.get('001_a.pdf') is None
+    assert [p['filename'] for p in catalog.select(tag='poetry')] == ['002_b.pdf']
+    catalog.close()
+
+
+def test_unparseable_csv_leaves_the_catalog_unchanged(tmp_path, write_csv):
+    csv_path = write_csv(ROW_A, ROW_B)
+    catalog = ProductCatalog(str(tmp_path / "catalog.db"))
+    catalog.import_csv(str(csv_path))
+
+    csv_path.write_text("filename,title\n001_a.pdf,Alpha\n", encoding="utf-8")
+    counts = catalog.import_csv(str(csv_path))
+
+    assert 'error' in counts
+    assert catalog.count() == 2
+    catalog.close()
+
+
+def test_a_catalog_refuses_another_csv(tmp_path, write_csv):
+    first = write_csv(ROW_A)
+    other = write_csv(ROW_B, name="other.csv")
+    catalog = ProductCatalog(str(tmp_path / "catalog.db"))
+    catalog.import_csv(str(first))
+
+    counts = catalog.import_csv(str(other))
+
+    assert 'error' in counts
+    assert catalog.get('001_a.pdf') is not None
+    catalog.close()
+
+
+def test_catalog_path_is_per_csv(tmp_path):
+    settings = {'catalog': {'db_path': str(tmp_path / "catalog.db")},
+                'paths': {'products_csv': str(tmp_path / "products.csv")}}
+
+    assert catalog_path(settings) == str(tmp_path / "catalog.db")
+    assert catalog_path(settings, str(tmp_path / "products.csv")) == str(tmp_path / "catalog.db")
+    other = catalog_path(settings, str(tmp_path / "batch" / "products.csv"))
+    assert other != str(tmp_path / "catalog.db")
+    assert other == catalog_path(settings, str(tmp_path / "batch" / "products.csv"))
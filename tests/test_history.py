@@ -0,0 +1,19 @@
+from src.history import failure_cause
+
+
+def test_success_has_no_cause():
+    assert failure_cause({'success': True}) is None
+
+
+def test_structured_causes():
+    assert failure_cause({'success': False, 'timeout': {'step': 'tags'}}) == 'timeout: tags'
+    assert failure_cause({'success': False, 'crash': {'recovered': False}}) == 'browser crash'
+    assert failure_cause({'success': False, 'unconfirmed': True}) == 'browser crash after save'
+    assert failure_cause({'success': False, 'error_page': 503}) == 'error page (HTTP 503)'
+    assert failure_cause({'success': False, 'save_status': 422}) == 'HTTP 422 on save'
+
+
+def test_message_causes_group_across_files():
+    first = failure_cause({'success': False, 'message': 'Validation failed: 001_a.pdf missing 2 fields'})
+    second = failure_cause({'success': False, 'message': 'Validation failed: 017_b.pdf missing 3 fields'})
+    assert first == second == 'Validation failed'
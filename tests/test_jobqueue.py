@@ -0,0 +1,78 @@
+import time
+
+from src.jobqueue import JobQueue
+
+
+def make_queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.db"))
+
+
+def test_claim_order_is_priority_then_longest_then_submission(tmp_path):
+    queue = make_queue(tmp_path)
+    first = queue.submit({'filename': 'a.pdf'})
+    long_job = queue.submit({'filename': 'b.pdf'}, cost=90)
+    urgent = queue.submit({'filename': 'c.pdf'}, priority=1)
+    second = queue.submit({'filename': 'd.pdf'})
+
+    claimed = [queue.claim('w')['id'] for _ in range(4)]
+
+    assert claimed == [urgent, long_job, first, second]
+    assert queue.claim('w') is None
+    queue.close()
+
+
+def test_expired_lease_is_requeued_and_late_result_refused(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.submit({'filename': 'a.pdf'})
+
+    job = queue.lease('w1', lease_seconds=0.01)
+    assert job['id'] == job_id and job['attempts'] == 1
+    time.sleep(0.05)
+
+    assert queue.expire_leases() == 1
+    assert queue.get(job_id)['status'] == 'queued'
+
+    again = queue.lease('w2', lease_seconds=60)
+    assert again['id'] == job_id and again['attempts'] == 2
+    assert not queue.heartbeat(job_id, 'w1', 60)
+    assert not queue.complete(job_id, {'success': True}, worker='w1')
+    assert queue.complete(job_id, {'success': True}, worker='w2')
+    assert queue.get(job_id)['status'] == 'done'
+    queue.close()
+
+
+def test_heartbeat_keeps_the_lease(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.submit({'filename': 'a.pdf'})
+    queue.lease('w1', lease_seconds=0.05)
+
+    assert queue.heartbeat(job_id, 'w1', 60)
+    time.sleep(0.1)
+    assert queue.expire_leases() == 0
+    assert queue.get(job_id)['status'] == 'running'
+    queue.close()
+
+
+def test_complete_records_failure_and_result(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.submit({'filename': 'a.pdf'})
+    queue.claim('w')
+
+    assert queue.complete(job_id, {'success': False, 'message': 'boom'})
+    job = queue.get(job_id)
+    assert job['status'] == 'failed'
+    assert job['result']['message'] == 'boom'
+    assert queue.counts() == {'failed': 1}
+    queue.close()
+
+
+def test_requeue_running_after_restart(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.submit({'filename': 'a.pdf'})
+    queue.claim('w')
+    queue.close()
+
+    queue = make_queue(tmp_path)
+    assert queue.requeue_running() == 1
+    assert queue.claim('w2')['id'] == job_id
+    queue.close()
@@ -0,0 +1,61 @@
+from src.scheduler import BandwidthMeter, Scheduler
+from src.state import UploadState
+
+
+def make_scheduler(tmp_path, **scheduler_settings):
+    settings = {
+        'paths': {'products_folder': str(tmp_path), 'history_db': str(tmp_path / "history.db"),
+                  'state_db': str(tmp_path / "state.db")},
+        'scheduler': scheduler_settings,
+    }
+    return Scheduler(settings)
+
+
+def write_file(tmp_path, name, size):
+    (tmp_path / name).write_bytes(b"x" * size)
+    return {'filename': name}
+
+
+def test_largest_first_within_a_priority(tmp_path):
+    small = write_file(tmp_path, "small.pdf", 10)
+    large = write_file(tmp_path, "large.pdf", 10_000)
+    urgent = {**write_file(tmp_path, "urgent.pdf", 1), 'priority': '2'}
+
+    order = make_scheduler(tmp_path).order([small, large, urgent])
+
+    assert [p['filename'] for p in order] == ['urgent.pdf', 'large.pdf', 'small.pdf']
+
+
+def test_new_titles_before_reuploads(tmp_path):
+    state = UploadState(str(tmp_path / "state.db"))
+    state.record("old.pdf", listing_id="123", status="draft")
+    state.close()
+    old = write_file(tmp_path, "old.pdf", 10_000)
+    new = write_file(tmp_path, "new.pdf", 10)
+
+    order = make_scheduler(tmp_path).order([old, new])
+
+    assert [p['filename'] for p in order] == ['new.pdf', 'old.pdf']
+
+
+def test_disabled_keeps_csv_order(tmp_path):
+    products = [write_file(tmp_path, "a.pdf", 1), write_file(tmp_path, "b.pdf", 10_000)]
+    scheduler = make_scheduler(tmp_path, enabled=False)
+
+    assert scheduler.order(products) == products
+    assert scheduler.rank(products[1]) == (0, 0)
+
+
+def test_observed_bandwidth_changes_cost(tmp_path):
+    meter = BandwidthMeter(initial_bps=1_000_000)
+    product = write_file(tmp_path, "a.pdf", 2_000_000)
+    scheduler = make_scheduler(tmp_path)
+    scheduler.meter = meter
+    before = scheduler.cost(product)
+
+    meter.observe_result(2_000_000, {'success': True, 'step_ms': {'file_upload': 20_000}})
+
+    assert meter.bps == 100_000
+    assert scheduler.cost(product) > before
+    meter.observe_result(2_000_000, {'success': False, 'step_ms': {'file_upload': 1}})
+    assert meter.samples == 1
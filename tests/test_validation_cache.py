@@ -0,0 +1,34 @@
+import os
+
+from src.validation_cache import ValidationCache, validation_input_key
+
+PRODUCT = {'filename': 'a.pdf', 'title': 'Alpha', 'price': '3.00', 'grades': '4'}
+
+
+def test_key_follows_row_and_file(tmp_path):
+    (tmp_path / "a.pdf").write_bytes(b"%PDF-1.4")
+    key = validation_input_key(PRODUCT, str(tmp_path))
+
+    assert validation_input_key({**PRODUCT, '_row_number': 9}, str(tmp_path)) == key
+    assert validation_input_key({**PRODUCT, 'title': 'Beta'}, str(tmp_path)) != key
+
+    (tmp_path / "a.pdf").write_bytes(b"%PDF-1.4 changed")
+    assert validation_input_key(PRODUCT, str(tmp_path)) != key
+
+    os.remove(tmp_path / "a.pdf")
+    assert validation_input_key(PRODUCT, str(tmp_path)) != key
+
+
+def test_cache_reuses_results_across_opens(tmp_path):
+    db = str(tmp_path / "cache.db")
+    cache = ValidationCache(db)
+    first = cache.validate(PRODUCT, str(tmp_path))
+    assert cache.validate(PRODUCT, str(tmp_path)) == first
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+    cache = ValidationCache(db)
+    cache.validate(PRODUCT, str(tmp_path))
+    cache.validate({**PRODUCT, 'price': '4.00'}, str(tmp_path))
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
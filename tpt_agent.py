@@ -6,19 +6,31 @@ Main entry point for the TPT upload automation tool.
 
 import click
 import logging
+import sys
+from datetime import datetime, timedelta
 from pathlib import Path
 
-from src.metadata import load_products_csv, validate_product
-from src.browser import TPTBrowser
-from src.uploader import TPTUploader
+# Keep module-level imports light: commands that never open a browser
+# (validate, catalog, --help) must not pay for asyncio, Playwright or the
+# uploader. Browser-side modules are imported inside the commands that use
+# them. `python benchmarks/startup_benchmark.py` guards this.
+from src.metadata import load_products_csv, iter_products_csv, validate_product
+from src.catalog import open_catalog, catalog_path, ProductCatalog
+from src.validation_cache import open_validation_cache
 from src.utils import setup_logging, load_settings
 
 
 @click.group()
 @click.option('--verbose', '-v', is_flag=True, help='Enable verbose output')
+@click.option('--import-time', is_flag=True,
+              help='Run the command and report which modules slowed down startup')
 @click.pass_context
-def cli(ctx, verbose):
+def cli(ctx, verbose, import_time):
     """TPT Virtual Assistant - Automate your TPT uploads."""
+    if import_time:
+        from src.startup import run_with_import_time
+        sys.exit(run_with_import_time([a for a in sys.argv[1:] if a != '--import-time']))
+
     ctx.ensure_object(dict)
     ctx.obj['verbose'] = verbose
 
@@ -42,9 +54,15 @@ def upload(ctx, filename, dry_run):
         click.echo("Error: Could not load settings. Copy config/settings.example.yaml to config/settings.yaml")
         return
 
-    # Load and validate product metadata
-    products = load_products_csv(settings['paths']['products_csv'])
-    product = next((p for p in products if p['filename'] == filename), None)
+    # Load and validate product metadata - an indexed lookup when the
+    # catalog is enabled, otherwise a scan of products.csv
+    catalog = open_catalog(settings)
+    if catalog:
+        product = catalog.get(filename)
+        catalog.close()
+    else:
+        products = load_products_csv(settings['paths']['products_csv'])
+        product = next((p for p in products if p['filename'] == filename), None)
 
     if not product:
         click.echo(f"Error: Product '{filename}' not found in products.csv")
@@ -83,12 +101,59 @@ def upload(ctx, filename, dry_run):
     click.echo("Upload functionality not yet implemented.")
 
 
+def print_batch_summary(summary: dict):
+    """Print the summary dictionary returned by run_batch_upload."""
+    click.echo("\n=== Batch Summary ===")
+    click.echo(f"Total:      {summary['total']}")
+    click.echo(f"Successful: {summary['successful']}")
+    click.echo(f"Failed:     {summary['failed']}")
+    click.echo(f"Skipped:    {summary['skipped']}")
+    for result in summary['results']:
+        if not result['success']:
+            click.echo(f"  ✗ {result['filename']}: {result['message']}")
+        elif result.get('url'):
+            click.echo(f"  ✓ {result['filename']}: {result['url']}")
+    memory = summary.get('memory')
+    if memory:
+        peak = memory['peak_rss_mb'] if memory['peak_rss_mb'] is not None else memory['peak_js_heap_mb']
+        if peak is not None:
+            click.echo(f"Peak memory: {peak:.0f} MB")
+        for event in memory['recycles']:
+            click.echo(f"  ↻ Recycled {event['kind']} after product {event['after_product']}: {event['reason']}")
+    for crash in summary.get('crashes', []):
+        outcome = 'retried' if crash['retried'] else 'recovered' if crash['recovered'] else 'not recovered'
+        click.echo(f"  ⚠ Browser crashed during {crash['filename']} (after {crash['step']}): {outcome}")
+    for pause in summary.get('circuit_breaker', []):
+        outcome = 'resumed' if pause['recovered'] else 'gave up'
+        click.echo(f"  ⏸ Paused {pause['paused_seconds']}s ({pause['reason']}), "
+                   f"{pause['probes']} health checks: {outcome}")
+    if summary.get('error'):
+        click.echo(f"Error: {summary['error']}")
+
+
+def record_batch_status(catalog: ProductCatalog | None, summary: dict, dry_run: bool = False):
+    """Store per-product upload outcomes in the catalog, if one is open."""
+    if not catalog:
+        return
+    if not dry_run:
+        for result in summary['results']:
+            catalog.set_status(result['filename'], 'uploaded' if result['success'] else 'failed')
+
+
 @cli.command()
 @click.argument('folder', type=click.Path(exists=True))
 @click.option('--dry-run', is_flag=True, help='Preview without uploading')
+@click.option('--stream', is_flag=True,
+              help='Validate and upload while the CSV is still being read')
+@click.option('--status', help='Only products with this catalog status (e.g. pending)')
+@click.option('--grades', help='Only products with this grade spec (e.g. 4-8)')
+@click.option('--tag', help='Only products with this reading tag, theme or subject')
 @click.pass_context
-def batch(ctx, folder, dry_run):
+def batch(ctx, folder, dry_run, stream, status, grades, tag):
     """Batch upload all products from a folder."""
+    import asyncio
+    from src.uploader import run_batch_upload
+
     logger = logging.getLogger(__name__)
     logger.info(f"Batch upload from: {folder}")
 
@@ -104,40 +169,69 @@ def batch(ctx, folder, dry_run):
         click.echo(f"Error: products.csv not found in {folder}")
         return
 
-    products = load_products_csv(str(csv_path))
+    catalog = open_catalog(settings, str(csv_path))
+    try:
+        if (status or grades or tag) and not catalog:
+            click.echo("Error: --status/--grades/--tag require the catalog (set catalog.enabled in settings).")
+            return
 
-    if not products:
-        click.echo("No products found in CSV.")
-        return
+        if stream:
+            # Streaming mode: no up-front validation pass. Each product is
+            # validated as it is read and uploaded as soon as the browser is ready.
+            if not dry_run and not click.confirm(f"\nStream-upload all products in {csv_path}?"):
+                click.echo("Batch upload cancelled.")
+                return
+
+            source = catalog.select(status=status, grades=grades, tag=tag) if catalog else iter_products_csv(str(csv_path))
+            summary = asyncio.run(run_batch_upload(source, settings, dry_run=dry_run))
+            record_batch_status(catalog, summary, dry_run)
+            print_batch_summary(summary)
+            return
 
-    click.echo(f"\nFound {len(products)} products to upload:\n")
+        if catalog:
+            products = list(catalog.select(status=status, grades=grades, tag=tag))
+        else:
+            products = load_products_csv(str(csv_path))
 
-    # Validate all products first
-    all_valid = True
-    for i, product in enumerate(products, 1):
-        errors = validate_product(product)
-        status = "✓" if not errors else "✗"
-        click.echo(f"  {status} {product['filename']}")
-        if errors:
-            all_valid = False
-            for error in errors:
-                click.echo(f"      - {error}")
+        if not products:
+            click.echo("No products found in CSV.")
+            return
 
-    if not all_valid:
-        click.echo("\nSome products have validation errors. Fix them before uploading.")
-        return
+        click.echo(f"\nFound {len(products)} products to upload:\n")
+
+        # Validate all products first (unchanged rows reuse cached results)
+        all_valid = True
+        cache = open_validation_cache(settings)
+        for i, product in enumerate(products, 1):
+            errors = validate_product(product, cache)
+            mark = "✓" if not errors else "✗"
+            click.echo(f"  {mark} {product['filename']}")
+            if errors:
+                all_valid = False
+                for error in errors:
+                    click.echo(f"      - {error}")
+        if cache:
+            cache.close()
+
+        if not all_valid:
+            click.echo("\nSome products have validation errors. Fix them before uploading.")
+            return
 
-    if dry_run:
-        click.echo("\n[DRY RUN] Validation passed. No uploads performed.")
-        return
+        if dry_run:
+            click.echo("\n[DRY RUN] Validation passed. No uploads performed.")
+            return
 
-    # Confirm batch upload
-    if not click.confirm(f"\nUpload all {len(products)} products?"):
-        click.echo("Batch upload cancelled.")
-        return
+        # Confirm batch upload
+        if not click.confirm(f"\nUpload all {len(products)} products?"):
+            click.echo("Batch upload cancelled.")
+            return
 
-    # TODO: Implement batch upload logic
-    click.echo("\nBatch upload functionality not yet implemented.")
+        summary = asyncio.run(run_batch_upload(products, settings))
+        record_batch_status(catalog, summary)
+        print_batch_summary(summary)
+    finally:
+        if catalog:
+            catalog.close()
 
 
 @cli.command()
@@ -149,7 +243,12 @@ def validate():
         return
 
     csv_path = settings['paths']['products_csv']
-    products = load_products_csv(csv_path)
+    catalog = open_catalog(settings)
+    if catalog:
+        products = list(catalog.select())
+        catalog.close()
+    else:
+        products = load_products_csv(csv_path)
 
     if not products:
         click.echo("No products found or CSV could not be loaded.")
@@ -158,8 +257,9 @@ def validate():
     click.echo(f"Validating {len(products)} products...\n")
 
     error_count = 0
+    cache = open_validation_cache(settings)
     for product in products:
-        errors = validate_product(product)
+        errors = validate_product(product, cache)
         if errors:
             error_count += 1
             click.echo(f"✗ {product.get('filename', 'Unknown')}")
@@ -169,6 +269,456 @@ def validate():
             click.echo(f"✓ {product.get('filename', 'Unknown')}")
 
     click.echo(f"\nValidation complete: {len(products) - error_count}/{len(products)} products valid.")
+    if cache:
+        click.echo(f"({cache.misses} rechecked, {cache.hits} unchanged since last run)")
+        cache.close()
+
+
+@cli.command()
+@click.option('--dry-run', is_flag=True, help='Show the plan without uploading')
+@click.option('--cached', is_flag=True, help='Use the last saved store index instead of re-scraping')
+def sync(dry_run, cached):
+    """Upload only the products that are not already on the store."""
+    import asyncio
+    from src.sync import run_sync
+
+    settings = load_settings()
+    if not settings:
+        click.echo("Error: Could not load settings.")
+        return
+
+    catalog = open_catalog(settings)
+    products = list(catalog.select()) if catalog else load_products_csv(settings['paths']['products_csv'])
+    if catalog:
+        catalog.close()
+
+    if not products:
+        click.echo("No products found in CSV.")
+        return
+
+    summary = asyncio.run(run_sync(products, settings, dry_run=True, use_cached_index=cached))
+    if summary.get('error'):
+        click.echo(f"Error: {summary['error']}")
+        return
+
+    plan = summary['plan']
+    click.echo("\n=== Sync Plan ===")
+    for action in summary['actions']:
+        if action['action'] != 'skip':
+            click.echo(f"  {action['action']:<7} {action['filename']} ({action['reason']})")
+    click.echo(f"{plan['create']} to create, {plan['update']} to update, {plan['skip']} already on store")
+
+    if dry_run or not (plan['create'] or plan['update']):
+        return
+
+    if not click.confirm(f"\nCreate {plan['create']} and update {plan['update']} listings?"):
+        click.echo("Sync cancelled.")
+        return
+
+    # The index was just saved, so the real run re-uses it
+    summary = asyncio.run(run_sync(products, settings, use_cached_index=True))
+    if summary.get('batch'):
+        print_batch_summary(summary['batch'])
+    if summary.get('edits'):
+        edits = summary['edits']
+        click.echo(f"Listings updated: {edits['updated']}, unchanged: {edits['unchanged']}, failed: {edits['failed']}")
+    if summary.get('error'):
+        click.echo(f"Error: {summary['error']}")
+
+
+@cli.command('bulk-edit')
+@click.argument('edits_csv', type=click.Path(exists=True))
+@click.option('--workers', type=int, help='Listings edited at once (default: bulk_edit.workers)')
+@click.option('--dry-run', is_flag=True, help='Show which fields would change without saving')
+def bulk_edit(edits_csv, workers, dry_run):
+    """Edit existing listings from a CSV of listing IDs and changed fields."""
+    import asyncio
+    from src.bulk_edit import load_edits_csv, run_bulk_edit
+
+    settings = load_settings()
+    if not settings:
+        click.echo("Error: Could not load settings.")
+        return
+
+    edits = load_edits_csv(edits_csv)
+    if not edits:
+        click.echo("No edits found in CSV.")
+        return
+
+    click.echo(f"Found {len(edits)} listings to edit.")
+    if not dry_run and not click.confirm(f"\nApply changes to {len(edits)} listings?"):
+        click.echo("Bulk edit cancelled.")
+        return
+
+    summary = asyncio.run(run_bulk_edit(edits, settings, dry_run=dry_run, workers=workers))
+    for result in summary['results']:
+        status = "✓" if result['success'] else "✗"
+        click.echo(f"  {status} {result['listing_id']}: {result['message']}")
+    click.echo(f"\nUpdated: {summary['updated']}, unchanged: {summary['unchanged']}, failed: {summary['failed']}")
+    if summary.get('error'):
+        click.echo(f"Error: {summary['error']}")
+
+
+@cli.command()
+@click.option('--existing', is_flag=True, help='Also upload every product already present at start-up')
+@click.option('--dry-run', is_flag=True, help='Validate detected products instead of uploading')
+def watch(existing, dry_run):
+    """Watch the products folder and CSV, uploading new and changed products."""
+    import asyncio
+    from src.watcher import run_watch
+
+    settings = load_settings()
+    if not settings:
+        click.echo("Error: Could not load settings.")
+        return
+
+    csv_path = settings['paths']['products_csv']
+    click.echo(f"Watching {settings['paths']['products_folder']} and {csv_path} (Ctrl+C to stop)...")
+
+    try:
+        summary = asyncio.run(run_watch(settings, csv_path, include_existing=existing, dry_run=dry_run))
+    except KeyboardInterrupt:
+        click.echo("\nStopped watching.")
+        return
+
+    if summary and summary.get('error'):
+        click.echo(f"Error: {summary['error']}")
+
+
+@cli.group()
+def daemon():
+    """Run or talk to the long-lived upload daemon."""
+
+
+@daemon.command('start')
+def daemon_start():
+    """Start the daemon in the foreground (keeps a logged-in browser warm)."""
+    import asyncio
+    from src.daemon import UploadDaemon
+
+    settings = load_settings()
+    if not settings:
+        click.echo("Error: Could not load settings.")
+        return
+
+    try:
+        if not asyncio.run(UploadDaemon(settings).run()):
+            click.echo("Error: Daemon could not start the browser or log in.")
+    except KeyboardInterrupt:
+        click.echo("\nDaemon stopped. Unfinished jobs will resume on next start.")
+
+
+@daemon.command('submit')
+@click.argument('filenames', nargs=-1, required=True)
+def daemon_submit(filenames):
+    """Queue one or more products for upload by the daemon."""
+    from src.daemon import send_request
+
+    settings = load_settings()
+    if not settings:
+        click.echo("Error: Could not load settings.")
+        return
+
+    reply = send_request(settings, {'cmd': 'submit', 'filenames': list(filenames)})
+    if not reply.get('ok'):
+        click.echo(f"Error: {reply.get('error')}")
+        return
+
+    for job_id in reply['jobs']:
+        click.echo(f"Queued job {job_id}")
+    for name in reply.get('missing', []):
+        click.echo(f"Not found in products.csv: {name}")
+
+
+@daemon.command('status')
+@click.argument('job_id', type=int, required=False)
+def daemon_status(job_id):
+    """Show the queue, or one job's result."""
+    from src.daemon import send_request
+
+    settings = load_settings()
+    if not settings:
+        click.echo("Error: Could not load settings.")
+        return
+
+    request = {'cmd': 'status'} if job_id is None else {'cmd': 'status', 'id': job_id}
+    reply = send_request(settings, request)
+    if not reply.get('ok'):
+        click.echo(f"Error: {reply.get('error')}")
+        return
+
+    if job_id is not None:
+        job = reply['job']
+        message = (job['result'] or {}).get('message', '')
+        click.echo(f"Job {job['id']}: {job['filename']} - {job['status']} {message}")
+        return
+
+    counts = reply['counts']
+    click.echo(", ".join(f"{status}: {n}" for status, n in sorted(counts.items())) or "Queue is empty")
+    for job in reply['jobs']:
+        click.echo(f"  {job['id']:>5}  {job['status']:<8} {job['filename']}")
+
+
+@daemon.command('stop')
+def daemon_stop():
+    """Ask the daemon to finish in-flight uploads and exit."""
+    from src.daemon import send_request
+
+    settings = load_settings()
+    if not settings:
+        click.echo("Error: Could not load settings.")
+        return
+
+    reply = send_request(settings, {'cmd': 'shutdown'})
+    click.echo("Daemon stopping." if reply.get('ok') else f"Error: {reply.get('error')}")
+
+
+@cli.group()
+def coordinator():
+    """Share a product queue between upload workers on several machines."""
+
+
+@coordinator.command('start')
+def coordinator_start():
+    """Serve the product queue to workers in the foreground."""
+    from src.coordinator import Coordinator
+
+    settings = load_settings()
+    if not settings:
+        click.echo("Error: Could not load settings.")
+        return
+
+    try:
+        Coordinator(settings).serve()
+    except OSError as e:
+        click.echo(f"Error: Could not start coordinator: {e}")
+    except KeyboardInterrupt:
+        click.echo("\nCoordinator stopped. Leased jobs are requeued once their leases expire.")
+
+
+@coordinator.command('submit')
+@click.argument('filenames', nargs=-1)
+@click.option('--all', 'submit_all', is_flag=True, help='Queue every product in products.csv')
+@click.option('--url', help='Coordinator URL (default: coordinator.url / host and port)')
+def coordinator_submit(filenames, submit_all, url):
+    """Queue products for the workers."""
+    from src.coordinator import coordinator_request
+
+    settings = load_settings()
+    if not settings:
+        click.echo("Error: Could not load settings.")
+        return
+
+    if submit_all:
+        from src.metadata import iter_products_csv
+        filenames = [p['filename'] for p in iter_products_csv(settings['paths']['products_csv'])]
+    if not filenames:
+        click.echo("Nothing to queue (give filenames or --all).")
+        return
+
+    reply = coordinator_request(settings, 'POST', '/submit', {'filenames': list(filenames)}, url)
+    if not reply.get('ok'):
+        click.echo(f"Error: {reply.get('error')}")
+        return
+
+    click.echo(f"Queued {len(reply['jobs'])} jobs")
+    for name in reply.get('missing', []):
+        click.echo(f"Not found in products.csv: {name}")
+
+
+@coordinator.command('status')
+@click.option('--url', help='Coordinator URL (default: coordinator.url / host and port)')
+def coordinator_status(url):
+    """Show the shared queue and which worker holds each job."""
+    from src.coordinator import coordinator_request
+
+    settings = load_settings()
+    if not settings:
+        click.echo("Error: Could not load settings.")
+        return
+
+    reply = coordinator_request(settings, 'GET', '/status', url=url)
+    if not reply.get('ok'):
+        click.echo(f"Error: {reply.get('error')}")
+        return
+
+    counts = reply['counts']
+    click.echo(", ".join(f"{status}: {n}" for status, n in sorted(counts.items())) or "Queue is empty")
+    if reply.get('wait'):
+        click.echo(f"Rate budget: next upload in {reply['wait']}s")
+    for job in reply['jobs']:
+        click.echo(f"  {job['id']:>5}  {job['status']:<8} {job['worker'] or '':<20} {job['filename']}")
+
+
+@cli.command()
+@click.option('--url', help='Coordinator URL (default: coordinator.url / host and port)')
+@click.option('--name', help='Worker name shown by the coordinator (default: host-pid)')
+@click.option('--dry-run', is_flag=True, help='Validate leased products instead of uploading')
+@click.option('--exit-when-empty', is_flag=True, help='Stop once the shared queue is finished')
+def worker(url, name, dry_run, exit_when_empty):
+    """Upload products leased from a coordinator."""
+    import asyncio
+    from src.coordinator import run_worker
+
+    settings = load_settings()
+    if not settings:
+        click.echo("Error: Could not load settings.")
+        return
+
+    try:
+        stats = asyncio.run(run_worker(settings, url, name, dry_run=dry_run, exit_when_empty=exit_when_empty))
+    except KeyboardInterrupt:
+        click.echo("\nWorker stopped. Its leased job is requeued once the lease expires.")
+        return
+
+    if stats.get('error'):
+        click.echo(f"Error: {stats['error']}")
+        return
+    click.echo(f"Worker {stats['worker']}: {stats['successful']} succeeded, {stats['failed']} failed")
+
+
+@cli.command()
+@click.option('--store', 'names', multiple=True, help='Only this store (repeatable; default: all stores)')
+@click.option('--dry-run', is_flag=True, help='Validate every store\'s catalog without uploading')
+def stores(names, dry_run):
+    """Upload the catalogs of all configured stores at once."""
+    import asyncio
+    from src.stores import load_stores, run_stores
+
+    settings = load_settings()
+    if not settings:
+        click.echo("Error: Could not load settings.")
+        return
+
+    configured = [store for store in load_stores(settings) if not names or store['name'] in names]
+    if not configured:
+        click.echo("No matching stores configured (see 'stores:' in settings).")
+        return
+
+    click.echo(f"Stores: {', '.join(store['name'] for store in configured)}")
+    if not dry_run and not click.confirm(f"\nUpload the catalogs of {len(configured)} stores?"):
+        click.echo("Cancelled.")
+        return
+
+    for summary in asyncio.run(run_stores(settings, list(names) or None, dry_run=dry_run)):
+        click.echo(f"\n##### Store: {summary['store']} #####")
+        print_batch_summary(summary)
+
+
+@cli.command()
+@click.option('--days', default=30, show_default=True, help='How far back to look')
+@click.option('--runs', default=10, show_default=True, help='Recent runs to list')
+def stats(days, runs):
+    """Show upload throughput, slow steps, failure causes and an ETA."""
+    from src.history import open_run_history
+    from src.state import open_upload_state
+
+    settings = load_settings()
+    if not settings:
+        click.echo("Error: Could not load settings.")
+        return
+
+    history = open_run_history(settings)
+    try:
+        recent = history.recent_runs(runs)
+        if not recent:
+            click.echo("No uploads recorded yet - run a batch first.")
+            return
+
+        click.echo("=== Recent Runs ===")
+        for run in recent:
+            started = datetime.fromtimestamp(run['started_at']).strftime('%Y-%m-%d %H:%M')
+            rate = f"{run['products_per_hour']:.1f}/h" if run['products_per_hour'] else "-"
+            state = "" if run['finished_at'] else " (unfinished)"
+            click.echo(f"  #{run['id']} {started}: {run['successful']}/{run['processed']} uploaded, "
+                       f"{rate}{state}")
+
+        daily = history.daily_throughput(days)
+        if daily:
+            click.echo("\n=== Products/Hour by Day (upload time only) ===")
+            for day in daily:
+                rate = f"{day['products_per_hour']:.1f}" if day['products_per_hour'] else "-"
+                click.echo(f"  {day['day']}: {rate:>6}  ({day['uploaded']} uploaded, {day['failed']} failed)")
+
+        steps = history.slowest_steps(days)
+        if steps:
+            click.echo("\n=== Slowest Steps ===")
+            for step in steps:
+                click.echo(f"  {step['step']:<15} avg {step['avg_ms'] / 1000:6.1f}s  "
+                           f"max {step['max_ms'] / 1000:6.1f}s  ({step['samples']} uploads)")
+
+        causes = history.failure_causes(days)
+        if causes:
+            click.echo("\n=== Failure Causes ===")
+            for cause in causes:
+                click.echo(f"  {cause['count']:>4} x {cause['cause']}")
+                click.echo(f"         last: {cause['last_message']}")
+
+        # Pending: the catalog knows; otherwise CSV rows without a recorded listing
+        catalog = open_catalog(settings)
+        if catalog:
+            pending = sum(1 for _ in catalog.select(status='pending'))
+            catalog.close()
+        else:
+            csv_path = settings.get('paths', {}).get('products_csv', './products/products.csv')
+            products = load_products_csv(csv_path) if Path(csv_path).exists() else []
+            state = open_upload_state(settings)
+            uploaded = {filename for filename, record in state.all().items() if record.get('listing_id')}
+            state.close()
+            pending = sum(1 for product in products if product.get('filename') not in uploaded)
+
+        seconds = history.seconds_per_product()
+        click.echo(f"\nPending products: {pending}")
+        if pending and seconds:
+            eta = timedelta(seconds=round(pending * seconds))
+            click.echo(f"ETA: {eta} at {seconds:.0f}s per product (recent runs, including delays and retries)")
+    finally:
+        history.close()
+
+
+@cli.group('catalog')
+def catalog_group():
+    """Manage the optional SQLite product catalog."""
+
+
+@catalog_group.command('import')
+@click.argument('csv_file', required=False)
+@click.option('--force', is_flag=True, help='Re-read the CSV even if it looks unchanged')
+def catalog_import(csv_file, force):
+    """Import products.csv into the catalog (only changed rows)."""
+    settings = load_settings()
+    if not settings:
+        click.echo("Error: Could not load settings.")
+        return
+
+    csv_path = csv_file or settings['paths']['products_csv']
+    store = ProductCatalog(catalog_path(settings, csv_path))
+    counts = store.import_csv(csv_path, force=force)
+
+    if counts.get('error'):
+        click.echo(f"Error: {counts['error']} (catalog left unchanged)")
+    elif counts['skipped']:
+        click.echo(f"{csv_path} unchanged since last import ({store.count()} products).")
+    else:
+        click.echo(f"Imported {csv_path}: {counts['added']} added, {counts['updated']} updated, "
+                   f"{counts['removed']} removed, {counts['unchanged']} unchanged.")
+    store.close()
+
+
+@catalog_group.command('export')
+@click.argument('output')
+@click.option('--csv', 'csv_file', help='Export the catalog of this CSV (default: paths.products_csv)')
+def catalog_export(output, csv_file):
+    """Export the catalog back to a CSV file."""
+    settings = load_settings()
+    if not settings:
+        click.echo("Error: Could not load settings.")
+        return
+
+    store = ProductCatalog(catalog_path(settings, csv_file))
+    count = store.export_csv(output)
+    store.close()
+    click.echo(f"Exported {count} products to {output}")
 
 
 if __name__ == '__main__':